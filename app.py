@@ -1,24 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request, Response
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response, WebSocket
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.requests import HTTPConnection
+from fastapi.responses import PlainTextResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
 from datetime import timedelta
 import time
 import asyncio
+import threading
 import uvicorn
 
 # Imports des fonctionnalites avancées
-from server import execute_tool, get_available_tools, health_check as fastmcp_health_check
+from server import execute_tool_result, get_available_tools, get_batch_tool, health_check as fastmcp_health_check, liveness_check, client_pool
 from config import config
-from auth import authenticate_user, get_current_active_user, create_access_token, Token, User, users_db
-from logging_config import logger, setup_logger
-from monitoring import PrometheusMiddleware, start_monitoring, get_health_status
+from auth import (
+    authenticate_user_async, get_current_active_user, get_current_principal, require_scope, check_tool_scope, has_scope,
+    create_access_token, create_api_key, revoke_api_key, list_api_keys, Token, User, users_db,
+    APIKeyCreate, APIKeyInfo
+)
+from logging_config import logger, setup_logger, is_sampled, Truncated
+from monitoring import PrometheusMiddleware, start_monitoring, get_health_status, event_loop_monitor
+from tracing import TracingMiddleware, setup_tracing
+from profiling import cpu_profiler, heap_profiler, render_collapsed, ProfilerBusyError
+from responses import FastJSONResponse, ResultTooLargeError, result_response, wrap_result, dumps_json
+from static_assets import static_assets
+from ws_gateway import ToolCallSession
+from jobs import job_manager, is_job_visible, JobQueueFullError
+from scheduler import scheduling_context, select_priority
+import cache
 from cache import start_cache_cleanup, get_cache_stats, tool_cache_manager
-from resilience import CircuitBreakerError, get_all_circuit_breakers_state, reset_circuit_breaker
+from capture import traffic_capture
+from resilience import CircuitBreakerError, OverloadError, get_all_circuit_breakers_state, reset_circuit_breaker
 
 # Durée de validité du token (30 minutes)
 ACCESS_TOKEN_EXPIRE_MINUTES = config.security.access_token_expire_minutes
@@ -30,7 +44,9 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    root_path=config.api.root_path
+    root_path=config.api.root_path,
+    # Mode JSON rapide: sérialisation orjson pour toutes les réponses
+    default_response_class=FastJSONResponse if config.api.fast_json else JSONResponse
 )
 
 # Ajout des middlewares
@@ -45,9 +61,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Ajout du middleware Prometheus pour les métriques
+# Ajout du middleware Prometheus pour les métriques et l'en-tête X-Process-Time
 app.add_middleware(PrometheusMiddleware)
 
+# Middleware de tracing (le plus externe, pour couvrir toute la requête)
+app.add_middleware(TracingMiddleware)
+
 # Middleware pour la limitation de débit (rate limiting)
 if config.security.rate_limiting_enabled:
     from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -75,6 +94,7 @@ class Tool(BaseModel):
     parameters: List[ToolParameter]
     cachable: bool = False
     cache_ttl: Optional[int] = None
+    idempotent: bool = True
 
 class CircuitBreakerState(BaseModel):
     name: str
@@ -87,25 +107,11 @@ class CircuitBreakerState(BaseModel):
     seconds_since_last_failure: Optional[float] = None
     seconds_since_last_success: float
 
-# Middleware pour mesurer la durée des requêtes
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f"Erreur lors du traitement de la requête {request.url.path}: {str(e)}")
-        raise
-
 # Endpoint d'authentification
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """Endpoint pour obtenir un token d'accès."""
-    user = authenticate_user(users_db, form_data.username, form_data.password)
+    user = await authenticate_user_async(users_db, form_data.username, form_data.password)
     if not user:
         logger.warning(f"Tentative de connexion échouée pour l'utilisateur {form_data.username}")
         raise HTTPException(
@@ -127,35 +133,107 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     """Endpoint pour récupérer les informations de l'utilisateur connecté."""
     return current_user
 
+async def no_auth() -> None:
+    """Dépendance utilisée lorsque l'authentification est désactivée."""
+    return None
+
 # Dépendance conditionnelle pour l'authentification
 def get_auth_dependency():
-    """Retourne la dépendance d'authentification si elle est activée, sinon None."""
+    """Retourne la dépendance d'authentification (JWT ou clé d'API) si elle est activée."""
     if config.security.auth_enabled:
-        return Depends(get_current_active_user)
-    return None
+        return Depends(get_current_principal)
+    return Depends(no_auth)
 
 # Récupérer la dépendance d'authentification
 auth_dependency = get_auth_dependency()
 
+# Dépendance des endpoints d'administration
+admin_dependency = Depends(require_scope("admin"))
+
 # Endpoint pour appeler un outil - avec rate limiting si activé
 if config.security.rate_limiting_enabled:
     @app.post("/call_tool/")
     @limiter.limit(f"{config.security.rate_limit_requests}/{config.security.rate_limit_window}s")
     async def call_tool_endpoint(request: Request, tool_req: ToolRequest, current_user: Optional[User] = auth_dependency):
-        return await _call_tool(tool_req)
+        return await _call_tool_for_user(request, tool_req.tool_name, tool_req.params, current_user)
+
+    @app.post("/call_tool_batch/")
+    @limiter.limit(f"{config.security.rate_limit_requests}/{config.security.rate_limit_window}s")
+    async def call_tool_batch_endpoint(request: Request, tool_req: ToolRequest, current_user: Optional[User] = auth_dependency):
+        return await _call_batch_tool_for_user(request, tool_req, current_user)
 else:
     @app.post("/call_tool/")
-    async def call_tool_endpoint(tool_req: ToolRequest, current_user: Optional[User] = auth_dependency):
-        return await _call_tool(tool_req)
+    async def call_tool_endpoint(request: Request, tool_req: ToolRequest, current_user: Optional[User] = auth_dependency):
+        return await _call_tool_for_user(request, tool_req.tool_name, tool_req.params, current_user)
+
+    @app.post("/call_tool_batch/")
+    async def call_tool_batch_endpoint(request: Request, tool_req: ToolRequest, current_user: Optional[User] = auth_dependency):
+        return await _call_batch_tool_for_user(request, tool_req, current_user)
+
+async def _call_batch_tool_for_user(request: Request, tool_req: ToolRequest, user: Optional[User]):
+    """Appel par lot: les paramètres sont des colonnes, traitées en une seule invocation de l'outil `<outil>_batch`."""
+    batch_tool = get_batch_tool(tool_req.tool_name)
+    if batch_tool is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"L'outil {tool_req.tool_name} n'a pas d'implémentation par lot")
+    # Droits de l'outil unitaire: un lot n'ouvre pas d'accès supplémentaire
+    return await _call_tool_for_user(request, batch_tool, tool_req.params, user, scope_tool=tool_req.tool_name)
+
+async def _call_tool_for_user(connection: HTTPConnection, tool_name: str, params: Dict[str, Any], user: Optional[User],
+                              stream: bool = True, scope_tool: Optional[str] = None):
+    """Vérifie les droits puis appelle l'outil dans la classe de priorité et le flux de l'appelant.
+    
+    L'en-tête X-Priority permet de passer en classe "batch", ou en classe
+    "admin" pour les administrateurs; le flux est celui de l'utilisateur
+    authentifié, ou de l'adresse du client à défaut.
+    """
+    check_tool_scope(user, scope_tool or tool_name)
+    priority = select_priority(connection.headers.get("x-priority"), user is None or has_scope(user, "admin"))
+    tenant = user.username if user else (connection.client.host if connection.client else None)
+    with scheduling_context(priority, tenant):
+        if traffic_capture.enabled and traffic_capture.is_sampled(tool_name, params):
+            return await _call_tool_captured(ToolRequest(tool_name=tool_name, params=params), stream, priority)
+        return await _call_tool(ToolRequest(tool_name=tool_name, params=params), stream)
+
+async def _call_tool_captured(tool_req: ToolRequest, stream: bool, priority: Optional[str]):
+    """Appel d'outil enregistré par la capture du trafic, avec sa latence, son statut et l'issue du cache."""
+    outcome: Dict[str, str] = {}
+    token = cache.cache_lookup_outcome.set(outcome)
+    started_at, start = time.time(), time.perf_counter()
+    status_code = status.HTTP_200_OK
+    try:
+        return await _call_tool(tool_req, stream)
+    except HTTPException as e:
+        status_code = e.status_code
+        raise
+    except asyncio.CancelledError:
+        status_code = 499  # Client parti avant la réponse
+        raise
+    finally:
+        cache.cache_lookup_outcome.reset(token)
+        traffic_capture.record(started_at, tool_req.tool_name, tool_req.params, time.perf_counter() - start,
+                               status_code, outcome.get("cache"), priority)
 
 # Fonction interne pour traiter l'appel d'outil
-async def _call_tool(tool_req: ToolRequest):
-    """Traitement de l'appel d'outil."""
-    logger.info(f"Appel de l'outil {tool_req.tool_name} avec les paramètres {tool_req.params}")
+async def _call_tool(tool_req: ToolRequest, stream: bool = True):
+    """Traitement de l'appel d'outil.
+    
+    Sans `stream`, la réponse est toujours assemblée en mémoire (messages WebSocket).
+    """
+    # Logs échantillonnés et formatés à la demande, les valeurs volumineuses sont tronquées
+    sampled = is_sampled("call_tool")
+    log_fields = {"fields": {"route": "call_tool", "tool_name": tool_req.tool_name}}
+    if sampled:
+        logger.info("Appel de l'outil %s avec les paramètres %s", tool_req.tool_name, Truncated(tool_req.params), extra=log_fields)
     try:
-        result = await execute_tool(tool_req.tool_name, tool_req.params)
-        logger.info(f"Résultat de l'outil {tool_req.tool_name}: {result}")
-        return {"result": result}
+        # Résultat sérialisé une seule fois (ou tel que stocké dans le cache): renvoyé sans ré-encodage,
+        # diffusé par morceaux au-delà de API_RESULT_STREAM_THRESHOLD
+        serialized = await execute_tool_result(tool_req.tool_name, tool_req.params)
+        if sampled:
+            logger.info("Résultat de l'outil %s: %s", tool_req.tool_name, Truncated(serialized), extra=log_fields)
+        if not stream:
+            return wrap_result(serialized.to_bytes())
+        return result_response(serialized, config.api.result_stream_threshold, config.api.result_chunk_size)
     except CircuitBreakerError as e:
         logger.error(f"Circuit ouvert pour l'outil {tool_req.tool_name}: {str(e)}")
         raise HTTPException(
@@ -163,6 +241,16 @@ async def _call_tool(tool_req: ToolRequest):
             detail=f"Service temporairement indisponible: {str(e)}",
             headers={"Retry-After": str(config.resilience.recovery_timeout)}
         )
+    except ResultTooLargeError as e:
+        logger.error(f"Résultat de l'outil {tool_req.tool_name} refusé: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    except OverloadError as e:
+        logger.warning(f"Appel de l'outil {tool_req.tool_name} rejeté: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service surchargé: {str(e)}",
+            headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         logger.error(f"Erreur de validation pour l'outil {tool_req.tool_name}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -170,12 +258,85 @@ async def _call_tool(tool_req: ToolRequest):
         logger.error(f"Erreur lors de l'appel de l'outil {tool_req.tool_name}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+# Appels d'outils multiplexés sur une connexion WebSocket authentifiée une seule fois
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """Endpoint WebSocket pour les appels d'outils multiplexés (voir ws_gateway.ToolCallSession)."""
+    async def call_tool(tool_name: str, params: Dict[str, Any], user: Optional[User]):
+        return await _call_tool_for_user(websocket, tool_name, params, user, stream=False)
+
+    session = ToolCallSession(
+        websocket,
+        call_tool,
+        max_concurrency=config.api.ws_max_concurrency,
+        auth_timeout=config.api.ws_auth_timeout
+    )
+    await session.run()
+
+# Jobs asynchrones pour les outils de longue durée
+def check_jobs_enabled():
+    if not config.jobs.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Les jobs asynchrones sont désactivés")
+
+async def get_visible_job(job_id: str, user: Optional[User]) -> Dict[str, Any]:
+    """Récupère un job en vérifiant qu'il appartient à l'utilisateur (ou que celui-ci est administrateur)."""
+    check_jobs_enabled()
+    record = await job_manager.get(job_id)
+    if record is None or not is_job_visible(record, user.username if user else None, user is None or has_scope(user, "admin")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} non trouvé")
+    return record
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(tool_req: ToolRequest, response: Response, current_user: Optional[User] = auth_dependency):
+    """Place un appel d'outil dans la file des jobs et renvoie immédiatement son identifiant."""
+    check_jobs_enabled()
+    check_tool_scope(current_user, tool_req.tool_name)
+    try:
+        record = await job_manager.submit(tool_req.tool_name, tool_req.params, current_user.username if current_user else None)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    response.headers["Location"] = f"{config.api.root_path}/jobs/{record['id']}"
+    return {"id": record["id"], "status": record["status"]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: Optional[User] = auth_dependency):
+    """Renvoie l'état et, s'il est terminé, le résultat d'un job."""
+    return await get_visible_job(job_id, current_user)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, current_user: Optional[User] = auth_dependency):
+    """Flux Server-Sent Events des changements d'état d'un job, jusqu'à son achèvement."""
+    await get_visible_job(job_id, current_user)
+
+    async def stream():
+        async for record in job_manager.watch(job_id):
+            if record is None:
+                yield b": keep-alive\n\n"
+            else:
+                yield b"event: " + record["status"].encode() + b"\ndata: " + dumps_json(record) + b"\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, current_user: Optional[User] = auth_dependency):
+    """Annule un job en attente ou en cours."""
+    await get_visible_job(job_id, current_user)
+    return await job_manager.cancel(job_id)
+
 @app.get("/list_tools/", response_model=Dict[str, List[Tool]])
 async def list_tools_endpoint(current_user: Optional[User] = auth_dependency):
     """Endpoint pour lister tous les outils disponibles."""
-    logger.info("Liste des outils demandée")
+    if is_sampled("list_tools"):
+        logger.info("Liste des outils demandée")
     try:
         tools = await get_available_tools()
+        if config.api.fast_json:
+            # Données internes de confiance: pas de revalidation par le modèle de réponse
+            return FastJSONResponse({"tools": tools})
         return {"tools": tools}
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des outils: {str(e)}")
@@ -183,7 +344,7 @@ async def list_tools_endpoint(current_user: Optional[User] = auth_dependency):
 
 # Endpoint d'administration - accessibles uniquement si authenticated
 @app.get("/admin/health", response_model=Dict[str, Any])
-async def admin_health_check(current_user: User = Depends(get_current_active_user)):
+async def admin_health_check(current_user: User = admin_dependency):
     """Vérifie l'état de santé détaillé de l'application."""
     fastmcp_status = await fastmcp_health_check()
     system_status = get_health_status()
@@ -205,27 +366,110 @@ async def admin_health_check(current_user: User = Depends(get_current_active_use
     }
 
 @app.get("/admin/cache", response_model=Dict[str, Any])
-async def admin_cache_stats(current_user: User = Depends(get_current_active_user)):
+async def admin_cache_stats(current_user: User = admin_dependency):
     """Récupère les statistiques du cache."""
     return await get_cache_stats()
 
 @app.post("/admin/cache/invalidate")
-async def admin_invalidate_cache(tool_name: Optional[str] = None, current_user: User = Depends(get_current_active_user)):
+async def admin_invalidate_cache(tool_name: Optional[str] = None, current_user: User = admin_dependency):
     """Invalide le cache pour un outil spécifique ou pour tous les outils."""
     result = await tool_cache_manager.invalidate_tool_cache(tool_name)
     return {"success": result, "message": f"Cache invalidé pour {'tous les outils' if tool_name is None else tool_name}"}
 
 @app.get("/admin/circuit-breakers", response_model=Dict[str, CircuitBreakerState])
-async def admin_circuit_breakers(current_user: User = Depends(get_current_active_user)):
+async def admin_circuit_breakers(current_user: User = admin_dependency):
     """Récupère l'état de tous les circuit breakers."""
     return get_all_circuit_breakers_state()
 
 @app.post("/admin/circuit-breakers/reset/{name}")
-async def admin_reset_circuit_breaker(name: str, current_user: User = Depends(get_current_active_user)):
+async def admin_reset_circuit_breaker(name: str, current_user: User = admin_dependency):
     """Réinitialise un circuit breaker spécifique."""
     result = reset_circuit_breaker(name)
     return {"success": result, "message": f"Circuit breaker {name} {'réinitialisé' if result else 'non trouvé'}"}
 
+@app.get("/admin/event-loop", response_model=Dict[str, Any])
+async def admin_event_loop(current_user: User = admin_dependency):
+    """Récupère le retard de la boucle d'événements et les derniers callbacks lents."""
+    return event_loop_monitor.get_stats()
+
+def check_profiling_enabled():
+    """Lève une erreur 404 si le profilage à la demande est désactivé."""
+    if not config.monitoring.profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profilage désactivé")
+
+@app.post("/admin/profile/cpu")
+async def admin_profile_cpu(duration: float = 10, interval: float = 0.01, all_threads: bool = False,
+                            format: str = "collapsed", current_user: User = admin_dependency):
+    """Profile le CPU par échantillonnage pendant `duration` secondes.
+    
+    Renvoie les piles au format "collapsed" (flamegraph.pl, speedscope) ou en JSON.
+    Par défaut seul le thread de la boucle d'événements est échantillonné.
+    """
+    check_profiling_enabled()
+    if not 0 < interval <= duration:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Paramètres invalides: 0 < interval <= duration attendu")
+    thread_id = None if all_threads else threading.get_ident()
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(None, cpu_profiler.profile, duration, interval, thread_id)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    if format == "json":
+        result["stacks"] = dict(result["stacks"])
+        return result
+    return PlainTextResponse(
+        render_collapsed(result["stacks"]),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Overhead": f"{result['overhead_ratio']:.4f}"
+        }
+    )
+
+@app.post("/admin/profile/heap/start")
+async def admin_heap_start(frames: int = 10, current_user: User = admin_dependency):
+    """Démarre le suivi des allocations mémoire (tracemalloc)."""
+    check_profiling_enabled()
+    result = heap_profiler.start(frames)
+    return {"success": result, "message": "Suivi démarré" if result else "Suivi déjà actif"}
+
+@app.post("/admin/profile/heap/snapshot")
+async def admin_heap_snapshot(limit: int = 20, current_user: User = admin_dependency):
+    """Prend un instantané du tas et le compare au précédent."""
+    check_profiling_enabled()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, heap_profiler.snapshot, limit)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.post("/admin/profile/heap/stop")
+async def admin_heap_stop(current_user: User = admin_dependency):
+    """Arrête le suivi des allocations mémoire."""
+    check_profiling_enabled()
+    result = heap_profiler.stop()
+    return {"success": result, "message": "Suivi arrêté" if result else "Suivi inactif"}
+
+@app.get("/admin/api-keys", response_model=List[APIKeyInfo])
+async def admin_list_api_keys(current_user: User = admin_dependency):
+    """Liste les clés d'API (sans leur hachage)."""
+    return await list_api_keys()
+
+@app.post("/admin/api-keys")
+async def admin_create_api_key(key_req: APIKeyCreate, current_user: User = admin_dependency):
+    """Crée une clé d'API. La clé en clair n'est renvoyée qu'une seule fois."""
+    api_key, record = await create_api_key(key_req.name, key_req.scopes)
+    return {"api_key": api_key, "key_id": record["key_id"], "name": record["name"], "scopes": record["scopes"]}
+
+@app.delete("/admin/api-keys/{key_id}")
+async def admin_revoke_api_key(key_id: str, current_user: User = admin_dependency):
+    """Révoque une clé d'API."""
+    result = await revoke_api_key(key_id)
+    return {"success": result, "message": f"Clé d'API {key_id} {'révoquée' if result else 'non trouvée'}"}
+
 # Vérification basique de l'état de santé (endpoint public)
 @app.get("/health")
 async def health_check():
@@ -240,20 +484,42 @@ async def health_check():
         logger.error(f"Erreur lors de la vérification de l'état de santé: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+@app.get("/health/live")
+async def liveness_probe():
+    """Sonde de liveness: le processus répond."""
+    return liveness_check()
+
+@app.get("/health/ready")
+async def readiness_probe(response: Response):
+    """Sonde de readiness: renvoie 503 si le serveur FastMCP n'est pas prêt."""
+    fastmcp_status = await fastmcp_health_check()
+    if fastmcp_status["status"] != "healthy":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "not_ready", "fastmcp": fastmcp_status}
+    return {"status": "ready", "fastmcp": fastmcp_status}
+
 # Version de l'API
 @app.get("/version")
 async def version():
     """Retourne la version de l'API."""
     return {"version": "1.0.0", "name": "FastMCP Web Interface"}
 
-# Servir les fichiers statiques
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Servir les fichiers statiques depuis la mémoire (précompressés, ETag, URL à hash de contenu)
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def read_static(path: str, request: Request):
+    asset, cache_control = static_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return asset.build_response(request.headers, cache_control)
 
 # Servir le fichier index.html à la racine
-@app.get("/")
-async def read_index():
-    logger.info("Page d'accueil demandée")
-    return FileResponse('index.html')
+@app.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+async def read_index(request: Request):
+    logger.debug("Page d'accueil demandée")
+    index = static_assets.get_index()
+    if index is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return index.build_response(request.headers, "no-cache")
 
 @app.on_event("startup")
 async def startup_event():
@@ -261,25 +527,48 @@ async def startup_event():
     # Configuration du logger
     logger.info("Démarrage de l'API FastMCP Web Interface")
     
+    # Chargement et précompression des fichiers statiques
+    static_assets.load()
+    
     # Démarrage du monitoring si activé
     if config.monitoring.enabled:
         start_monitoring(port=config.monitoring.prometheus_port)
         logger.info(f"Monitoring activé sur le port {config.monitoring.prometheus_port}")
     
+    # Workers des jobs asynchrones
+    if config.jobs.enabled:
+        job_manager.start()
+    
+    # Surveillance de la boucle d'événements
+    if config.monitoring.loop_monitoring_enabled:
+        event_loop_monitor.start()
+    
+    # Configuration du tracing si activé
+    if config.monitoring.export_traces:
+        setup_tracing()
+    
     # Démarrage du nettoyage du cache
     if config.cache.enabled:
+        # Client Redis créé ici plutôt qu'à l'import du module cache
+        if cache.USE_REDIS:
+            cache.get_redis_client()
         start_cache_cleanup()
-        logger.info("Système de cache activé")
-        
-        # Enregistrement des outils cachables
-        for tool_name, ttl in config.cache.tools_config.items():
-            tool_cache_manager.register_tool(tool_name, ttl)
-            logger.info(f"Outil '{tool_name}' enregistré comme cachable avec TTL={ttl}s")
+        # Outils cachables déclarés à leur enregistrement (server.register_tool) ou par CACHE_TOOL_<NOM>_TTL
+        logger.info(f"Système de cache activé, outils cachables: {tool_cache_manager.cacheable_tools}")
+    
+    # Capture échantillonnée du trafic des appels d'outils
+    if traffic_capture.enabled:
+        traffic_capture.start()
+        logger.info(f"Capture du trafic activée dans {config.capture.file} (taux {config.capture.sample_rate})")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Actions à exécuter à l'arrêt de l'application."""
     logger.info("Arrêt de l'API FastMCP Web Interface")
+    event_loop_monitor.stop()
+    await job_manager.stop()
+    await client_pool.close()
+    traffic_capture.stop()
 
 if __name__ == "__main__":
     # Démarrer l'API web
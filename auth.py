@@ -1,12 +1,21 @@
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, APIKeyHeader
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, Tuple, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+import time
 
 from config import config
+from logging_config import logger
+import cache
+from tracing import start_span
 
 # Modèles de sécurité
 class Token(BaseModel):
@@ -19,13 +28,27 @@ class TokenData(BaseModel):
 class User(BaseModel):
     username: str
     disabled: Optional[bool] = None
+    scopes: Optional[List[str]] = None  # None = aucune restriction (utilisateurs JWT)
 
 class UserInDB(User):
     hashed_password: str
 
+class APIKeyCreate(BaseModel):
+    name: str
+    scopes: List[str] = ["tools"]
+
+class APIKeyInfo(BaseModel):
+    key_id: str
+    name: str
+    scopes: List[str]
+    disabled: bool = False
+
 # Configuration de la sécurité
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Contexte passlib (bcrypt), créé au premier hachage: son import est inutile sans authentification
+_pwd_context = None
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+api_key_scheme = APIKeyHeader(name=config.security.api_key_header, auto_error=False)
 
 # Base de données utilisateur simplifiée - à remplacer par une véritable BD en production
 users_db = {
@@ -36,13 +59,38 @@ users_db = {
     }
 }
 
+# Pool de threads dédié à bcrypt: le hachage ne bloque pas la boucle d'événements
+# et le nombre de hachages simultanés est plafonné par le nombre de workers
+password_executor = ThreadPoolExecutor(
+    max_workers=max(1, config.security.password_hash_workers),
+    thread_name_prefix="password-hash"
+)
+
+def get_pwd_context():
+    """Renvoie le contexte de hachage des mots de passe, créé à la première utilisation."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
 def verify_password(plain_password, hashed_password):
     """Vérifie si le mot de passe en clair correspond au hachage."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Génère un hachage sécurisé pour un mot de passe."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """Vérifie un mot de passe dans le pool de threads dédié."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    """Génère un hachage de mot de passe dans le pool de threads dédié."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
 
 def get_user(db, username: str):
     """Récupère un utilisateur depuis la base de données."""
@@ -60,8 +108,95 @@ def authenticate_user(fake_db, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(fake_db, username: str, password: str):
+    """Authentifie un utilisateur sans bloquer la boucle d'événements."""
+    user = get_user(fake_db, username)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
+class TokenCache:
+    """Cache LRU des tokens déjà vérifiés.
+    
+    Une entrée expire au plus tôt entre l'expiration du JWT et `ttl` secondes
+    après sa vérification, afin que les changements de la base utilisateur
+    soient pris en compte même sans invalidation explicite.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[UserInDB, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token: str) -> Optional[UserInDB]:
+        """Renvoie l'utilisateur associé à un token encore valide, sinon None."""
+        entry = self.entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expiry = entry
+        if expiry <= time.time():
+            del self.entries[token]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(token)
+        self.hits += 1
+        return user
+    
+    def set(self, token: str, user: UserInDB, token_expiry: Optional[float] = None):
+        """Ajoute un token vérifié au cache."""
+        if self.max_size <= 0:
+            return
+        expiry = time.time() + self.ttl
+        if token_expiry is not None:
+            expiry = min(expiry, token_expiry)
+        self.entries[token] = (user, expiry)
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def invalidate_user(self, username: str) -> int:
+        """Supprime toutes les entrées d'un utilisateur et renvoie leur nombre."""
+        tokens = [t for t, (user, _) in self.entries.items() if user.username == username]
+        for token in tokens:
+            del self.entries[token]
+        return len(tokens)
+    
+    def clear(self):
+        """Vide entièrement le cache."""
+        self.entries.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Renvoie les statistiques du cache."""
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Cache des tokens vérifiés
+token_cache = TokenCache(
+    max_size=config.security.token_cache_size,
+    ttl=config.security.token_cache_ttl
+)
+
+def disable_user(db, username: str) -> bool:
+    """Désactive un utilisateur et invalide ses tokens en cache."""
+    if username not in db:
+        return False
+    db[username]["disabled"] = True
+    token_cache.invalidate_user(username)
+    return True
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crée un token JWT."""
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -73,11 +208,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Récupère l'utilisateur actuel à partir du token JWT."""
+    # Import au premier usage: jose n'est pas chargé si l'authentification est désactivée
+    from jose import JWTError, jwt
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Informations d'identification invalides",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     try:
         payload = jwt.decode(token, config.security.secret_key, algorithms=["HS256"])
         username: str = payload.get("sub")
@@ -89,10 +229,177 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = get_user(users_db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    token_cache.set(token, user, payload.get("exp"))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Vérifie si l'utilisateur actuel est actif."""
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Utilisateur inactif")
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Authentification par clé d'API pour les clients machine
+#
+# Une clé a la forme "fmcp_<key_id>_<secret>". Seul un HMAC-SHA256 de la clé
+# complète est stocké, indexé par key_id: la vérification se limite à une
+# recherche (dictionnaire ou Redis) suivie d'une comparaison à temps constant.
+API_KEY_PREFIX = "fmcp"
+
+# Clés d'API en mémoire - utilisées lorsque Redis n'est pas configuré, avec un seul
+# worker (API_WORKERS=1): chaque processus aurait sinon ses propres clés
+api_keys_db: Dict[str, Dict] = {}
+
+def hash_api_key(api_key: str) -> str:
+    """Calcule le hachage à clé (HMAC-SHA256) d'une clé d'API."""
+    return hmac.new(config.security.secret_key.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
+def parse_api_key(api_key: str) -> Optional[str]:
+    """Extrait l'identifiant d'une clé d'API, ou None si le format est invalide."""
+    parts = api_key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX or not parts[1] or not parts[2]:
+        return None
+    return parts[1]
+
+def _get_redis_client():
+    """Renvoie le client Redis du cache s'il est utilisé, sinon None.
+    
+    Sans Redis, les clés sont gardées en mémoire: refusé avec plusieurs workers,
+    où une clé créée par un processus serait inconnue des autres (503).
+    """
+    redis_client = cache.get_redis_client() if cache.USE_REDIS else None
+    if redis_client is None and config.api.workers > 1:
+        logger.error("Clés d'API en mémoire refusées avec plusieurs workers: Redis est requis")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Stockage des clés d'API indisponible: Redis est requis avec plusieurs workers")
+    return redis_client
+
+def api_key_store_error(e: Exception) -> HTTPException:
+    """Journalise une erreur Redis du stockage des clés d'API et renvoie l'erreur HTTP 503 à lever."""
+    logger.error(f"Erreur Redis du stockage des clés d'API: {str(e)}")
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                         detail="Stockage des clés d'API temporairement indisponible")
+
+async def get_api_key_record(key_id: str) -> Optional[Dict]:
+    """Récupère l'enregistrement d'une clé d'API par son identifiant."""
+    redis_client = _get_redis_client()
+    if redis_client is not None:
+        try:
+            data = await redis_client.get(f"apikey:{key_id}")
+        except Exception as e:
+            raise api_key_store_error(e)
+        return json.loads(data) if data else None
+    return api_keys_db.get(key_id)
+
+async def create_api_key(name: str, scopes: List[str]) -> Tuple[str, Dict]:
+    """Crée une clé d'API et renvoie la clé en clair (affichée une seule fois) et son enregistrement."""
+    key_id = secrets.token_hex(8)
+    api_key = f"{API_KEY_PREFIX}_{key_id}_{secrets.token_urlsafe(32)}"
+    record = {
+        "key_id": key_id,
+        "name": name,
+        "hashed_key": hash_api_key(api_key),
+        "scopes": list(scopes),
+        "disabled": False
+    }
+    redis_client = _get_redis_client()
+    if redis_client is not None:
+        try:
+            await redis_client.set(f"apikey:{key_id}", json.dumps(record))
+        except Exception as e:
+            raise api_key_store_error(e)
+    else:
+        api_keys_db[key_id] = record
+    logger.info(f"Clé d'API {key_id} créée pour {name} avec les scopes {scopes}")
+    return api_key, record
+
+async def revoke_api_key(key_id: str) -> bool:
+    """Révoque une clé d'API."""
+    redis_client = _get_redis_client()
+    if redis_client is not None:
+        try:
+            return bool(await redis_client.delete(f"apikey:{key_id}"))
+        except Exception as e:
+            raise api_key_store_error(e)
+    return api_keys_db.pop(key_id, None) is not None
+
+async def list_api_keys() -> List[Dict]:
+    """Liste les clés d'API sans leur hachage."""
+    records = []
+    redis_client = _get_redis_client()
+    if redis_client is not None:
+        try:
+            async for key in redis_client.scan_iter(match="apikey:*"):
+                data = await redis_client.get(key)
+                if data:
+                    records.append(json.loads(data))
+        except Exception as e:
+            raise api_key_store_error(e)
+    else:
+        records = list(api_keys_db.values())
+    return [{k: v for k, v in record.items() if k != "hashed_key"} for record in records]
+
+async def authenticate_api_key(api_key: str) -> Optional[User]:
+    """Vérifie une clé d'API et renvoie l'utilisateur machine correspondant."""
+    key_id = parse_api_key(api_key)
+    if key_id is None:
+        return None
+    record = await get_api_key_record(key_id)
+    if record is None or record.get("disabled"):
+        return None
+    if not hmac.compare_digest(record["hashed_key"], hash_api_key(api_key)):
+        return None
+    return User(username=f"apikey:{record['name']}", disabled=False, scopes=record["scopes"])
+
+async def get_current_principal(
+    api_key: Optional[str] = Depends(api_key_scheme),
+    token: Optional[str] = Depends(oauth2_scheme_optional)
+) -> User:
+    """Authentifie la requête par clé d'API si elle est fournie, sinon par token JWT."""
+    with start_span("auth") as span:
+        if api_key and config.security.api_keys_enabled:
+            span.set_attribute("auth.scheme", "api_key")
+            user = await authenticate_api_key(api_key)
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Clé d'API invalide",
+                )
+            return user
+        span.set_attribute("auth.scheme", "jwt")
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Non authentifié",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return await get_current_active_user(await get_current_user(token))
+
+def has_scope(user: User, scope: str) -> bool:
+    """Vérifie si un utilisateur dispose d'un scope.
+    
+    Le scope "tools" couvre tous les scopes "tools:<nom>".
+    """
+    if user.scopes is None:
+        return True
+    if scope in user.scopes:
+        return True
+    return scope.startswith("tools:") and "tools" in user.scopes
+
+def check_tool_scope(user: Optional[User], tool_name: str):
+    """Lève une erreur 403 si l'utilisateur n'est pas autorisé à appeler l'outil."""
+    if user is not None and not has_scope(user, f"tools:{tool_name}"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Accès refusé à l'outil {tool_name}"
+        )
+
+def require_scope(scope: str):
+    """Dépendance FastAPI exigeant un utilisateur authentifié disposant du scope donné."""
+    async def dependency(current_user: User = Depends(get_current_principal)) -> User:
+        if not has_scope(current_user, scope):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Scope '{scope}' requis"
+            )
+        return current_user
+    return dependency
\ No newline at end of file
@@ -0,0 +1,223 @@
+import asyncio
+import bisect
+import hashlib
+import math
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+from logging_config import logger
+from monitoring import BACKEND_EJECTIONS, BACKEND_HEALTHY, BACKEND_OUTSTANDING
+
+# Modes de sélection du backend
+ROUTING_LEAST_OUTSTANDING = "least_outstanding"
+ROUTING_CONSISTENT_HASH = "consistent_hash"
+
+def is_backend_failure(error: Optional[BaseException]) -> bool:
+    """Indique si une erreur met en cause le backend (connexion, protocole) plutôt que l'outil."""
+    if error is None:
+        return False
+    # Une erreur d'outil prouve que le backend répond; une annulation vient de l'appelant
+    # (un délai dépassé, TimeoutError, met en cause le backend)
+    return not isinstance(error, (ToolError, asyncio.CancelledError))
+
+class Backend:
+    """Serveur FastMCP desservi par le pool: distant (URL HTTP) ou intégré au processus.
+
+    Les clients sont connectés à leur première utilisation puis gardés ouverts
+    entre les appels. Après `failure_threshold` échecs de transport consécutifs,
+    le backend est écarté pendant `eject_time` secondes, durée doublée à chaque
+    nouvelle mise à l'écart (plafonnée à `max_eject_time`). À l'expiration, il
+    redevient éligible: un succès le réintègre, un nouvel échec l'écarte de nouveau.
+    """
+
+    def __init__(self, name: str, transport: Union[str, FastMCP], failure_threshold: int = 3,
+                 eject_time: float = 10.0, max_eject_time: float = 300.0):
+        self.name = name
+        self.transport = transport
+        self.failure_threshold = failure_threshold
+        self.eject_time = eject_time
+        self.max_eject_time = max_eject_time
+        self.clients: List[Client] = []
+        self.idle: List[Client] = []
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        BACKEND_HEALTHY.labels(backend=name).set(1)
+
+    def is_ejected(self, now: Optional[float] = None) -> bool:
+        """Indique si le backend est actuellement écarté."""
+        return (now if now is not None else time.monotonic()) < self.ejected_until
+
+    async def acquire(self) -> Client:
+        """Prend un client connecté (inactif ou nouveau) et compte l'appel en cours."""
+        self.set_outstanding(1)
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Connexions ouvertes sur une autre boucle d'événements: inutilisables ici
+            self.clients, self.idle, self.loop = [], [], loop
+
+        if self.idle:
+            client = self.idle.pop()
+        else:
+            client = Client(self.transport)
+            self.clients.append(client)
+            logger.info(f"Création d'un nouveau client FastMCP pour {self.name} (total: {len(self.clients)})")
+
+        try:
+            if not client.is_connected():
+                # Connexion persistante: fermée par close() ou après un échec de transport
+                await client.__aenter__()
+        except BaseException as e:
+            self.clients.remove(client)
+            self.set_outstanding(-1)
+            self.record_result(e)
+            raise
+        return client
+
+    async def release(self, client: Client, error: Optional[BaseException] = None):
+        """Rend un client après un appel.
+        
+        Un client en échec de transport (délai dépassé compris) est fermé, de
+        même qu'un client dont l'appel a été annulé: sa réponse peut encore
+        arriver sur la connexion. L'annulation ne compte pas contre le backend.
+        """
+        self.set_outstanding(-1)
+        self.record_result(error)
+        if is_backend_failure(error) or isinstance(error, asyncio.CancelledError) or self.is_ejected():
+            if client in self.clients:
+                self.clients.remove(client)
+            await self.close_client(client)
+        else:
+            self.idle.append(client)
+
+    def record_result(self, error: Optional[BaseException]):
+        """Met à jour l'état de santé du backend d'après l'issue d'un appel."""
+        if isinstance(error, asyncio.CancelledError):
+            return
+        if not is_backend_failure(error):
+            if self.consecutive_failures >= self.failure_threshold:
+                logger.info(f"Backend FastMCP {self.name} réintégré")
+                BACKEND_HEALTHY.labels(backend=self.name).set(1)
+            self.consecutive_failures = 0
+            self.ejections = 0
+            return
+
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+        if self.consecutive_failures >= self.failure_threshold and not self.is_ejected():
+            self.eject()
+
+    def eject(self):
+        """Écarte le backend pour une durée croissante avec les mises à l'écart successives."""
+        duration = min(self.eject_time * 2 ** self.ejections, self.max_eject_time)
+        self.ejections += 1
+        self.ejected_until = time.monotonic() + duration
+        BACKEND_EJECTIONS.labels(backend=self.name).inc()
+        BACKEND_HEALTHY.labels(backend=self.name).set(0)
+        logger.warning(f"Backend FastMCP {self.name} écarté pour {duration:.0f}s: {self.last_error}")
+
+    def set_outstanding(self, delta: int):
+        self.outstanding += delta
+        BACKEND_OUTSTANDING.labels(backend=self.name).set(self.outstanding)
+
+    async def close_client(self, client: Client):
+        """Ferme un client sans propager d'erreur (connexion déjà rompue le plus souvent)."""
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug("Fermeture du client FastMCP %s en échec: %s", self.name, e)
+
+    async def close(self):
+        """Ferme toutes les connexions inactives du backend."""
+        idle, self.idle = self.idle, []
+        for client in idle:
+            if client in self.clients:
+                self.clients.remove(client)
+            await self.close_client(client)
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Renvoie l'état du backend."""
+        now = now if now is not None else time.monotonic()
+        ejected = self.is_ejected(now)
+        BACKEND_HEALTHY.labels(backend=self.name).set(0 if ejected else 1)
+        return {
+            "name": self.name,
+            "ejected": ejected,
+            "ejected_for": round(max(0.0, self.ejected_until - now), 3),
+            "outstanding": self.outstanding,
+            "connections": len(self.clients),
+            "idle_connections": len(self.idle),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+class HashRing:
+    """Anneau de hachage cohérent à nœuds virtuels.
+    
+    Chaque nœud occupe `vnodes` points de l'anneau; une clé appartient au
+    premier nœud rencontré dans le sens horaire. Ajouter ou retirer un nœud
+    parmi N ne déplace qu'environ 1/N des clés. Le hachage est stable d'un
+    processus à l'autre (pas de `hash()` randomisé).
+    """
+    
+    def __init__(self, nodes: List[str] = (), vnodes: int = 100):
+        self.vnodes = vnodes
+        self.nodes: List[str] = []
+        self.points: List[int] = []
+        self.owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+    
+    @staticmethod
+    def hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+    
+    def add(self, node: str):
+        """Ajoute un nœud et ses points virtuels."""
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        self.rebuild()
+    
+    def remove(self, node: str):
+        """Retire un nœud; ses clés passent à leurs successeurs sur l'anneau."""
+        if node in self.nodes:
+            self.nodes.remove(node)
+            self.rebuild()
+    
+    def rebuild(self):
+        ring = sorted((self.hash(f"{node}#{i}"), node) for node in self.nodes for i in range(self.vnodes))
+        self.points = [point for point, _ in ring]
+        self.owners = [node for _, node in ring]
+    
+    def walk(self, key: str) -> Iterator[str]:
+        """Parcourt les nœuds distincts dans le sens horaire à partir de la clé."""
+        if not self.points:
+            return
+        start = bisect.bisect(self.points, self.hash(key))
+        seen = set()
+        for i in range(len(self.points)):
+            node = self.owners[(start + i) % len(self.points)]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+    
+    def get(self, key: str) -> Optional[str]:
+        """Renvoie le nœud propriétaire de la clé."""
+        return next(self.walk(key), None)
+
+def bounded_load_capacity(total_outstanding: int, backends: int, load_factor: float) -> int:
+    """Charge maximale d'un backend en hachage cohérent à charge bornée.
+    
+    Un backend ne reçoit pas de nouvel appel au-delà de `load_factor` fois la
+    charge moyenne (appel entrant compris); l'appel passe alors au suivant sur l'anneau.
+    """
+    return max(1, math.ceil(load_factor * (total_outstanding + 1) / max(1, backends)))
@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from logging_config import logger
+from resilience import CircuitBreakerError, OverloadError, PermanentError, SharedFailureError, ToolExecutionError
+from scheduler import PRIORITIES, request_priority, scheduling_context
+from monitoring import MICROBATCH_FILL, MICROBATCH_FLUSHES, MICROBATCH_SIZE
+
+# Issue d'un élément d'un lot: (résultat, message d'erreur ou None)
+Outcome = Tuple[Any, Optional[str]]
+
+class BatchRejectedError(PermanentError):
+    """Le lot entier a été refusé par l'outil (paramètres d'un des appels invalides).
+
+    Chaque appel est alors exécuté seul, pour que l'erreur ne touche que l'appel fautif.
+    """
+    pass
+
+class MicroBatcher:
+    """Regroupe les appels concurrents d'un outil en une seule invocation par lot.
+
+    Le premier appel en attente ouvre une fenêtre de `window` secondes; le lot
+    part à la fin de la fenêtre ou dès qu'il atteint `max_size` appels. Chaque
+    appelant reçoit ensuite le résultat (ou l'erreur) de son propre élément.
+
+    Le lot s'exécute dans un contexte propre, et non dans celui de l'appelant
+    qui a ouvert la fenêtre: il est ordonnancé avec la plus haute priorité de
+    ses membres, dans un flux dédié ("microbatch:<outil>") qui partage
+    équitablement le pool avec les autres locataires. Un échec du lot entier
+    est levé pour chaque appel en SharedFailureError, que leurs propres
+    retries et circuit breaker ne comptent pas une seconde fois.
+    """
+
+    def __init__(self, tool_name: str, run_batch: Callable[[List[Dict[str, Any]]], Awaitable[List[Outcome]]],
+                 window: float = 0.002, max_size: int = 64):
+        self.tool_name = tool_name
+        self.run_batch = run_batch
+        self.window = window
+        self.max_size = max_size
+        self.pending: List[Tuple[Dict[str, Any], asyncio.Future, str]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Lots en cours: la boucle d'événements ne garde qu'une référence faible à ses tâches
+        self.running: Set[asyncio.Task] = set()
+
+    async def submit(self, params: Dict[str, Any]) -> Any:
+        """Ajoute un appel au lot en cours et attend le résultat de son élément.
+        
+        L'erreur propre à un élément est levée en ToolExecutionError; un échec
+        du lot entier est levé pour chacun des appels du lot.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Lot en attente sur une autre boucle d'événements: abandonné
+            self.pending, self.timer, self.loop = [], None, loop
+        future = loop.create_future()
+        self.pending.append((params, future, request_priority.get()))
+        if len(self.pending) >= self.max_size:
+            self.flush("size")
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush, "window")
+        return await future
+
+    def flush(self, trigger: str = "window"):
+        """Envoie le lot en cours (fin de fenêtre ou taille maximale atteinte)."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            MICROBATCH_FLUSHES.labels(tool_name=self.tool_name, trigger=trigger).inc()
+            # Contexte vide: ni la priorité, ni le locataire, ni les autres variables de l'appelant courant
+            task = contextvars.Context().run(asyncio.ensure_future, self._run(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, str]]):
+        MICROBATCH_SIZE.labels(tool_name=self.tool_name).observe(len(batch))
+        MICROBATCH_FILL.labels(tool_name=self.tool_name).observe(len(batch) / self.max_size)
+        # Plus haute priorité des membres du lot (une valeur inconnue compte comme la plus basse)
+        priority = min((member for _, _, member in batch),
+                       key=lambda member: PRIORITIES.index(member) if member in PRIORITIES else len(PRIORITIES))
+        try:
+            with scheduling_context(priority, f"microbatch:{self.tool_name}"):
+                outcomes = await self.run_batch([params for params, _, _ in batch])
+        except BaseException as e:
+            logger.debug("Lot de %d appels de %s en échec: %s", len(batch), self.tool_name, e)
+            error = e
+            if isinstance(e, Exception) and not isinstance(e, (PermanentError, CircuitBreakerError, OverloadError)):
+                error = SharedFailureError(f"Échec du lot d'appels de {self.tool_name}: {e}")
+                error.__cause__ = e
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            if not isinstance(e, Exception):
+                raise
+            return
+        if len(outcomes) != len(batch):
+            outcomes = [(None, f"Lot incomplet: {len(outcomes)} résultats pour {len(batch)} appels")] * len(batch)
+        for (_, future, _), (value, error) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(ToolExecutionError(error))
@@ -0,0 +1,91 @@
+"""Appels unitaires contre appel par lot pour un volume de calculs `calculate`.
+
+Sans réseau: les appels passent par la même pile que l'API (cache, résilience,
+pool de clients, serveur FastMCP intégré). On compare N appels `calculate`
+(avec `--concurrency` appels en cours), les mêmes appels regroupés
+automatiquement (FASTMCP_MICROBATCH_ENABLED) et un seul appel `calculate_batch`
+sur des colonnes de N éléments, avec NumPy s'il est installé puis sans.
+
+Usage:
+    python benchmarks/bench_batch.py [--items 5000] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from common import write_json, environment_info
+
+import server
+from config import config
+from server import execute_tool_result
+
+
+async def run_single(operations: List[str], a: List[float], b: List[float], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(index: int):
+        async with semaphore:
+            try:
+                await execute_tool_result("calculate", {"operation": operations[index], "a": a[index], "b": b[index]})
+            except ValueError:
+                pass  # Division par zéro: erreur attendue pour quelques éléments
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(len(a))))
+    return time.perf_counter() - start
+
+
+async def run_batch(operations: List[str], a: List[float], b: List[float]) -> float:
+    start = time.perf_counter()
+    await execute_tool_result("calculate_batch", {"operation": operations, "a": a, "b": b})
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    # Mesure du calcul, pas du cache: valeurs distinctes et cache désactivé
+    config.cache.enabled = False
+    rng = random.Random(42)
+    operations = [rng.choice(("add", "subtract", "multiply", "divide")) for _ in range(args.items)]
+    a = [rng.uniform(-1000, 1000) for _ in range(args.items)]
+    b = [rng.choice((0.0, rng.uniform(-10, 10))) if i % 100 == 0 else rng.uniform(-10, 10) for i in range(args.items)]
+
+    async def scenario() -> List[Dict[str, float]]:
+        results = [{"name": "single", "seconds": await run_single(operations, a, b, args.concurrency)}]
+        config.server.microbatch_enabled = True
+        config.server.microbatch_max_size = args.concurrency
+        results.append({"name": "single[microbatch]",
+                        "seconds": await run_single(operations, a, b, args.concurrency)})
+        config.server.microbatch_enabled = False
+        numpy_available = server.NUMPY_AVAILABLE
+        for name, use_numpy in (("batch[numpy]", True), ("batch[python]", False)):
+            if use_numpy and not numpy_available:
+                continue
+            server.NUMPY_AVAILABLE = use_numpy
+            await run_batch(operations[:10], a[:10], b[:10])  # Préchauffage (import de NumPy)
+            results.append({"name": name, "seconds": await run_batch(operations, a, b)})
+        server.NUMPY_AVAILABLE = numpy_available
+        return results
+
+    results = asyncio.run(scenario())
+    for r in results:
+        r["items_per_second"] = args.items / r["seconds"]
+
+    print(f"{'mode':20s} {'durée (s)':>10s} {'éléments/s':>12s}")
+    for r in results:
+        print(f"{r['name']:20s} {r['seconds']:10.3f} {r['items_per_second']:12.0f}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "batch", "environment": environment_info(),
+                                 "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Taux de succès du cache des outils: clés brutes contre clés canoniques.
+
+Des appels logiques (popularité Zipf) sont émis par des clients qui les
+écrivent différemment: nombres entiers ou flottants, valeurs par défaut
+omises ou explicites, identifiant de requête propre à chaque appel. On compare
+le taux de succès d'un cache LRU indexé par les paramètres bruts et par les
+paramètres normalisés d'après la signature déclarée de l'outil.
+
+Usage:
+    python benchmarks/bench_cache_keys.py [--keys 5000] [--calls 100000] [--cache-size 2000]
+"""
+import argparse
+import random
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+from common import write_json, environment_info
+
+from cache import ToolCacheManager, generate_cache_key
+
+
+def convert(a: float, b: float, unit: str = "m", precision: int = 2, request_id: str = "") -> float:
+    """Outil simulé: conversion d'unité (request_id ne sert qu'à la traçabilité)."""
+    return a * b
+
+
+def render(rng: random.Random, a: int, b: int, precision: int, call_id: int) -> Dict:
+    """Écrit un appel logique comme le ferait un client quelconque."""
+    params = {"a": a if rng.random() < 0.5 else float(a), "b": b if rng.random() < 0.5 else float(b)}
+    if rng.random() < 0.5:
+        params["unit"] = "m"
+    if precision != 2 or rng.random() < 0.5:
+        params["precision"] = precision
+    if rng.random() < 0.3:
+        params["request_id"] = f"req-{call_id}"
+    return params
+
+
+def hit_rate(calls: List[Dict], key_of: Callable[[Dict], str], cache_size: int) -> float:
+    cache: OrderedDict = OrderedDict()
+    hits = 0
+    for params in calls:
+        key = key_of(params)
+        if key in cache:
+            cache.move_to_end(key)
+            hits += 1
+        else:
+            cache[key] = True
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+    return hits / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=5000, help="Nombre d'appels logiques distincts")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--cache-size", type=int, default=2000, help="Entrées du cache LRU")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exposant de popularité des appels")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    manager = ToolCacheManager()
+    manager.declare_tool("convert", convert, ttl=3600, key_params=["a", "b", "unit", "precision"])
+
+    rng = random.Random(42)
+    logical = [(rng.randint(0, 1000), rng.randint(1, 100), rng.choice((2, 2, 2, 4))) for _ in range(args.keys)]
+    weights = [1 / (rank ** args.zipf) for rank in range(1, args.keys + 1)]
+    picks = rng.choices(range(args.keys), weights=weights, k=args.calls)
+    calls = [render(rng, *logical[index], call_id) for call_id, index in enumerate(picks)]
+
+    results = [
+        {"name": "raw", "hit_rate": hit_rate(calls, lambda p: f"tool:convert:{generate_cache_key('', (), p)}",
+                                             args.cache_size)},
+        {"name": "canonical", "hit_rate": hit_rate(calls, lambda p: manager.get_cache_key("convert", p),
+                                                   args.cache_size)},
+    ]
+
+    print(f"{'clés':12s} {'succès cache':>13s}")
+    for r in results:
+        print(f"{r['name']:12s} {r['hit_rate']:13.1%}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "cache_keys", "environment": environment_info(),
+                                 "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
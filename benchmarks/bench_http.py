@@ -0,0 +1,190 @@
+"""Test de charge et benchmark de latence de l'API HTTP.
+
+Les requêtes sont envoyées à l'application ASGI en processus (httpx + ASGITransport),
+ou à un serveur réel avec --url. Pour chaque scénario sont mesurés le débit et les
+latences p50/p90/p99/p999.
+
+Scénarios:
+    call_tool_cached    /call_tool/ avec des paramètres identiques (servis par le cache)
+    call_tool_uncached  /call_tool/ avec des paramètres uniques (jamais en cache)
+    list_tools          /list_tools/
+    health              /health
+
+Usage:
+    python benchmarks/bench_http.py --requests 2000 --concurrency 32 --pool-sizes 1,4,16
+    python benchmarks/bench_http.py --mix call_tool_cached=8,call_tool_uncached=1,health=1
+    python benchmarks/bench_http.py --url http://localhost:8000 --token <jwt>
+    python benchmarks/bench_http.py --output bench.json --baseline baseline.json --tolerance 0.1
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from common import compare_to_baseline, environment_info, summarize_latencies, write_json
+
+import httpx
+
+SCENARIOS = {
+    "call_tool_cached": lambda i: ("POST", "/call_tool/", {"tool_name": "greet", "params": {"name": "Benchmark"}}),
+    "call_tool_uncached": lambda i: ("POST", "/call_tool/", {"tool_name": "greet", "params": {"name": f"Benchmark-{i}-{random.random()}"}}),
+    "list_tools": lambda i: ("GET", "/list_tools/", None),
+    "health": lambda i: ("GET", "/health", None),
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Analyse un mélange de requêtes de la forme "scenario=poids,scenario=poids"."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Scénario inconnu: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def configure_pool(pool_size: int):
+    """Remplace le pool de clients FastMCP en processus par un pool de la taille donnée."""
+    import server
+    server.client_pool = server.ClientPool(server.mcp, max_size=pool_size)
+
+
+def auth_headers(token: Optional[str]) -> Dict[str, str]:
+    """Construit les en-têtes d'authentification (un token est généré en processus si nécessaire)."""
+    if token:
+        return {"Authorization": f"Bearer {token}"}
+    from config import config
+    if config.security.auth_enabled:
+        from auth import create_access_token
+        return {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    return {}
+
+
+async def run_load(client: httpx.AsyncClient, mix: Dict[str, int], requests: int, concurrency: int,
+                   headers: Dict[str, str]) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """Envoie `requests` requêtes réparties selon `mix` avec `concurrency` workers."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    plan = random.choices(names, weights=weights, k=requests)
+    counter = itertools.count()
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            scenario = plan[i]
+            method, path, body = SCENARIOS[scenario](i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies[scenario].append(time.perf_counter() - start)
+            if failed:
+                errors[scenario] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def build_results(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float,
+                  label: str, concurrency: int, pool_size: Optional[int]) -> List[Dict[str, Any]]:
+    """Construit une entrée de résultat par scénario."""
+    results = []
+    for scenario, values in latencies.items():
+        results.append({
+            "name": f"{scenario}[{label}]",
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "pool_size": pool_size,
+            "requests": len(values),
+            "errors": errors.get(scenario, 0),
+            "throughput_rps": len(values) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": summarize_latencies(values),
+        })
+    return results
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    headers = auth_headers(args.token)
+    runs = [args.mix] if args.mix else [{name: 1} for name in args.scenarios]
+    pool_sizes = [None] if args.url else args.pool_sizes
+    results = []
+
+    for pool_size in pool_sizes:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                       limits=httpx.Limits(max_connections=args.concurrency))
+        else:
+            configure_pool(pool_size)
+            from app import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+
+        async with client:
+            for mix in runs:
+                # Préchauffage (remplit aussi le cache pour le scénario "cached")
+                await run_load(client, mix, args.warmup, min(args.concurrency, args.warmup or 1), headers)
+                latencies, errors, elapsed = await run_load(client, mix, args.requests, args.concurrency, headers)
+                label = f"c={args.concurrency}" + (f",pool={pool_size}" if pool_size else "")
+                if len(mix) > 1:
+                    label += ",mix"
+                results.extend(build_results(latencies, errors, elapsed, label, args.concurrency, pool_size))
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"{'scénario':45s} {'req/s':>9s} {'p50':>8s} {'p90':>8s} {'p99':>8s} {'p999':>8s} {'erreurs':>8s}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['name']:45s} {r['throughput_rps']:9.1f} {lat['p50']:8.2f} {lat['p90']:8.2f} "
+              f"{lat['p99']:8.2f} {lat['p999']:8.2f} {r['errors']:8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL d'un serveur réel (par défaut: application en processus)")
+    parser.add_argument("--token", help="Token JWT à utiliser")
+    parser.add_argument("--requests", type=int, default=1000, help="Nombre de requêtes par scénario")
+    parser.add_argument("--warmup", type=int, default=50, help="Requêtes de préchauffage par scénario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-sizes", type=lambda v: [int(x) for x in v.split(",")], default=[10],
+                        help="Tailles du pool de clients FastMCP à tester (en processus uniquement)")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    parser.add_argument("--mix", type=parse_mix, help="Mélange pondéré de scénarios, ex: call_tool_cached=8,health=1")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Écart toléré par rapport à la référence")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.output:
+        write_json(args.output, {"benchmark": "http", "environment": environment_info(),
+                                 "config": {k: v for k, v in vars(args).items() if k != "token"},
+                                 "results": results})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance,
+                                          lower_is_better=("latency_ms.p50", "latency_ms.p99"),
+                                          higher_is_better=("throughput_rps",))
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark du chemin de réponse JSON rapide (API_FAST_JSON).
+
+Mesure le temps CPU par requête (time.process_time) de la sérialisation des
+réponses, sans réseau ni exécution d'outil:
+    list_tools  validation par le modèle de réponse + JSONResponse (par défaut)
+                contre FastJSONResponse sans revalidation (mode rapide)
+    call_tool   résultat en cache Redis décodé puis ré-encodé (par défaut)
+                contre renvoi direct des octets stockés (mode rapide)
+    admin       JSONResponse contre FastJSONResponse pour un dictionnaire imbriqué
+
+Usage:
+    python benchmarks/bench_json.py [--iterations 5000] [--tools 20]
+    python benchmarks/bench_json.py --output json.json --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from common import compare_to_baseline, environment_info, write_json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import Tool
+from responses import ORJSON_AVAILABLE, FastJSONResponse, wrap_result
+
+
+def make_tools(count: int) -> List[Dict[str, Any]]:
+    """Construit une liste d'outils de la forme renvoyée par get_available_tools."""
+    return [{
+        "name": f"tool_{i}",
+        "description": f"Outil de démonstration numéro {i}, avec une description réaliste.",
+        "parameters": [
+            {"name": "name", "type": "str", "description": "Paramètre name", "required": True},
+            {"name": "operation", "type": "str", "description": "Paramètre operation", "required": False},
+        ],
+        "cachable": True,
+        "cache_ttl": 3600,
+    } for i in range(count)]
+
+
+def make_cases(args) -> Dict[str, Dict[str, Callable[[], Any]]]:
+    """Construit les cas mesurés: scénario -> {"default": ..., "fast": ...}."""
+    tools = make_tools(args.tools)
+    adapter = TypeAdapter(Dict[str, List[Tool]])
+    result = {"content": [{"type": "text", "text": "Bonjour, Benchmark! " * 20}], "is_error": False}
+    stored = json.dumps(result)  # Valeur telle que stockée dans Redis par set_in_cache
+    admin = {"status": "ok", "system": {"cpu": 12.5, "memory": {"percent": 40.1, "available": 123456789}},
+             "circuit_breakers": {f"circuit_{i}": {"state": "closed", "failures": 0} for i in range(10)}}
+
+    def list_tools_default():
+        # Chemin FastAPI: validation + sérialisation du modèle de réponse, puis JSONResponse
+        validated = adapter.validate_python({"tools": tools})
+        return JSONResponse(jsonable_encoder(adapter.dump_python(validated, mode="json"))).body
+
+    return {
+        "list_tools": {
+            "default": list_tools_default,
+            "fast": lambda: FastJSONResponse({"tools": tools}).body,
+        },
+        "call_tool_cached": {
+            "default": lambda: JSONResponse(jsonable_encoder({"result": json.loads(stored)})).body,
+            "fast": lambda: wrap_result(stored.encode("utf-8")).body,
+        },
+        "admin": {
+            "default": lambda: JSONResponse(jsonable_encoder(admin)).body,
+            "fast": lambda: FastJSONResponse(admin).body,
+        },
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int) -> float:
+    """Renvoie le temps CPU moyen par appel en microsecondes."""
+    for _ in range(min(iterations, 500)):  # Préchauffage
+        func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--tools", type=int, default=20, help="Nombre d'outils renvoyés par list_tools")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    args = parser.parse_args()
+
+    if not ORJSON_AVAILABLE:
+        print("orjson non installé: le mode rapide utilise le module json standard")
+
+    results = []
+    for scenario, variants in make_cases(args).items():
+        timings = {mode: measure(func, args.iterations) for mode, func in variants.items()}
+        for mode, cpu_us in timings.items():
+            results.append({"name": f"{scenario}[{mode}]", "scenario": scenario, "mode": mode,
+                            "cpu_us_per_request": cpu_us})
+        results.append({"name": f"{scenario}[savings]", "scenario": scenario, "mode": "savings",
+                        "cpu_us_saved": timings["default"] - timings["fast"],
+                        "speedup": timings["default"] / timings["fast"] if timings["fast"] > 0 else 0.0})
+
+    print(f"{'scénario':30s} {'µs CPU/requête':>15s}")
+    for r in results:
+        if r["mode"] == "savings":
+            print(f"{r['name']:30s} {r['cpu_us_saved']:15.1f}  (x{r['speedup']:.1f})")
+        else:
+            print(f"{r['name']:30s} {r['cpu_us_per_request']:15.1f}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "json", "environment": environment_info(),
+                                 "config": vars(args), "results": results})
+
+    if args.baseline:
+        fast_results = [r for r in results if r["mode"] == "fast"]
+        regressions = compare_to_baseline(fast_results, args.baseline, args.tolerance,
+                                          lower_is_better=("cpu_us_per_request",))
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
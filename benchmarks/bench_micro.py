@@ -0,0 +1,190 @@
+"""Micro-benchmarks des couches exécutées à chaque requête.
+
+Chaque couche est mesurée isolément puis composée, sans réseau:
+    - generate_cache_key, get_from_cache / set_in_cache
+      (cache en mémoire, et mode "redis" avec un substitut Redis en mémoire)
+    - with_timeout, retry, circuit_breaker, resilient (composé) et track_tool_execution
+    - jose jwt.decode, get_current_user sans et avec cache de tokens
+
+Pour chaque couche sont rapportés:
+    ns_per_call               temps moyen par appel
+    peak_bytes_per_call       pic de mémoire allouée pendant un appel (tracemalloc)
+    retained_blocks_per_call  blocs mémoire conservés après l'appel (fuites, caches)
+
+Usage:
+    python benchmarks/bench_micro.py [--iterations 20000] [--filter cache]
+    python benchmarks/bench_micro.py --output micro.json --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+from common import compare_to_baseline, environment_info, write_json
+
+import cache
+from auth import create_access_token, get_current_user, token_cache
+from config import config
+from jose import jwt
+from monitoring import track_tool_execution
+from resilience import circuit_breaker, resilient, retry, with_timeout
+
+
+class RedisStandIn:
+    """Substitut de redis.asyncio en mémoire: mêmes appels et même sérialisation en chaîne."""
+
+    def __init__(self):
+        self.data: Dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+
+
+def make_cases() -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """Construit les cas mesurés: nom -> fabrique de coroutine sans argument."""
+    params = {"operation": "add", "a": 1.5, "b": 2.5}
+    cache.MEMORY_CACHE["bench:key"] = ({"result": 4.0}, 0)
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def tool(tool_name, params):
+        return None
+
+    timed = with_timeout(10)(noop)
+    retried = retry(max_retries=3)(noop)
+    guarded = circuit_breaker(name="bench")(noop)
+    composed = resilient(circuit_name="bench_resilient")(noop)
+    tracked = track_tool_execution(tool)
+    full_stack = resilient(circuit_name="bench_full")(track_tool_execution(tool))
+
+    token = create_access_token({"sub": "admin"})
+
+    async def key():
+        cache.generate_cache_key("", (), params)
+
+    async def uncached_user():
+        token_cache.clear()
+        await get_current_user(token)
+
+    async def jwt_decode():
+        jwt.decode(token, config.security.secret_key, algorithms=["HS256"])
+
+    return {
+        "cache.generate_cache_key": key,
+        "cache.get_from_cache": lambda: cache.get_from_cache("bench:key"),
+        "cache.set_in_cache": lambda: cache.set_in_cache("bench:key", {"result": 4.0}, 60),
+        "resilience.baseline_await": noop,
+        "resilience.with_timeout": timed,
+        "resilience.retry": retried,
+        "resilience.circuit_breaker": guarded,
+        "resilience.resilient": composed,
+        "monitoring.track_tool_execution": lambda: tracked("bench", params),
+        "composed.resilient+track_tool_execution": lambda: full_stack("bench", params),
+        "auth.jwt_decode": jwt_decode,
+        "auth.get_current_user_uncached": uncached_user,
+        "auth.get_current_user_cached": lambda: get_current_user(token),
+    }
+
+
+async def measure(factory: Callable[[], Awaitable[Any]], iterations: int, alloc_iterations: int) -> Dict[str, float]:
+    """Mesure le temps et les allocations d'une couche."""
+    for _ in range(min(iterations, 1000)):  # Préchauffage
+        await factory()
+
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            await factory()
+        elapsed = time.perf_counter_ns() - start
+
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(alloc_iterations):
+            await factory()
+        retained = (sys.getallocatedblocks() - blocks_before) / alloc_iterations
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(alloc_iterations):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await factory()
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {
+        "ns_per_call": elapsed / iterations,
+        "peak_bytes_per_call": peak_total / alloc_iterations,
+        "retained_blocks_per_call": retained,
+    }
+
+
+async def run_mode(mode: str, args) -> List[Dict[str, Any]]:
+    """Exécute tous les cas pour un mode de cache ("memory" ou "redis")."""
+    cache.USE_REDIS = mode == "redis"
+    cache.redis_client = RedisStandIn() if mode == "redis" else None
+    if mode == "redis":
+        await cache.redis_client.set("bench:key", json.dumps({"result": 4.0}))
+
+    results = []
+    for name, factory in make_cases().items():
+        if args.filter and args.filter not in name:
+            continue
+        # Seules les couches de cache dépendent du mode
+        if mode == "redis" and not name.startswith("cache."):
+            continue
+        stats = await measure(factory, args.iterations, args.alloc_iterations)
+        label = f"{name}[{mode}]" if name.startswith("cache.") else name
+        results.append({"name": label, "layer": name, "mode": mode, **stats})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--alloc-iterations", type=int, default=200)
+    parser.add_argument("--modes", type=lambda v: v.split(","), default=["memory", "redis"])
+    parser.add_argument("--filter", help="Ne mesurer que les couches dont le nom contient ce texte")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    args = parser.parse_args()
+
+    # Pas d'attente entre tentatives ni d'état partagé avec une instance réelle
+    config.resilience.retry_delay = 0
+    results = []
+    for mode in args.modes:
+        results.extend(asyncio.run(run_mode(mode, args)))
+
+    print(f"{'couche':52s} {'ns/appel':>10s} {'pic o/appel':>12s} {'blocs conservés':>16s}")
+    for r in results:
+        print(f"{r['name']:52s} {r['ns_per_call']:10.0f} {r['peak_bytes_per_call']:12.0f} "
+              f"{r['retained_blocks_per_call']:16.2f}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "micro", "environment": environment_info(),
+                                 "config": vars(args), "results": results})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance, lower_is_better=("ns_per_call",))
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark du surcoût par requête du middleware d'instrumentation.
+
+Compare une application FastAPI minimale sans middleware, avec
+PrometheusMiddleware (ASGI pur) et avec l'ancien couple
+PrometheusMiddleware + @app.middleware("http") (BaseHTTPMiddleware).
+Les requêtes sont envoyées directement à l'application ASGI, sans réseau.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests 20000]
+"""
+import argparse
+import asyncio
+import time
+
+import common  # noqa: F401 - ajoute la racine du projet au sys.path
+
+from fastapi import FastAPI, Request
+
+from monitoring import PrometheusMiddleware
+
+
+def build_app(mode: str) -> FastAPI:
+    """Construit l'application de test pour un mode donné."""
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"item_id": item_id}
+
+    if mode == "base_http":
+        @app.middleware("http")
+        async def add_process_time_header(request: Request, call_next):
+            start_time = time.time()
+            response = await call_next(request)
+            response.headers["X-Process-Time"] = str(time.time() - start_time)
+            return response
+
+    if mode in ("asgi", "base_http"):
+        app.add_middleware(PrometheusMiddleware)
+    return app
+
+
+async def run_requests(app, count: int) -> float:
+    """Envoie `count` requêtes GET à l'application et renvoie la durée totale."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(count):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/items/{i}",
+            "raw_path": f"/items/{i}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("none", "asgi", "base_http"):
+        app = build_app(mode)
+        asyncio.run(run_requests(app, 500))  # Préchauffage
+        results[mode] = asyncio.run(run_requests(app, args.requests)) / args.requests * 1e6
+
+    for mode, us in results.items():
+        overhead = us - results["none"]
+        print(f"{mode:10s} {us:8.1f} µs/requête  (surcoût {overhead:+.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
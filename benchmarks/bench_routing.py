@@ -0,0 +1,96 @@
+"""Efficacité des caches par réplica selon le mode de routage du pool de clients.
+
+Simule des appels cachables (clés de popularité Zipf) répartis sur N réplicas,
+chacun avec son propre cache LRU, avec `--concurrency` appels en cours en
+permanence. Compare le routage au moins chargé et le hachage cohérent à charge
+bornée: taux de succès des caches locaux, charge maximale relative et part des
+clés déplacées quand un réplica quitte l'anneau.
+
+Usage:
+    python benchmarks/bench_routing.py [--replicas 4] [--keys 20000] [--calls 200000]
+"""
+import argparse
+import random
+from collections import OrderedDict, deque
+from typing import Dict
+
+from common import write_json, environment_info
+
+from backends import HashRing
+from server import ClientPool, mcp
+
+
+def simulate(routing: str, args, keys) -> Dict[str, float]:
+    urls = [f"http://replica-{i}:50051/mcp" for i in range(args.replicas)]
+    pool = ClientPool(mcp, max_size=args.concurrency, backend_urls=urls, routing=routing)
+    caches = {backend.name: OrderedDict() for backend in pool.backends}
+    served = {backend.name: 0 for backend in pool.backends}
+    in_flight = deque()
+    hits = 0
+    peak = 0
+
+    for key in keys:
+        if len(in_flight) >= args.concurrency:
+            in_flight.popleft().outstanding -= 1
+        backend = pool.select_backend(key)
+        backend.outstanding += 1
+        in_flight.append(backend)
+        peak = max(peak, backend.outstanding)
+        served[backend.name] += 1
+
+        cache = caches[backend.name]
+        if key in cache:
+            cache.move_to_end(key)
+            hits += 1
+        else:
+            cache[key] = True
+            if len(cache) > args.cache_size:
+                cache.popitem(last=False)
+
+    mean_served = len(keys) / args.replicas
+    return {
+        "hit_rate": hits / len(keys),
+        "max_served_ratio": max(served.values()) / mean_served,
+        "peak_outstanding": peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=20000, help="Nombre de clés distinctes")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--cache-size", type=int, default=2000, help="Entrées du cache LRU de chaque réplica")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exposant de popularité des clés")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    weights = [1 / (rank ** args.zipf) for rank in range(1, args.keys + 1)]
+    keys = [f"tool:calculate:{index}" for index in rng.choices(range(args.keys), weights=weights, k=args.calls)]
+
+    results = []
+    for routing in ("least_outstanding", "consistent_hash"):
+        results.append({"name": routing, **simulate(routing, args, keys)})
+
+    # Changement de composition: part des clés qui changent de réplica
+    urls = [f"http://replica-{i}:50051/mcp" for i in range(args.replicas)]
+    ring = HashRing(urls)
+    distinct = [f"tool:calculate:{index}" for index in range(args.keys)]
+    before = {key: ring.get(key) for key in distinct}
+    ring.remove(urls[0])
+    moved = sum(1 for key in distinct if ring.get(key) != before[key]) / len(distinct)
+
+    print(f"{'routage':20s} {'succès cache':>13s} {'charge max':>11s} {'en cours max':>13s}")
+    for r in results:
+        print(f"{r['name']:20s} {r['hit_rate']:13.1%} {r['max_served_ratio']:11.2f} {r['peak_outstanding']:13d}")
+    print(f"Clés déplacées au retrait d'un réplica sur {args.replicas}: {moved:.1%}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "routing", "environment": environment_info(),
+                                 "config": vars(args), "results": results, "moved_keys_on_removal": moved})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Équité de l'ordonnanceur du pool de clients sous la charge d'un utilisateur lourd.
+
+Un utilisateur lourd envoie des appels en rafale (plus que la capacité du pool)
+pendant que des utilisateurs légers envoient des appels espacés. Le temps de
+service est simulé; on compare les latences des utilisateurs légers avec
+l'ordonnanceur équitable et avec une file FIFO unique (comportement antérieur).
+
+Usage:
+    python benchmarks/bench_scheduler.py [--capacity 4] [--heavy-concurrency 64] [--duration 3]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from common import summarize_latencies, write_json, environment_info
+
+from scheduler import FairScheduler
+
+
+class FifoScheduler:
+    """File unique premier arrivé, premier servi (équivalent de l'ancien asyncio.Queue)."""
+
+    def __init__(self, capacity: int):
+        self.semaphore = asyncio.Semaphore(capacity)
+
+    async def acquire(self, priority=None, tenant=None):
+        await self.semaphore.acquire()
+
+    def release(self):
+        self.semaphore.release()
+
+
+async def simulate(scheduler, args) -> Dict[str, List[float]]:
+    latencies: Dict[str, List[float]] = {"heavy": [], "light": []}
+    deadline = time.perf_counter() + args.duration
+
+    async def call(kind: str, tenant: str):
+        start = time.perf_counter()
+        await scheduler.acquire("interactive", tenant)
+        try:
+            await asyncio.sleep(args.service_time * random.uniform(0.5, 1.5))
+        finally:
+            scheduler.release()
+        latencies[kind].append(time.perf_counter() - start)
+
+    async def heavy_worker():
+        while time.perf_counter() < deadline:
+            await call("heavy", "heavy")
+
+    async def light_user(index: int):
+        while time.perf_counter() < deadline:
+            await call("light", f"light-{index}")
+            await asyncio.sleep(args.light_think_time)
+
+    await asyncio.gather(*(heavy_worker() for _ in range(args.heavy_concurrency)),
+                         *(light_user(i) for i in range(args.light_users)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=4, help="Taille du pool de clients")
+    parser.add_argument("--heavy-concurrency", type=int, default=64)
+    parser.add_argument("--light-users", type=int, default=4)
+    parser.add_argument("--light-think-time", type=float, default=0.05)
+    parser.add_argument("--service-time", type=float, default=0.01)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    results = []
+    for name, factory in (("fifo", FifoScheduler), ("fair", FairScheduler)):
+        latencies = asyncio.run(simulate(factory(args.capacity), args))
+        for kind, values in latencies.items():
+            results.append({"name": f"{kind}[{name}]", "scheduler": name, "user": kind,
+                            "requests": len(values), "latency_ms": summarize_latencies(values)})
+
+    print(f"{'utilisateur':20s} {'requêtes':>9s} {'p50':>8s} {'p99':>8s} {'max':>8s}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['name']:20s} {r['requests']:9d} {lat['p50']:8.2f} {lat['p99']:8.2f} {lat['max']:8.2f}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "scheduler", "environment": environment_info(),
+                                 "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
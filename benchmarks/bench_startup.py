@@ -0,0 +1,126 @@
+"""Temps de démarrage d'un worker: import de l'application et délai jusqu'à la disponibilité.
+
+Chaque mesure s'exécute dans un processus Python neuf:
+- import: durée de `import app` (modules chargés à froid, cache de bytecode chaud);
+- ready: délai entre le lancement de uvicorn et la première réponse 200 de /health/live.
+Les modules les plus coûteux sont relevés avec `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10]
+    python benchmarks/bench_startup.py --output startup.json --baseline baseline.json
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+from common import ROOT_DIR, compare_to_baseline, environment_info, summarize_latencies, write_json
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker_env() -> Dict[str, str]:
+    # Ports libres: le worker mesuré ne doit pas entrer en conflit avec une instance en cours
+    return dict(os.environ, PROMETHEUS_PORT=str(free_port()), LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"))
+
+
+def measure_import() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT_DIR, env=worker_env(),
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_ready(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                                "--port", str(port), "--log-level", "warning"],
+                               cwd=ROOT_DIR, env=worker_env(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Le worker n'a pas répondu dans les {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def top_imports(count: int) -> List[Tuple[str, float]]:
+    """Renvoie les paquets les plus coûteux à importer (temps cumulé de leur module racine, en ms)."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT_DIR,
+                            env=worker_env(), capture_output=True, text=True, check=True).stderr
+    costs: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit() or "." in name or name == "app":
+            continue
+        # Le coût cumulé inclut les dépendances chargées pour la première fois par ce paquet
+        costs[name] = max(costs.get(name, 0.0), int(cumulative) / 1000)
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de processus mesurés par phase")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de modules coûteux affichés")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Écart toléré par rapport à la référence")
+    args = parser.parse_args()
+
+    # Premier lancement non mesuré: compile le bytecode des modules de l'application
+    measure_import()
+
+    results = [
+        {"name": "import", "runs": args.runs,
+         "latency_ms": summarize_latencies(measure_import() for _ in range(args.runs))},
+        {"name": "ready", "runs": args.runs,
+         "latency_ms": summarize_latencies(measure_ready(args.timeout) for _ in range(args.runs))},
+    ]
+    offenders = top_imports(args.top)
+
+    print(f"{'phase':10s} {'moyenne':>9s} {'p50':>9s} {'max':>9s}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['name']:10s} {lat['mean']:9.1f} {lat['p50']:9.1f} {lat['max']:9.1f}")
+    print("\nImports les plus coûteux (ms cumulées):")
+    for package, cost in offenders:
+        print(f"  {package:30s} {cost:9.1f}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "startup", "environment": environment_info(),
+                                 "config": vars(args), "results": results,
+                                 "top_imports": [{"module": m, "ms": c} for m, c in offenders]})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance,
+                                          lower_is_better=("latency_ms.p50",))
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
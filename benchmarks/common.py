@@ -0,0 +1,86 @@
+"""Outils communs aux benchmarks: statistiques, export JSON et comparaison à une référence."""
+import json
+import math
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Sequence
+
+# Permettre l'import des modules de l'application depuis benchmarks/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Renvoie le percentile `q` (0-100) d'une liste déjà triée (méthode du rang le plus proche)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies: Iterable[float]) -> Dict[str, float]:
+    """Résume des latences (en secondes) en millisecondes: moyenne, p50, p90, p99, p999 et max."""
+    values = sorted(latencies)
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "p999": 0.0, "max": 0.0}
+    return {
+        "mean": sum(values) / len(values) * 1000,
+        "p50": percentile(values, 50) * 1000,
+        "p90": percentile(values, 90) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "p999": percentile(values, 99.9) * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Décrit l'environnement d'exécution du benchmark."""
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    """Écrit les résultats au format JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def get_metric(result: Dict[str, Any], path: str) -> float:
+    """Lit une métrique par chemin pointé (ex: "latency_ms.p99")."""
+    value: Any = result
+    for part in path.split("."):
+        value = value[part]
+    return value
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline_path: str, tolerance: float,
+                        lower_is_better: Sequence[str] = (), higher_is_better: Sequence[str] = ()) -> List[str]:
+    """Compare des résultats à un fichier de référence et renvoie les régressions détectées.
+
+    Les résultats sont appariés par leur champ "name". Une métrique régresse si
+    elle s'écarte de plus de `tolerance` (fraction) dans le mauvais sens.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["name"])
+        if reference is None:
+            continue
+        for metric in lower_is_better:
+            current, previous = get_metric(result, metric), get_metric(reference, metric)
+            if previous > 0 and current > previous * (1 + tolerance):
+                regressions.append(f"{result['name']}: {metric} {previous:.3f} -> {current:.3f}")
+        for metric in higher_is_better:
+            current, previous = get_metric(result, metric), get_metric(reference, metric)
+            if previous > 0 and current < previous * (1 - tolerance):
+                regressions.append(f"{result['name']}: {metric} {previous:.3f} -> {current:.3f}")
+    return regressions
@@ -0,0 +1,297 @@
+"""Rejeu du trafic capturé (CAPTURE_ENABLED) contre l'API, à vitesse réelle, accélérée ou maximale.
+
+Les appels du fichier de capture et de ses fichiers de rotation sont réémis sur
+/call_tool/ avec leurs écarts d'origine divisés par `--speed` (charge ouverte: un
+appel part à son heure, que les précédents aient répondu ou non), ou au plus
+vite avec `--speed max` et `--concurrency` appels en cours. Sont mesurés, par
+outil et au total, le débit, les latences et le taux de succès du cache pendant
+le rejeu, à côté de la latence et du taux de succès relevés à la capture.
+
+En processus, le taux de succès est lu dans les métriques de l'application;
+contre un serveur réel (--url), sur son endpoint Prometheus (--metrics-url).
+Seuls les appels capturés avec CAPTURE_PARAMS=full sont rejouables, et les outils
+non idempotents ne sont pas rejoués sans --include-non-idempotent.
+
+Usage:
+    python benchmarks/replay.py traffic.jsonl --speed 1
+    python benchmarks/replay.py traffic.jsonl --speed max --concurrency 64 --pool-size 4
+    CACHE_TOOL_GREET_TTL=60 python benchmarks/replay.py traffic.jsonl --speed 10
+    python benchmarks/replay.py traffic.jsonl --url http://localhost:8000 --metrics-url http://localhost:8001/metrics
+    python benchmarks/replay.py traffic.jsonl --output replay.json --baseline baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from common import compare_to_baseline, environment_info, summarize_latencies, write_json
+from bench_http import auth_headers, configure_pool
+
+import httpx
+
+CACHE_RESULTS = ("hit", "negative_hit", "miss")
+
+
+def capture_files(path: str) -> List[str]:
+    """Fichier de capture précédé de ses fichiers de rotation existants, du plus ancien au plus récent."""
+    rotated = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        rotated.append(f"{path}.{index}")
+        index += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def load_capture(paths: List[str]) -> Tuple[List[Dict[str, Any]], int]:
+    """Lit les appels capturés, triés par instant; renvoie aussi le nombre de lignes non rejouables."""
+    calls = []
+    skipped = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    skipped += 1  # Ligne tronquée (arrêt pendant l'écriture)
+                    continue
+                if "params" not in entry:
+                    skipped += 1  # Capture en CAPTURE_PARAMS=hash
+                    continue
+                calls.append(entry)
+    calls.sort(key=lambda entry: entry["ts"])
+    return calls, skipped
+
+
+def hit_ratio(counts: Dict[str, int]) -> Optional[float]:
+    """Part des consultations du cache servies par lui (erreurs en cache comprises)."""
+    lookups = sum(counts.get(result, 0) for result in CACHE_RESULTS)
+    if not lookups:
+        return None
+    return (counts.get("hit", 0) + counts.get("negative_hit", 0)) / lookups
+
+
+def local_lookups() -> Dict[Tuple[str, str], float]:
+    """Consultations du cache des outils relevées par l'application en processus."""
+    from monitoring import TOOL_CACHE_LOOKUPS
+    return {(s.labels["tool_name"], s.labels["result"]): s.value
+            for metric in TOOL_CACHE_LOOKUPS.collect() for s in metric.samples if s.name.endswith("_total")}
+
+
+async def remote_lookups(metrics_url: str) -> Dict[Tuple[str, str], float]:
+    """Consultations du cache des outils lues sur l'endpoint Prometheus d'un serveur."""
+    from prometheus_client.parser import text_string_to_metric_families
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.get(metrics_url)
+        response.raise_for_status()
+    return {(s.labels["tool_name"], s.labels["result"]): s.value
+            for family in text_string_to_metric_families(response.text)
+            if family.name == "fastmcp_tool_cache_lookups"
+            for s in family.samples if s.name.endswith("_total")}
+
+
+def local_non_idempotent_tools() -> List[str]:
+    """Outils déclarés non idempotents par les politiques de ce dépôt."""
+    from cache import tool_cache_manager
+    return [name for name, policy in tool_cache_manager.policies.items() if not policy.idempotent]
+
+
+async def non_idempotent_tools(client: httpx.AsyncClient, headers: Dict[str, str], remote: bool) -> List[str]:
+    """Outils déclarés non idempotents (politiques en processus, /list_tools/ d'un serveur réel).
+
+    Si le serveur ne fournit pas sa liste d'outils, le rejeu continue avec les
+    politiques de ce dépôt, après un avertissement.
+    """
+    if not remote:
+        return local_non_idempotent_tools()
+    try:
+        response = await client.get("/list_tools/", headers=headers)
+        response.raise_for_status()
+        return [tool["name"] for tool in response.json()["tools"] if not tool.get("idempotent", True)]
+    except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+        print(f"Avertissement: liste des outils indisponible ({e or type(e).__name__}), "
+              f"outils non idempotents déduits des politiques locales", file=sys.stderr)
+        return local_non_idempotent_tools()
+
+
+async def replay(client: httpx.AsyncClient, calls: List[Dict[str, Any]], speed: Optional[float],
+                 concurrency: int, headers: Dict[str, str]) -> Tuple[List[Dict[str, Any]], float, float]:
+    """Réémet les appels; renvoie leurs mesures, la durée totale et le retard maximal d'émission (s)."""
+    measures: List[Dict[str, Any]] = []
+
+    async def send(entry: Dict[str, Any]):
+        call_headers = dict(headers, **({"X-Priority": entry["priority"]} if entry.get("priority") else {}))
+        start = time.perf_counter()
+        try:
+            response = await client.post("/call_tool/", json={"tool_name": entry["tool"], "params": entry["params"]},
+                                         headers=call_headers)
+            status_code = response.status_code
+        except Exception:
+            status_code = 0
+        measures.append({"entry": entry, "latency": time.perf_counter() - start, "status": status_code})
+
+    start = time.perf_counter()
+    max_lag = 0.0
+    if speed is None:
+        counter = itertools.count()
+
+        async def worker():
+            while True:
+                i = next(counter)
+                if i >= len(calls):
+                    return
+                await send(calls[i])
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        origin = calls[0]["ts"]
+        tasks = []
+        for entry in calls:
+            delay = (entry["ts"] - origin) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            tasks.append(asyncio.ensure_future(send(entry)))
+        await asyncio.gather(*tasks)
+    return measures, time.perf_counter() - start, max_lag
+
+
+def build_results(measures: List[Dict[str, Any]], elapsed: float,
+                  lookups: Dict[Tuple[str, str], float]) -> List[Dict[str, Any]]:
+    """Une entrée de résultat par outil, plus une entrée "all" pour l'ensemble du rejeu."""
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for measure in measures:
+        groups[measure["entry"]["tool"]].append(measure)
+    groups["all"] = measures
+
+    results = []
+    for name, group in sorted(groups.items()):
+        tools = None if name == "all" else {name}
+        replayed = Counter()
+        for (tool, result), value in lookups.items():
+            if tools is None or tool in tools:
+                replayed[result] += value
+        captured = Counter(m["entry"].get("cache") for m in group)
+        results.append({
+            "name": name,
+            "requests": len(group),
+            "errors": sum(1 for m in group if not 200 <= m["status"] < 400),
+            "status_mismatches": sum(1 for m in group if m["status"] != m["entry"].get("status")),
+            "throughput_rps": len(group) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": summarize_latencies(m["latency"] for m in group),
+            "captured_latency_ms": summarize_latencies(m["entry"]["latency_ms"] / 1000 for m in group),
+            "hit_ratio": hit_ratio(replayed),
+            "captured_hit_ratio": hit_ratio(captured),
+        })
+    return results
+
+
+async def run(args) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    paths = capture_files(args.capture)
+    if not paths:
+        sys.exit(f"Aucun fichier de capture trouvé: {args.capture}")
+    calls, skipped = load_capture(paths)
+    headers = auth_headers(args.token)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from config import config
+        config.capture.enabled = False  # Le rejeu ne doit pas être capturé à son tour
+        if args.pool_size:
+            configure_pool(args.pool_size)
+        from app import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=args.timeout)
+
+    async with client:
+        excluded = [] if args.include_non_idempotent else await non_idempotent_tools(client, headers, bool(args.url))
+        calls = [entry for entry in calls if entry["tool"] not in excluded]
+        if args.limit:
+            calls = calls[:args.limit]
+        if not calls:
+            sys.exit("Aucun appel rejouable dans la capture")
+
+        async def lookups() -> Dict[Tuple[str, str], float]:
+            if args.url:
+                return await remote_lookups(args.metrics_url) if args.metrics_url else {}
+            return local_lookups()
+
+        before = await lookups()
+        measures, elapsed, max_lag = await replay(client, calls, args.speed, args.concurrency, headers)
+        after = await lookups()
+
+    delta = {key: value - before.get(key, 0) for key, value in after.items()}
+    summary = {
+        "files": paths,
+        "calls": len(calls),
+        "skipped_lines": skipped,
+        "excluded_tools": excluded,
+        "captured_seconds": calls[-1]["ts"] - calls[0]["ts"],
+        "replay_seconds": elapsed,
+        "max_send_lag_seconds": max_lag,
+    }
+    return build_results(measures, elapsed, delta), summary
+
+
+def format_ratio(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="Fichier de capture (CAPTURE_FILE), ses rotations .1, .2... sont incluses")
+    parser.add_argument("--speed", type=lambda v: None if v == "max" else float(v), default=1.0,
+                        help="Facteur d'accélération du rythme capturé, ou \"max\" (défaut: 1)")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Appels en cours avec --speed max (connexions maximales avec --url)")
+    parser.add_argument("--limit", type=int, help="Nombre maximal d'appels rejoués")
+    parser.add_argument("--url", help="URL d'un serveur réel (par défaut: application en processus)")
+    parser.add_argument("--metrics-url", help="Endpoint Prometheus du serveur réel (taux de succès du cache)")
+    parser.add_argument("--token", help="Token JWT à utiliser")
+    parser.add_argument("--pool-size", type=int, help="Taille du pool de clients FastMCP (en processus uniquement)")
+    parser.add_argument("--include-non-idempotent", action="store_true",
+                        help="Rejouer aussi les outils non idempotents (effets de bord répétés)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Écart toléré par rapport à la référence")
+    args = parser.parse_args()
+
+    results, summary = asyncio.run(run(args))
+
+    print(f"{summary['calls']} appels rejoués en {summary['replay_seconds']:.2f}s "
+          f"(capturés sur {summary['captured_seconds']:.2f}s), retard d'émission max {summary['max_send_lag_seconds'] * 1000:.1f} ms")
+    if summary["skipped_lines"] or summary["excluded_tools"]:
+        print(f"Lignes non rejouables: {summary['skipped_lines']}, outils exclus: {summary['excluded_tools']}")
+    print(f"{'outil':20s} {'appels':>7s} {'req/s':>9s} {'p50':>8s} {'p99':>8s} {'p50 cap.':>9s} "
+          f"{'succès':>8s} {'succès cap.':>12s} {'erreurs':>8s}")
+    for r in results:
+        lat, captured = r["latency_ms"], r["captured_latency_ms"]
+        print(f"{r['name']:20s} {r['requests']:7d} {r['throughput_rps']:9.1f} {lat['p50']:8.2f} {lat['p99']:8.2f} "
+              f"{captured['p50']:9.2f} {format_ratio(r['hit_ratio']):>8s} {format_ratio(r['captured_hit_ratio']):>12s} "
+              f"{r['errors']:8d}")
+
+    if args.output:
+        write_json(args.output, {"benchmark": "replay", "environment": environment_info(),
+                                 "config": {k: v for k, v in vars(args).items() if k != "token"},
+                                 "summary": summary, "results": results})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance,
+                                          lower_is_better=("latency_ms.p50", "latency_ms.p99"),
+                                          higher_is_better=("throughput_rps",))
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,324 @@
 import time
 import asyncio
+import base64
 import hashlib
+import inspect
 import json
+import types
+import typing
+import os
+import re
+import zlib
+from contextvars import ContextVar
 from typing import Any, Dict, Optional, Tuple, Callable, Union, List
 from functools import wraps
-from redis import asyncio as aioredis
 from logging_config import logger
 from config import config
+from tracing import start_span
+from monitoring import LARGE_RESULT_CACHE, NEGATIVE_CACHE_STORED, TOOL_CACHE_LOOKUPS
+from resilience import ToolExecutionError
+from responses import SerializedResult, dumps_json
 
-# Configuration du client Redis
+# Client Redis, créé à la première utilisation (voir get_redis_client)
 redis_client = None
+USE_REDIS = bool(config.cache.redis_url)
 
-# Tentative de connexion à Redis, mais fallback sur un cache en mémoire si indisponible
-try:
-    redis_url = config.cache.redis_url if hasattr(config, 'cache') and hasattr(config.cache, 'redis_url') else None
-    USE_REDIS = redis_url is not None
+if not USE_REDIS:
+    logger.info("Redis non configuré, utilisation du cache en mémoire")
+
+def get_redis_client():
+    """Renvoie le client Redis, créé à la première utilisation; None sans Redis.
     
-    if USE_REDIS:
-        redis_client = aioredis.from_url(
-            redis_url,
-            encoding="utf-8",
-            decode_responses=True
-        )
-        logger.info(f"Cache Redis configuré sur {redis_url}")
-    else:
-        logger.info("Redis non configuré, utilisation du cache en mémoire")
-        
-except Exception as e:
-    USE_REDIS = False
-    logger.warning(f"Impossible de se connecter à Redis: {str(e)}. Utilisation du cache en mémoire.")
+    Le module redis n'est importé qu'à ce moment: un processus sans Redis, ou
+    qui n'a pas encore servi de requête, n'en paie pas le coût au démarrage.
+    En cas d'échec, le cache en mémoire prend le relais.
+    """
+    global redis_client, USE_REDIS
+    if redis_client is None and USE_REDIS:
+        try:
+            from redis import asyncio as aioredis
+            redis_client = aioredis.from_url(
+                config.cache.redis_url,
+                encoding="utf-8",
+                decode_responses=True
+            )
+            logger.info(f"Cache Redis configuré sur {config.cache.redis_url}")
+        except Exception as e:
+            USE_REDIS = False
+            logger.warning(f"Impossible de se connecter à Redis: {str(e)}. Utilisation du cache en mémoire.")
+    return redis_client
 
 # Cache en mémoire (fallback si Redis n'est pas disponible)
 MEMORY_CACHE: Dict[str, Tuple[Any, float]] = {}
 
+# Entrées des résultats volumineux: {"$large": "zlib", ...} ou {"$large": "spill", ...}
+LARGE_ENTRY_MARKER = "$large"
+LARGE_ENTRY_PREFIX = '{"' + LARGE_ENTRY_MARKER + '"'
+# Entrées du cache négatif (erreur déterministe d'un outil): {"$error": "message"}
+ERROR_ENTRY_MARKER = "$error"
+ERROR_ENTRY_PREFIX = '{"' + ERROR_ENTRY_MARKER + '"'
+# Intervalle minimal entre deux nettoyages des fichiers expirés du cache sur disque
+SPILL_SWEEP_INTERVAL = 60
+_last_spill_sweep = 0.0
+# Nom d'un fichier du cache sur disque: <préfixe de clé>-<empreinte de clé>-<expiration>.json
+SPILL_FILE_PATTERN = re.compile(r"^([0-9a-f]{12})-[0-9a-f]{32}-\d+\.json$")
+_MISSING = object()
+
 async def get_from_cache(key: str) -> Optional[Any]:
     """Récupère une valeur du cache."""
-    if USE_REDIS and redis_client:
+    with start_span("cache.get", {"cache.backend": "redis" if USE_REDIS else "memory"}) as span:
+        value = await _get_from_cache(key)
+        span.set_attribute("cache.hit", value is not None)
+        return value
+
+async def _get_from_cache(key: str) -> Optional[Any]:
+    """Lecture effective dans le backend de cache (Redis ou mémoire)."""
+    if USE_REDIS and get_redis_client():
         try:
             # Tenter de récupérer du cache Redis
             data = await redis_client.get(key)
             if data:
-                return json.loads(data)
+                value = json.loads(data)
+                if is_large_entry(value):
+                    return await _load_large_value(value)
+                return value
             return None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération du cache Redis: {str(e)}")
             return None
     else:
-        # Utiliser le cache en mémoire
-        if key in MEMORY_CACHE:
-            value, expiry = MEMORY_CACHE[key]
-            if expiry == 0 or expiry > time.time():
-                return value
-            # Supprimer les entrées expirées
-            del MEMORY_CACHE[key]
+        value = _get_from_memory(key)
+        if is_large_entry(value):
+            return await _load_large_value(value)
+        return value
+
+def _get_from_memory(key: str) -> Optional[Any]:
+    """Lecture dans le cache en mémoire."""
+    if key in MEMORY_CACHE:
+        value, expiry = MEMORY_CACHE[key]
+        if expiry == 0 or expiry > time.time():
+            return value
+        # Supprimer les entrées expirées
+        del MEMORY_CACHE[key]
+    return None
+
+async def get_raw_from_cache(key: str) -> Optional[str]:
+    """Récupère la valeur sérialisée (JSON) telle que stockée dans Redis, sans la décoder.
+
+    Renvoie None avec le cache en mémoire, qui ne conserve que des objets Python.
+    """
+    if not (USE_REDIS and get_redis_client()):
         return None
+    with start_span("cache.get_raw", {"cache.backend": "redis"}) as span:
+        try:
+            data = await redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du cache Redis: {str(e)}")
+            data = None
+        span.set_attribute("cache.hit", data is not None)
+        return data or None
 
 async def set_in_cache(key: str, value: Any, ttl: int = 3600) -> bool:
     """Stocke une valeur dans le cache avec une durée de vie (TTL) en secondes."""
-    try:
-        serialized_value = json.dumps(value)
+    with start_span("cache.set", {"cache.backend": "redis" if USE_REDIS else "memory", "cache.ttl": ttl}):
+        try:
+            serialized_value = json.dumps(value)
         
-        if USE_REDIS and redis_client:
-            await redis_client.set(key, serialized_value, ex=ttl if ttl > 0 else None)
-        else:
-            # Calculer l'expiration pour le cache en mémoire
-            expiry = time.time() + ttl if ttl > 0 else 0
-            MEMORY_CACHE[key] = (value, expiry)
-        return True
-    except Exception as e:
-        logger.error(f"Erreur lors de la mise en cache: {str(e)}")
-        return False
+            if USE_REDIS and get_redis_client():
+                await redis_client.set(key, serialized_value, ex=ttl if ttl > 0 else None)
+            else:
+                # Calculer l'expiration pour le cache en mémoire
+                expiry = time.time() + ttl if ttl > 0 else 0
+                MEMORY_CACHE[key] = (value, expiry)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en cache: {str(e)}")
+            return False
+
+async def set_serialized_in_cache(key: str, result: SerializedResult, ttl: int = 3600, value: Any = _MISSING) -> bool:
+    """Stocke un résultat déjà sérialisé en JSON, sans le ré-encoder.
+    
+    Au-delà de CACHE_LARGE_RESULT_THRESHOLD, la politique des résultats
+    volumineux s'applique: "skip" (pas de mise en cache), "compress" (zlib)
+    ou "spill" (fichier sur disque local, référencé par l'entrée du cache).
+    `value` évite de décoder le résultat pour le cache en mémoire.
+    """
+    with start_span("cache.set", {"cache.backend": "redis" if USE_REDIS else "memory", "cache.ttl": ttl,
+                                  "cache.size": result.size}):
+        try:
+            if result.size >= config.cache.large_result_threshold:
+                policy = config.cache.large_result_policy
+                LARGE_RESULT_CACHE.labels(policy=policy).inc()
+                entry = await _encode_large_entry(key, result, ttl)
+                if entry is None:
+                    logger.debug("Résultat de %s octets non mis en cache (politique %s)", result.size, policy)
+                    return False
+                stored, value = json.dumps(entry), entry
+            elif USE_REDIS and get_redis_client():
+                stored = result.to_bytes()
+            else:
+                stored = None
+                if value is _MISSING:
+                    value = json.loads(result.to_bytes())
+            
+            if USE_REDIS and get_redis_client():
+                await redis_client.set(key, stored, ex=ttl if ttl > 0 else None)
+            else:
+                expiry = time.time() + ttl if ttl > 0 else 0
+                MEMORY_CACHE[key] = (value, expiry)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en cache: {str(e)}")
+            return False
+
+async def get_serialized_from_cache(key: str) -> Optional[SerializedResult]:
+    """Récupère une valeur sous forme sérialisée, sans décodage JSON.
+    
+    Une valeur stockée dans Redis est renvoyée telle quelle; un résultat
+    déporté sur disque est lu par morceaux au moment de la réponse. Une
+    erreur mise en cache (cache négatif) est relevée en ToolExecutionError.
+    """
+    raw = await get_raw_from_cache(key)
+    if raw is not None:
+        if raw.startswith(ERROR_ENTRY_PREFIX):
+            raise ToolExecutionError(json.loads(raw)[ERROR_ENTRY_MARKER])
+        if raw.startswith(LARGE_ENTRY_PREFIX):
+            return await _load_large_entry(json.loads(raw))
+        return SerializedResult([raw.encode("utf-8") if isinstance(raw, str) else raw])
+    if USE_REDIS and get_redis_client():
+        return None
+    
+    value = _get_from_memory(key)
+    if value is None:
+        return None
+    if is_error_entry(value):
+        raise ToolExecutionError(value[ERROR_ENTRY_MARKER])
+    if is_large_entry(value):
+        return await _load_large_entry(value)
+    return SerializedResult([dumps_json(value)])
+
+def is_large_entry(value: Any) -> bool:
+    """Indique si une valeur du cache est l'entrée d'un résultat volumineux."""
+    return isinstance(value, dict) and LARGE_ENTRY_MARKER in value
+
+def is_error_entry(value: Any) -> bool:
+    """Indique si une valeur du cache est une erreur déterministe (cache négatif)."""
+    return isinstance(value, dict) and ERROR_ENTRY_MARKER in value
+
+async def _encode_large_entry(key: str, result: SerializedResult, ttl: int) -> Optional[Dict[str, Any]]:
+    """Applique la politique des résultats volumineux; None si le résultat n'est pas caché."""
+    policy = config.cache.large_result_policy
+    loop = asyncio.get_running_loop()
+    if policy == "spill":
+        expires_at = time.time() + ttl if ttl > 0 else 0
+        path = await loop.run_in_executor(None, _write_spill_file, key, result, expires_at)
+        return {LARGE_ENTRY_MARKER: "spill", "size": result.size, "path": path}
+    if policy == "compress":
+        data = await loop.run_in_executor(None, _compress_chunks, result.chunks)
+        return {LARGE_ENTRY_MARKER: "zlib", "size": result.size, "data": base64.b64encode(data).decode("ascii")}
+    return None
+
+async def _load_large_entry(entry: Dict[str, Any]) -> Optional[SerializedResult]:
+    """Relit le résultat d'une entrée volumineuse (None si le fichier a disparu)."""
+    kind = entry.get(LARGE_ENTRY_MARKER)
+    if kind == "spill":
+        if not os.path.exists(entry["path"]):
+            return None
+        return SerializedResult(size=entry["size"], path=entry["path"])
+    if kind == "zlib":
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, zlib.decompress, base64.b64decode(entry["data"]))
+        return SerializedResult([data])
+    return None
+
+async def _load_large_value(entry: Dict[str, Any]) -> Optional[Any]:
+    """Relit et décode la valeur d'une entrée volumineuse."""
+    result = await _load_large_entry(entry)
+    if result is None:
+        return None
+    loop = asyncio.get_running_loop()
+    return json.loads(await loop.run_in_executor(None, result.to_bytes))
+
+def _compress_chunks(chunks: List[bytes]) -> bytes:
+    """Compresse les morceaux d'un résultat sans les assembler au préalable."""
+    compressor = zlib.compressobj(6)
+    parts = [compressor.compress(chunk) for chunk in chunks]
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+def _spill_prefix(key_prefix: str) -> str:
+    """Préfixe des fichiers du cache sur disque dont la clé commence par `key_prefix` ("tool:<outil>:")."""
+    return hashlib.sha256(key_prefix.encode("utf-8")).hexdigest()[:12]
+
+def _write_spill_file(key: str, result: SerializedResult, expires_at: float) -> str:
+    """Écrit un résultat dans le répertoire du cache sur disque.
+    
+    Le nom porte le préfixe de la clé (pour l'invalidation par outil), son
+    empreinte et l'expiration (0 = sans expiration).
+    """
+    os.makedirs(config.cache.spill_dir, exist_ok=True)
+    prefix = _spill_prefix(key.rsplit(":", 1)[0] + ":")
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(config.cache.spill_dir, f"{prefix}-{digest}-{int(expires_at)}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in result.chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    _sweep_spill_dir()
+    return path
+
+def _sweep_spill_dir():
+    """Supprime les fichiers expirés du cache sur disque (au plus une fois par intervalle).
+    
+    Un fichier sans expiration est supprimé au-delà de CACHE_SPILL_MAX_AGE
+    secondes: son entrée devient un échec du cache à la lecture suivante.
+    """
+    global _last_spill_sweep
+    now = time.time()
+    if now - _last_spill_sweep < SPILL_SWEEP_INTERVAL:
+        return
+    _last_spill_sweep = now
+    max_age = config.cache.spill_max_age
+    for name in os.listdir(config.cache.spill_dir):
+        path = os.path.join(config.cache.spill_dir, name)
+        try:
+            expires_at = int(name.split(".", 1)[0].rsplit("-", 1)[1])
+            if expires_at == 0:
+                if not max_age or os.path.getmtime(path) > now - max_age:
+                    continue
+            # Marge d'un intervalle: une réponse peut encore lire un fichier tout juste expiré
+            elif expires_at >= now - SPILL_SWEEP_INTERVAL:
+                continue
+            os.remove(path)
+        except (IndexError, ValueError, OSError):
+            continue
+
+def _remove_spill_files(key_prefix: str = "") -> int:
+    """Supprime les fichiers du cache sur disque des clés commençant par `key_prefix` (tous par défaut)."""
+    if not os.path.isdir(config.cache.spill_dir):
+        return 0
+    prefix = _spill_prefix(key_prefix) if key_prefix else None
+    removed = 0
+    for name in os.listdir(config.cache.spill_dir):
+        match = SPILL_FILE_PATTERN.match(name)
+        if match and prefix in (None, match.group(1)):
+            try:
+                os.remove(os.path.join(config.cache.spill_dir, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+async def remove_spill_files(key_prefix: str = "") -> int:
+    """Supprime hors de la boucle d'événements les fichiers du cache sur disque (voir _remove_spill_files)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _remove_spill_files, key_prefix)
 
 async def delete_from_cache(key: str) -> bool:
     """Supprime une valeur du cache."""
     try:
-        if USE_REDIS and redis_client:
+        if USE_REDIS and get_redis_client():
             await redis_client.delete(key)
         elif key in MEMORY_CACHE:
             del MEMORY_CACHE[key]
@@ -84,12 +328,13 @@ async def delete_from_cache(key: str) -> bool:
         return False
 
 async def clear_cache() -> bool:
-    """Vide entièrement le cache."""
+    """Vide entièrement le cache, fichiers du cache sur disque compris."""
     try:
-        if USE_REDIS and redis_client:
+        if USE_REDIS and get_redis_client():
             await redis_client.flushdb()
         else:
             MEMORY_CACHE.clear()
+        await remove_spill_files()
         return True
     except Exception as e:
         logger.error(f"Erreur lors du vidage du cache: {str(e)}")
@@ -126,15 +371,132 @@ def cached(ttl: int = 3600, key_prefix: str = ""):
         return wrapper
     return decorator
 
+# Union[X, None] et X | None (Python 3.10+)
+_UNION_TYPES = (Union, getattr(types, "UnionType", Union))
+
+def _canonical_value(value: Any, annotation: Any) -> Any:
+    """Ramène une valeur au type annoncé par la signature (1 et 1.0 pour un float, etc.)."""
+    if typing.get_origin(annotation) in _UNION_TYPES:
+        # Optional[X]: seul le type non nul compte
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return value
+        annotation = args[0]
+    if typing.get_origin(annotation) in (list, tuple) and isinstance(value, (list, tuple)):
+        args = typing.get_args(annotation)
+        item_type = args[0] if args else Any
+        return [_canonical_value(item, item_type) for item in value]
+    if isinstance(value, bool):
+        return value
+    if annotation is float and isinstance(value, int):
+        return float(value)
+    if annotation is int and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def normalize_params(signature: inspect.Signature, params: Dict, key_params: Optional[List[str]] = None) -> Dict:
+    """Forme canonique des paramètres d'un appel, pour la clé de cache.
+    
+    Les valeurs par défaut omises sont rendues explicites, les nombres sont
+    ramenés au type annoncé et seuls les paramètres de `key_params` (tous par
+    défaut) sont retenus: deux appels équivalents partagent la même entrée.
+    """
+    try:
+        bound = signature.bind(**params)
+    except TypeError:
+        # Appel invalide: l'outil le rejettera, la clé reste celle des paramètres bruts
+        return params
+    bound.apply_defaults()
+    normalized = {}
+    for name, value in bound.arguments.items():
+        if key_params is not None and name not in key_params:
+            continue
+        normalized[name] = _canonical_value(value, signature.parameters[name].annotation)
+    return normalized
+
+# Issue de la consultation du cache des outils pour l'appel en cours (lue par la capture du trafic).
+# Un dictionnaire partagé plutôt qu'une valeur: il reste visible de l'appelant quand la
+# consultation a lieu dans une tâche dérivée (délai d'expiration, micro-lots).
+cache_lookup_outcome: ContextVar[Optional[Dict[str, str]]] = ContextVar("cache_lookup_outcome", default=None)
+
+def record_cache_lookup(tool_name: str, result: str):
+    """Compte une consultation du cache d'un outil ("hit", "negative_hit" ou "miss")."""
+    TOOL_CACHE_LOOKUPS.labels(tool_name=tool_name, result=result).inc()
+    outcome = cache_lookup_outcome.get()
+    if outcome is not None:
+        outcome["cache"] = result
+
+class ToolPolicy:
+    """Politique de cache et d'idempotence déclarée à l'enregistrement d'un outil."""
+    
+    def __init__(self, signature: Optional[inspect.Signature] = None, cacheable: bool = True,
+                 idempotent: bool = True, key_params: Optional[List[str]] = None):
+        if cacheable and not idempotent:
+            raise ValueError("Un outil non idempotent ne peut pas être mis en cache")
+        self.signature = signature
+        self.cacheable = cacheable
+        self.idempotent = idempotent
+        self.key_params = key_params
+
 # Classe pour gérer le cache des outils FastMCP
 class ToolCacheManager:
     def __init__(self, default_ttl: int = 3600):
         self.default_ttl = default_ttl
         self.cacheable_tools: Dict[str, int] = {}
+        self.negative_ttls: Dict[str, int] = {}
+        self.policies: Dict[str, ToolPolicy] = {}
+        # Outils déclarés cachables par la configuration (CACHE_TOOL_<NOM>_TTL)
+        for tool_name, ttl in config.cache.tools_config.items():
+            self.register_tool(tool_name, ttl)
+    
+    def declare_tool(self, tool_name: str, func: Callable, ttl: int = None, cacheable: bool = True,
+                     idempotent: bool = True, key_params: Optional[List[str]] = None):
+        """Enregistre la politique d'un outil d'après sa fonction.
+        
+        La signature sert à construire des clés canoniques; le TTL déclaré
+        reste surchargeable par CACHE_TOOL_<NOM>_TTL. Un outil non idempotent
+        n'est ni mis en cache ni réessayé.
+        """
+        self.policies[tool_name] = ToolPolicy(inspect.signature(func), cacheable, idempotent, key_params)
+        if cacheable:
+            self.register_tool(tool_name, config.cache.tools_config.get(tool_name, ttl))
+        else:
+            self.cacheable_tools.pop(tool_name, None)
     
-    def register_tool(self, tool_name: str, ttl: int = None):
-        """Enregistre un outil comme étant cacheable avec un TTL spécifique."""
+    def is_idempotent(self, tool_name: str) -> bool:
+        """Indique si un appel de l'outil peut être rejoué sans effet de bord (vrai par défaut)."""
+        policy = self.policies.get(tool_name)
+        return policy is None or policy.idempotent
+    
+    def bind_params(self, tool_name: str, params: Dict) -> Optional[Dict]:
+        """Paramètres complets d'un appel (valeurs par défaut incluses); None s'ils ne correspondent pas à la signature."""
+        policy = self.policies.get(tool_name)
+        if policy is None or policy.signature is None:
+            return None
+        try:
+            bound = policy.signature.bind(**params)
+        except TypeError:
+            return None
+        bound.apply_defaults()
+        return dict(bound.arguments)
+    
+    def normalize_params(self, tool_name: str, params: Dict) -> Dict:
+        """Paramètres canoniques d'un appel (inchangés pour un outil sans signature déclarée)."""
+        policy = self.policies.get(tool_name)
+        if policy is None or policy.signature is None:
+            return params
+        return normalize_params(policy.signature, params, policy.key_params)
+    
+    def register_tool(self, tool_name: str, ttl: int = None, negative_ttl: int = None):
+        """Enregistre un outil comme étant cacheable avec un TTL spécifique.
+        
+        `negative_ttl` est la durée de mise en cache de ses erreurs
+        déterministes (CACHE_NEGATIVE_TTL ou CACHE_NEGATIVE_TOOL_<NOM>_TTL par défaut).
+        """
         self.cacheable_tools[tool_name] = ttl if ttl is not None else self.default_ttl
+        if negative_ttl is None:
+            negative_ttl = config.cache.negative_tools_config.get(tool_name, config.cache.negative_ttl)
+        self.negative_ttls[tool_name] = negative_ttl
     
     def is_tool_cacheable(self, tool_name: str) -> bool:
         """Vérifie si un outil est cacheable."""
@@ -144,28 +506,81 @@ class ToolCacheManager:
         """Récupère le TTL pour un outil."""
         return self.cacheable_tools.get(tool_name, self.default_ttl)
     
+    def get_negative_ttl(self, tool_name: str) -> int:
+        """Récupère le TTL du cache négatif d'un outil (0 = erreurs non mises en cache)."""
+        if not config.cache.negative_enabled:
+            return 0
+        return self.negative_ttls.get(tool_name, 0)
+    
+    def get_cache_key(self, tool_name: str, params: Dict) -> str:
+        """Construit la clé de cache d'un appel d'outil."""
+        return f"tool:{tool_name}:{generate_cache_key('', (), self.normalize_params(tool_name, params))}"
+    
     async def get_cached_result(self, tool_name: str, params: Dict) -> Optional[Any]:
-        """Récupère le résultat mis en cache pour un outil avec des paramètres spécifiques."""
+        """Récupère le résultat mis en cache pour un outil avec des paramètres spécifiques.
+        
+        Une erreur déterministe en cache est relevée en ToolExecutionError.
+        """
         if not self.is_tool_cacheable(tool_name):
             return None
         
-        cache_key = f"tool:{tool_name}:{generate_cache_key('', (), params)}"
-        return await get_from_cache(cache_key)
+        value = await get_from_cache(self.get_cache_key(tool_name, params))
+        if is_error_entry(value):
+            record_cache_lookup(tool_name, "negative_hit")
+            raise ToolExecutionError(value[ERROR_ENTRY_MARKER])
+        record_cache_lookup(tool_name, "miss" if value is None else "hit")
+        return value
+    
+    async def get_cached_serialized(self, tool_name: str, params: Dict) -> Optional[SerializedResult]:
+        """Récupère le résultat mis en cache, encore sérialisé en JSON (voir get_cached_result)."""
+        if not self.is_tool_cacheable(tool_name):
+            return None
+        
+        try:
+            result = await get_serialized_from_cache(self.get_cache_key(tool_name, params))
+        except ToolExecutionError:
+            record_cache_lookup(tool_name, "negative_hit")
+            raise
+        record_cache_lookup(tool_name, "miss" if result is None else "hit")
+        return result
     
     async def cache_tool_result(self, tool_name: str, params: Dict, result: Any) -> bool:
         """Met en cache le résultat d'un outil."""
         if not self.is_tool_cacheable(tool_name):
             return False
         
-        cache_key = f"tool:{tool_name}:{generate_cache_key('', (), params)}"
+        cache_key = self.get_cache_key(tool_name, params)
         ttl = self.get_tool_ttl(tool_name)
         return await set_in_cache(cache_key, result, ttl)
     
+    async def cache_serialized_result(self, tool_name: str, params: Dict, result: SerializedResult,
+                                      value: Any = _MISSING) -> bool:
+        """Met en cache le résultat déjà sérialisé d'un outil."""
+        if not self.is_tool_cacheable(tool_name):
+            return False
+        
+        cache_key = self.get_cache_key(tool_name, params)
+        return await set_serialized_in_cache(cache_key, result, self.get_tool_ttl(tool_name), value)
+    
+    async def cache_tool_error(self, tool_name: str, params: Dict, error: ToolExecutionError) -> bool:
+        """Met en cache l'erreur déterministe d'un outil, avec le TTL court du cache négatif.
+        
+        Un résultat valide mis en cache par la suite remplace l'erreur (même clé).
+        """
+        ttl = self.get_negative_ttl(tool_name)
+        if ttl <= 0 or not self.is_tool_cacheable(tool_name):
+            return False
+        
+        stored = await set_in_cache(self.get_cache_key(tool_name, params), {ERROR_ENTRY_MARKER: str(error)}, ttl)
+        if stored:
+            NEGATIVE_CACHE_STORED.labels(tool_name=tool_name).inc()
+        return stored
+    
     async def invalidate_tool_cache(self, tool_name: str = None) -> bool:
-        """Invalide le cache pour un outil spécifique ou pour tous les outils."""
+        """Invalide le cache pour un outil spécifique ou pour tous les outils (fichiers sur disque compris)."""
         try:
             if tool_name:
-                if USE_REDIS and redis_client:
+                if USE_REDIS and get_redis_client():
                     # Utiliser les motifs de clés Redis
                     cursor = 0
                     pattern = f"tool:{tool_name}:*"
@@ -181,9 +596,10 @@ class ToolCacheManager:
                     keys_to_delete = [k for k in MEMORY_CACHE.keys() if k.startswith(pattern)]
                     for k in keys_to_delete:
                         del MEMORY_CACHE[k]
+                await remove_spill_files(f"tool:{tool_name}:")
             else:
                 # Invalider tous les caches d'outils
-                if USE_REDIS and redis_client:
+                if USE_REDIS and get_redis_client():
                     cursor = 0
                     pattern = "tool:*"
                     while True:
@@ -198,6 +614,8 @@ class ToolCacheManager:
                     keys_to_delete = [k for k in MEMORY_CACHE.keys() if k.startswith(pattern)]
                     for k in keys_to_delete:
                         del MEMORY_CACHE[k]
+                # Seuls les résultats d'outils sont écrits sur disque
+                await remove_spill_files()
             
             return True
         except Exception as e:
@@ -238,7 +656,7 @@ def start_cache_cleanup():
 async def get_cache_stats() -> Dict[str, Any]:
     """Récupère des statistiques sur l'état du cache."""
     try:
-        if USE_REDIS and redis_client:
+        if USE_REDIS and get_redis_client():
             info = await redis_client.info()
             keys = await redis_client.dbsize()
             return {
@@ -0,0 +1,116 @@
+import atexit
+import logging
+import queue
+import random
+import zlib
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from config import config, CaptureConfig
+from logging_config import NonBlockingQueueHandler
+from cache import tool_cache_manager
+from responses import dumps_json
+
+class CaptureFormatter(logging.Formatter):
+    """Écrit un appel capturé en une ligne JSON compacte, dans le thread d'écriture."""
+
+    def __init__(self, params_mode: str = "full"):
+        super().__init__()
+        self.params_mode = params_mode
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = dict(record.capture)
+        if self.params_mode == "hash":
+            # Empreinte des paramètres canoniques: la même que celle de la clé de cache
+            params = entry.pop("params")
+            entry["params_hash"] = tool_cache_manager.get_cache_key(entry["tool"], params).rsplit(":", 1)[-1]
+        return dumps_json(entry).decode()
+
+class TrafficCapture:
+    """Capture échantillonnée des appels d'outils, pour les rejouer (voir benchmarks/replay.py).
+
+    Chaque appel retenu devient une ligne JSON (instant, outil, paramètres ou
+    leur empreinte, latence, statut et issue du cache) écrite dans un fichier à
+    rotation par un thread dédié: l'appelant ne fait que déposer l'appel dans
+    une file bornée, et l'abandonne si elle est pleine.
+    """
+
+    def __init__(self, settings: CaptureConfig):
+        self.settings = settings
+        self.queue: queue.Queue = queue.Queue(maxsize=settings.queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.logger = logging.getLogger("fastmcp.capture")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.listener: Optional[QueueListener] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.enabled
+
+    def start(self):
+        """Démarre le thread d'écriture s'il ne tourne pas déjà."""
+        if self.listener is not None:
+            return
+        file_handler = RotatingFileHandler(
+            self.settings.file,
+            maxBytes=self.settings.max_file_size,
+            backupCount=self.settings.backup_count,
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(CaptureFormatter(self.settings.params))
+        self.listener = QueueListener(self.queue, file_handler)
+        self.listener.start()
+        if self.handler not in self.logger.handlers:
+            self.logger.addHandler(self.handler)
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Vide la file, arrête le thread d'écriture et ferme le fichier."""
+        if self.listener is None:
+            return
+        self.logger.removeHandler(self.handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+
+    def is_sampled(self, tool_name: str, params: Dict[str, Any]) -> bool:
+        """Indique si l'appel doit être capturé (CAPTURE_SAMPLE_RATE).
+
+        En échantillonnage par clé, la décision dépend de la clé de cache de
+        l'appel: les répétitions d'un appel retenu le sont toutes, et le
+        rejeu reproduit les succès du cache que ces appels obtiennent.
+        """
+        rate = self.settings.sample_rate
+        if rate >= 1.0:
+            return True
+        if self.settings.sampling == "key":
+            key = tool_cache_manager.get_cache_key(tool_name, params)
+            return zlib.crc32(key.encode()) < rate * 0x100000000
+        return random.random() < rate
+
+    def record(self, started_at: float, tool_name: str, params: Dict[str, Any], latency: float,
+               status_code: int, cache_outcome: Optional[str] = None, priority: Optional[str] = None):
+        """Dépose un appel dans la file d'écriture (sérialisé par le thread d'écriture).
+
+        L'entrée passe par un attribut de l'enregistrement: le message, lui,
+        est figé en texte à la mise en file.
+        """
+        self.logger.info("capture", extra={"capture": {
+            "ts": round(started_at, 6),
+            "tool": tool_name,
+            "params": params,
+            "latency_ms": round(latency * 1000, 3),
+            "status": status_code,
+            "cache": cache_outcome or "bypass",
+            "priority": priority,
+        }})
+
+    @property
+    def dropped(self) -> int:
+        """Appels abandonnés faute de place dans la file d'écriture."""
+        return self.handler.dropped
+
+# Instance globale
+traffic_capture = TrafficCapture(config.capture)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
@@ -13,6 +14,28 @@ class ServerConfig(BaseModel):
     name: str = os.getenv("FASTMCP_NAME", "FastMCP Server")
     max_connections: int = int(os.getenv("FASTMCP_MAX_CONNECTIONS", "100"))
     connection_timeout: int = int(os.getenv("FASTMCP_CONNECTION_TIMEOUT", "30"))
+    health_cache_ttl: float = float(os.getenv("FASTMCP_HEALTH_CACHE_TTL", "5"))
+    health_passive_window: float = float(os.getenv("FASTMCP_HEALTH_PASSIVE_WINDOW", "30"))
+    health_probe_interval: float = float(os.getenv("FASTMCP_HEALTH_PROBE_INTERVAL", "15"))
+    health_probe_timeout: float = float(os.getenv("FASTMCP_HEALTH_PROBE_TIMEOUT", "5"))
+    # Serveurs FastMCP distants (URLs séparées par des virgules); vide = serveur intégré au processus
+    backends: List[str] = [url.strip() for url in os.getenv("FASTMCP_BACKENDS", "").split(",") if url.strip()]
+    backend_failure_threshold: int = int(os.getenv("FASTMCP_BACKEND_FAILURE_THRESHOLD", "3"))
+    backend_eject_time: float = float(os.getenv("FASTMCP_BACKEND_EJECT_TIME", "10"))
+    backend_max_eject_time: float = float(os.getenv("FASTMCP_BACKEND_MAX_EJECT_TIME", "300"))
+    # Délai d'un appel d'outil à un backend, sous RESILIENCE_TIMEOUT: un backend qui ne répond plus est écarté
+    call_timeout: float = float(os.getenv("FASTMCP_CALL_TIMEOUT", "8"))
+    # Sélection du backend: "least_outstanding" ou "consistent_hash" (appels cachables routés par clé de cache)
+    backend_routing: str = os.getenv("FASTMCP_BACKEND_ROUTING", "least_outstanding")
+    hash_load_factor: float = float(os.getenv("FASTMCP_HASH_LOAD_FACTOR", "1.25"))
+    hash_vnodes: int = int(os.getenv("FASTMCP_HASH_VNODES", "100"))
+    # Nombre maximal d'éléments d'un appel par lot (outils <outil>_batch)
+    batch_max_items: int = int(os.getenv("FASTMCP_BATCH_MAX_ITEMS", "100000"))
+    # Regroupement automatique des appels concurrents aux outils disposant d'une implémentation par lot
+    microbatch_enabled: bool = os.getenv("FASTMCP_MICROBATCH_ENABLED", "false").lower() == "true"
+    microbatch_window_ms: float = float(os.getenv("FASTMCP_MICROBATCH_WINDOW_MS", "2"))
+    microbatch_max_size: int = int(os.getenv("FASTMCP_MICROBATCH_MAX_SIZE", "64"))
+    microbatch_tools_config: Dict[str, Dict[str, float]] = Field(default_factory=dict)
 
 class APIConfig(BaseModel):
     """Configuration de l'API FastAPI."""
@@ -23,6 +46,17 @@ class APIConfig(BaseModel):
     log_level: str = os.getenv("API_LOG_LEVEL", "info")
     request_timeout: int = int(os.getenv("API_REQUEST_TIMEOUT", "60"))
     root_path: str = os.getenv("API_ROOT_PATH", "")
+    fast_json: bool = os.getenv("API_FAST_JSON", "false").lower() == "true"
+    static_max_age: int = int(os.getenv("API_STATIC_MAX_AGE", "31536000"))  # 1 an
+    static_compress_min_size: int = int(os.getenv("API_STATIC_COMPRESS_MIN_SIZE", "256"))
+    ws_max_concurrency: int = int(os.getenv("API_WS_MAX_CONCURRENCY", "8"))
+    ws_auth_timeout: float = float(os.getenv("API_WS_AUTH_TIMEOUT", "10"))
+    # Taille maximale d'un résultat d'outil sérialisé (0 = illimitée), surchargeable par outil
+    result_max_size: int = int(os.getenv("API_RESULT_MAX_SIZE", "10485760"))  # 10MB
+    result_tool_limits: Dict[str, int] = Field(default_factory=dict)
+    # Au-delà de ce seuil, le résultat est diffusé par morceaux
+    result_stream_threshold: int = int(os.getenv("API_RESULT_STREAM_THRESHOLD", "262144"))  # 256KB
+    result_chunk_size: int = int(os.getenv("API_RESULT_CHUNK_SIZE", "65536"))
 
 class SecurityConfig(BaseModel):
     """Configuration de sécurité."""
@@ -35,6 +69,11 @@ class SecurityConfig(BaseModel):
     rate_limiting_enabled: bool = os.getenv("RATE_LIMITING_ENABLED", "false").lower() == "true"
     rate_limit_requests: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
     rate_limit_window: int = int(os.getenv("RATE_LIMIT_WINDOW", "3600"))
+    token_cache_size: int = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+    token_cache_ttl: int = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # 5 minutes
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    api_keys_enabled: bool = os.getenv("API_KEYS_ENABLED", "false").lower() == "true"
+    api_key_header: str = os.getenv("API_KEY_HEADER", "X-API-Key")
 
 class LoggingConfig(BaseModel):
     """Configuration du logging."""
@@ -44,6 +83,10 @@ class LoggingConfig(BaseModel):
     backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
     format: str = os.getenv("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     json_logs: bool = os.getenv("LOG_JSON", "false").lower() == "true"
+    queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    max_value_length: int = int(os.getenv("LOG_MAX_VALUE_LENGTH", "200"))
+    default_sample_rate: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    sample_rates: Dict[str, float] = Field(default_factory=dict)
 
 class CacheConfig(BaseModel):
     """Configuration du cache."""
@@ -52,15 +95,50 @@ class CacheConfig(BaseModel):
     default_ttl: int = int(os.getenv("CACHE_DEFAULT_TTL", "3600"))  # 1 heure
     tools_config: Dict[str, int] = Field(default_factory=dict)
     max_memory_size: int = int(os.getenv("CACHE_MAX_MEMORY_SIZE", "104857600"))  # 100MB
+    # Résultats volumineux: "skip" (non cachés), "compress" (zlib) ou "spill" (fichier sur disque local)
+    large_result_threshold: int = int(os.getenv("CACHE_LARGE_RESULT_THRESHOLD", "1048576"))  # 1MB
+    large_result_policy: str = os.getenv("CACHE_LARGE_RESULT_POLICY", "compress")
+    spill_dir: str = os.getenv("CACHE_SPILL_DIR") or os.path.join(tempfile.gettempdir(), "fastmcp-cache")
+    # Âge maximal (secondes) des fichiers sans expiration (TTL nul) du cache sur disque; 0 = illimité
+    spill_max_age: int = int(os.getenv("CACHE_SPILL_MAX_AGE", "86400"))
+    # Cache négatif: erreurs déterministes des outils cachables, avec un TTL court distinct
+    negative_enabled: bool = os.getenv("CACHE_NEGATIVE_ENABLED", "false").lower() == "true"
+    negative_ttl: int = int(os.getenv("CACHE_NEGATIVE_TTL", "30"))
+    negative_tools_config: Dict[str, int] = Field(default_factory=dict)
+
+class CaptureConfig(BaseModel):
+    """Configuration de la capture du trafic des appels d'outils (rejeu avec benchmarks/replay.py)."""
+    enabled: bool = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+    file: str = os.getenv("CAPTURE_FILE", "traffic.jsonl")
+    sample_rate: float = float(os.getenv("CAPTURE_SAMPLE_RATE", "0.1"))
+    # "key": tous les appels d'une même clé de cache sont retenus ou aucun (succès du cache préservés), "request": tirage par appel
+    sampling: str = os.getenv("CAPTURE_SAMPLING", "key")
+    # "full": paramètres complets (rejouables), "hash": empreinte des paramètres canoniques seulement
+    params: str = os.getenv("CAPTURE_PARAMS", "full")
+    max_file_size: int = int(os.getenv("CAPTURE_MAX_FILE_SIZE", "52428800"))  # 50MB
+    backup_count: int = int(os.getenv("CAPTURE_BACKUP_COUNT", "5"))
+    queue_size: int = int(os.getenv("CAPTURE_QUEUE_SIZE", "10000"))
 
 class MonitoringConfig(BaseModel):
     """Configuration du monitoring."""
     enabled: bool = os.getenv("MONITORING_ENABLED", "true").lower() == "true"
     prometheus_port: int = int(os.getenv("PROMETHEUS_PORT", "8001"))
     collect_interval: int = int(os.getenv("MONITORING_COLLECT_INTERVAL", "15"))
+    health_max_age: int = int(os.getenv("MONITORING_HEALTH_MAX_AGE", "60"))
     detailed_metrics: bool = os.getenv("MONITORING_DETAILED_METRICS", "true").lower() == "true"
+    max_endpoint_labels: int = int(os.getenv("MONITORING_MAX_ENDPOINT_LABELS", "100"))
     export_traces: bool = os.getenv("MONITORING_EXPORT_TRACES", "false").lower() == "true"
-    trace_endpoint: Optional[str] = os.getenv("MONITORING_TRACE_ENDPOINT")
+    trace_endpoint: Optional[str] = os.getenv("MONITORING_TRACE_ENDPOINT") or None
+    trace_exporter: str = os.getenv("MONITORING_TRACE_EXPORTER", "otlp")  # otlp, console ou memory
+    trace_sample_rate: float = float(os.getenv("MONITORING_TRACE_SAMPLE_RATE", "1.0"))
+    trace_slow_threshold: float = float(os.getenv("MONITORING_TRACE_SLOW_THRESHOLD", "0.5"))  # secondes
+    trace_tail_keep_ratio: float = float(os.getenv("MONITORING_TRACE_TAIL_KEEP_RATIO", "0.05"))
+    loop_monitoring_enabled: bool = os.getenv("MONITORING_LOOP_ENABLED", "true").lower() == "true"
+    loop_lag_interval: float = float(os.getenv("MONITORING_LOOP_LAG_INTERVAL", "0.5"))
+    slow_callback_threshold: float = float(os.getenv("MONITORING_SLOW_CALLBACK_THRESHOLD", "0.1"))
+    profiling_enabled: bool = os.getenv("MONITORING_PROFILING_ENABLED", "true").lower() == "true"
+    profiling_max_duration: int = int(os.getenv("MONITORING_PROFILING_MAX_DURATION", "60"))
+    profiling_max_overhead: float = float(os.getenv("MONITORING_PROFILING_MAX_OVERHEAD", "0.02"))
 
 class ResilienceConfig(BaseModel):
     """Configuration de résilience."""
@@ -72,6 +150,24 @@ class ResilienceConfig(BaseModel):
     recovery_timeout: int = int(os.getenv("RESILIENCE_RECOVERY_TIMEOUT", "30"))
     timeout: int = int(os.getenv("RESILIENCE_TIMEOUT", "10"))
 
+class JobsConfig(BaseModel):
+    """Configuration des jobs asynchrones (outils de longue durée)."""
+    enabled: bool = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+    workers: int = int(os.getenv("JOBS_WORKERS", "4"))
+    queue_size: int = int(os.getenv("JOBS_QUEUE_SIZE", "100"))
+    timeout: int = int(os.getenv("JOBS_TIMEOUT", "600"))  # 10 minutes
+    result_ttl: int = int(os.getenv("JOBS_RESULT_TTL", "3600"))  # 1 heure
+    poll_interval: float = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+
+class SchedulerConfig(BaseModel):
+    """Configuration de l'ordonnancement équitable des appels d'outils (accès au pool de clients)."""
+    weight_admin: float = float(os.getenv("SCHEDULER_WEIGHT_ADMIN", "8"))
+    weight_interactive: float = float(os.getenv("SCHEDULER_WEIGHT_INTERACTIVE", "4"))
+    weight_batch: float = float(os.getenv("SCHEDULER_WEIGHT_BATCH", "1"))
+    queue_limit_admin: int = int(os.getenv("SCHEDULER_QUEUE_LIMIT_ADMIN", "100"))
+    queue_limit_interactive: int = int(os.getenv("SCHEDULER_QUEUE_LIMIT_INTERACTIVE", "1000"))
+    queue_limit_batch: int = int(os.getenv("SCHEDULER_QUEUE_LIMIT_BATCH", "500"))
+
 class Config(BaseModel):
     """Configuration globale de l'application."""
     server: ServerConfig = ServerConfig()
@@ -79,25 +175,49 @@ class Config(BaseModel):
     security: SecurityConfig = SecurityConfig()
     logging: LoggingConfig = LoggingConfig()
     cache: CacheConfig = CacheConfig()
+    capture: CaptureConfig = CaptureConfig()
     monitoring: MonitoringConfig = MonitoringConfig()
     resilience: ResilienceConfig = ResilienceConfig()
+    jobs: JobsConfig = JobsConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
     
-    # Analyser la configuration des outils cachables
+    # Analyser les réglages par outil et par route, en un seul parcours de l'environnement
     def __init__(self, **data: Any):
         super().__init__(**data)
         
-        # Charger la configuration de cache des outils
         tool_cache_config = {}
+        negative_tools_config = {}
+        microbatch_tools_config = {}
+        result_tool_limits = {}
+        log_sample_rates = {}
         for key, value in os.environ.items():
-            if key.startswith("CACHE_TOOL_") and key.endswith("_TTL"):
-                tool_name = key[11:-4].lower()  # Extraire le nom de l'outil
-                try:
-                    ttl = int(value)
-                    tool_cache_config[tool_name] = ttl
-                except ValueError:
-                    pass
+            try:
+                if key.startswith("CACHE_TOOL_") and key.endswith("_TTL"):
+                    # TTL du cache d'un outil
+                    tool_cache_config[key[11:-4].lower()] = int(value)
+                elif key.startswith("CACHE_NEGATIVE_TOOL_") and key.endswith("_TTL"):
+                    # TTL du cache négatif d'un outil (0 = désactivé pour cet outil)
+                    negative_tools_config[key[20:-4].lower()] = int(value)
+                elif key.startswith("FASTMCP_MICROBATCH_TOOL_"):
+                    # Fenêtre et taille maximale des lots automatiques d'un outil
+                    for suffix, setting in (("_WINDOW_MS", "window_ms"), ("_MAX_SIZE", "max_size")):
+                        if key.endswith(suffix):
+                            tool_name = key[24:-len(suffix)].lower()
+                            microbatch_tools_config.setdefault(tool_name, {})[setting] = float(value)
+                elif key.startswith("API_RESULT_TOOL_") and key.endswith("_MAX_SIZE"):
+                    # Taille maximale du résultat d'un outil
+                    result_tool_limits[key[16:-9].lower()] = int(value)
+                elif key.startswith("LOG_SAMPLE_RATE_"):
+                    # Taux d'échantillonnage des logs d'une route
+                    log_sample_rates[key[16:].lower()] = float(value)
+            except ValueError:
+                pass
         
         self.cache.tools_config = tool_cache_config
+        self.cache.negative_tools_config = negative_tools_config
+        self.server.microbatch_tools_config = microbatch_tools_config
+        self.api.result_tool_limits = result_tool_limits
+        self.logging.sample_rates = log_sample_rates
 
 # Instance de configuration unique
 config = Config()
\ No newline at end of file
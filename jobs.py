@@ -0,0 +1,234 @@
+import asyncio
+import time
+import uuid
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+import cache
+from config import config
+from logging_config import logger
+from server import execute_tool_long
+from scheduler import PRIORITY_BATCH, scheduling_context
+from monitoring import JOB_QUEUE_DEPTH, JOB_RUNNING, JOB_COMPLETED, JOB_WAIT_TIME
+
+class JobStatus(str, Enum):
+    """États d'un job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+class JobQueueFullError(Exception):
+    """Exception levée lorsque la file des jobs est pleine."""
+    pass
+
+class JobManager:
+    """Exécute les appels d'outils de longue durée en arrière-plan.
+
+    Les jobs sont placés dans une file bornée et traités par un nombre fixe
+    de workers. L'état et le résultat de chaque job sont stockés dans le
+    backend de cache (clé `job:<id>`) avec une durée de vie, ce qui permet
+    de les consulter depuis n'importe quel worker de l'API quand Redis est
+    utilisé. L'annulation d'un job en cours n'est immédiate que dans le
+    processus qui l'exécute; ailleurs, elle est prise en compte par ce
+    processus au démarrage ou à la fin du job.
+    """
+
+    def __init__(self, execute: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                 workers: int = 4, queue_size: int = 100, result_ttl: int = 3600,
+                 poll_interval: float = 1.0):
+        self.execute = execute
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker_tasks = []
+        # Jobs de ce processus: tâches en cours et événements de changement d'état
+        self.running: Dict[str, asyncio.Task] = {}
+        self.cancelled: Set[str] = set()
+        self.events: Dict[str, asyncio.Event] = {}
+
+    @staticmethod
+    def get_key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def start(self):
+        """Démarre les workers s'ils ne tournent pas déjà dans la boucle courante."""
+        if self.worker_tasks and self.worker_tasks[0].get_loop() is asyncio.get_running_loop():
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.worker_tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        logger.info(f"{self.workers} workers de jobs démarrés (file de {self.queue_size} jobs)")
+
+    async def stop(self):
+        """Arrête les workers; les jobs en cours sont annulés."""
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks = []
+        self.queue = None
+
+    async def save(self, record: Dict[str, Any]):
+        """Enregistre l'état d'un job et prévient les observateurs locaux."""
+        await cache.set_in_cache(self.get_key(record["id"]), record, self.result_ttl)
+        event = self.events.pop(record["id"], None)
+        if event is not None:
+            event.set()
+        if record["status"] not in TERMINAL_STATUSES:
+            self.events[record["id"]] = asyncio.Event()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Renvoie l'état d'un job (None s'il est inconnu ou expiré)."""
+        return await cache.get_from_cache(self.get_key(job_id))
+
+    async def submit(self, tool_name: str, params: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        """Place un appel d'outil dans la file et renvoie le job créé."""
+        self.start()
+        if self.queue.full():
+            raise JobQueueFullError("La file des jobs est pleine")
+
+        record = {
+            "id": uuid.uuid4().hex,
+            "tool_name": tool_name,
+            "params": params,
+            "owner": owner,
+            "status": JobStatus.QUEUED.value,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+        }
+        await self.save(record)
+        self.queue.put_nowait(record["id"])
+        JOB_QUEUE_DEPTH.set(self.queue.qsize())
+        return record
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Annule un job en attente ou en cours."""
+        record = await self.get(job_id)
+        if record is None or record["status"] in TERMINAL_STATUSES:
+            return record
+
+        task = self.running.get(job_id)
+        if task is not None:
+            # Job exécuté par ce processus: le worker enregistre l'annulation
+            self.cancelled.add(job_id)
+            task.cancel()
+            record["cancel_requested"] = True
+            return record
+
+        if record["status"] == JobStatus.QUEUED:
+            record.update(status=JobStatus.CANCELLED.value, finished_at=time.time())
+            JOB_COMPLETED.labels(status=JobStatus.CANCELLED.value).inc()
+        record["cancel_requested"] = True
+        await self.save(record)
+        return record
+
+    async def worker(self):
+        """Traite les jobs de la file un par un."""
+        while True:
+            job_id = await self.queue.get()
+            JOB_QUEUE_DEPTH.set(self.queue.qsize())
+            try:
+                await self.run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur inattendue lors du traitement du job {job_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def run_job(self, job_id: str):
+        """Exécute un job et enregistre son résultat."""
+        record = await self.get(job_id)
+        if record is None or record["status"] != JobStatus.QUEUED or record.get("cancel_requested"):
+            return
+
+        record.update(status=JobStatus.RUNNING.value, started_at=time.time())
+        JOB_WAIT_TIME.observe(record["started_at"] - record["created_at"])
+        await self.save(record)
+
+        # Les jobs passent en classe "batch", dans le flux de leur propriétaire
+        with scheduling_context(PRIORITY_BATCH, record["owner"]):
+            task = asyncio.create_task(self.execute(record["tool_name"], record["params"]))
+        self.running[job_id] = task
+        JOB_RUNNING.inc()
+        stopping = False
+        try:
+            result = await task
+            record.update(status=JobStatus.SUCCEEDED.value, result=jsonable_encoder(result))
+        except asyncio.CancelledError:
+            # Sans demande d'annulation, c'est le worker lui-même qui est arrêté
+            stopping = job_id not in self.cancelled
+            task.cancel()
+            record.update(status=JobStatus.CANCELLED.value)
+        except Exception as e:
+            logger.error(f"Échec du job {job_id} ({record['tool_name']}): {str(e)}")
+            record.update(status=JobStatus.FAILED.value, error=str(e))
+        finally:
+            self.running.pop(job_id, None)
+            self.cancelled.discard(job_id)
+            JOB_RUNNING.dec()
+
+        if stopping:
+            record.update(finished_at=time.time(), error="Arrêt du serveur")
+            JOB_COMPLETED.labels(status=record["status"]).inc()
+            await self.save(record)
+            raise asyncio.CancelledError()
+
+        # Annulation demandée depuis un autre processus pendant l'exécution
+        current = await self.get(job_id)
+        if current is not None and current.get("cancel_requested"):
+            record.update(status=JobStatus.CANCELLED.value, result=None, cancel_requested=True)
+
+        record["finished_at"] = time.time()
+        JOB_COMPLETED.labels(status=record["status"]).inc()
+        await self.save(record)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Produit l'état du job à chaque changement, jusqu'à un état final.
+
+        Produit None périodiquement en l'absence de changement (keep-alive).
+        """
+        last_status = None
+        while True:
+            event = self.events.get(job_id)
+            record = await self.get(job_id)
+            if record is None:
+                return
+            if record["status"] != last_status:
+                last_status = record["status"]
+                yield record
+            else:
+                yield None
+            if record["status"] in TERMINAL_STATUSES:
+                return
+            # Notification locale si le job est traité ici, sinon interrogation périodique
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=self.poll_interval * 15)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+def is_job_visible(record: Dict[str, Any], username: Optional[str], is_admin: bool) -> bool:
+    """Un job n'est visible que par son propriétaire (ou un administrateur)."""
+    return is_admin or record.get("owner") is None or record.get("owner") == username
+
+# Gestionnaire de jobs de l'application
+job_manager = JobManager(
+    execute_tool_long,
+    workers=config.jobs.workers,
+    queue_size=config.jobs.queue_size,
+    result_ttl=config.jobs.result_ttl,
+    poll_interval=config.jobs.poll_interval
+)
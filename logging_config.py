@@ -1,37 +1,152 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Any, Optional
 from config import config
 
+class JsonFormatter(logging.Formatter):
+    """Formate chaque enregistrement en une ligne JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno
+        }
+        # Champs structurés passés via extra={"fields": {...}}
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+        if record.exc_text:
+            # Exception déjà rendue à la mise en file (NonBlockingQueueHandler)
+            data["exception"] = record.exc_text
+        elif record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+# Rendu des exceptions à la mise en file (format standard du module traceback)
+exception_formatter = logging.Formatter()
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler qui ne bloque jamais l'appelant.
+
+    Le message est figé à la mise en file (arguments interpolés, exception
+    rendue en texte): le thread d'écoute ne voit pas les objets de l'appelant,
+    qui peuvent changer entre-temps. La mise en forme finale reste au thread
+    d'écoute, et les enregistrements sont abandonnés (et comptés) si la file
+    est pleine.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = exception_formatter.formatException(record.exc_info)
+            # Ne pas garder les frames (et leurs variables locales) en vie dans la file
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 # Configuration du format de log
-log_format = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+log_format = JsonFormatter() if config.logging.json_logs else logging.Formatter(config.logging.format)
 
-def setup_logger(name):
-    """Configure et retourne un logger avec le nom spécifié."""
-    logger = logging.getLogger(name)
-    
-    # Définir le niveau de log
-    level = getattr(logging, config.logging.level.upper(), logging.INFO)
-    logger.setLevel(level)
-    
-    # Handler pour la console
+# File et thread d'écoute partagés par tous les loggers de l'application
+log_queue: queue.Queue = queue.Queue(maxsize=config.logging.queue_size)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_listener: Optional[QueueListener] = None
+
+def create_handlers():
+    """Crée les handlers d'écriture (console et fichier), exécutés dans le thread d'écoute."""
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(log_format)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # Handler pour le fichier si spécifié
     if config.logging.file:
         file_handler = RotatingFileHandler(
             config.logging.file,
-            maxBytes=10485760,  # 10MB
-            backupCount=5
+            maxBytes=config.logging.max_file_size,
+            backupCount=config.logging.backup_count
         )
         file_handler.setFormatter(log_format)
-        logger.addHandler(file_handler)
-    
+        handlers.append(file_handler)
+    return handlers
+
+def start_log_listener() -> QueueListener:
+    """Démarre le thread d'écoute de la file de logs s'il ne tourne pas déjà."""
+    global queue_listener
+    if queue_listener is None:
+        queue_listener = QueueListener(log_queue, *create_handlers(), respect_handler_level=True)
+        queue_listener.start()
+        atexit.register(stop_log_listener)
+    return queue_listener
+
+def stop_log_listener():
+    """Vide la file et arrête le thread d'écoute."""
+    global queue_listener
+    if queue_listener is not None:
+        queue_listener.stop()
+        queue_listener = None
+
+def setup_logger(name):
+    """Configure et retourne un logger avec le nom spécifié.
+
+    Le logger n'écrit que dans une file; l'écriture sur la console et dans
+    le fichier est faite par un thread d'écoute dédié.
+    """
+    logger = logging.getLogger(name)
+
+    # Définir le niveau de log
+    level = getattr(logging, config.logging.level.upper(), logging.INFO)
+    logger.setLevel(level)
+
+    start_log_listener()
+    if queue_handler not in logger.handlers:
+        logger.addHandler(queue_handler)
+
     return logger
 
+def is_sampled(route: str) -> bool:
+    """Indique si un log de la route donnée doit être émis selon son taux d'échantillonnage.
+
+    Les taux se configurent par route avec LOG_SAMPLE_RATE_<ROUTE> (ex: LOG_SAMPLE_RATE_CALL_TOOL=0.01).
+    """
+    rate = config.logging.sample_rates.get(route, config.logging.default_sample_rate)
+    return rate >= 1.0 or random.random() < rate
+
+class Truncated:
+    """Valeur tronquée à l'affichage, calculée seulement si le message est formaté."""
+
+    __slots__ = ("value", "max_length")
+
+    def __init__(self, value: Any, max_length: int = None):
+        self.value = value
+        self.max_length = max_length if max_length is not None else config.logging.max_value_length
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if len(text) > self.max_length:
+            return f"{text[:self.max_length]}... ({len(text)} caractères)"
+        return text
+
+    __repr__ = __str__
+
 # Logger principal de l'application
-logger = setup_logger("fastmcp_web_interface")
\ No newline at end of file
+logger = setup_logger("fastmcp_web_interface")
@@ -1,8 +1,11 @@
 import time
 import os
-import psutil
+import asyncio
+import functools
+from collections import deque
 import socket
 import threading
+from typing import Any, Dict, Optional, Tuple
 from prometheus_client import start_http_server, Counter, Gauge, Histogram, Summary
 from logging_config import logger
 from config import config
@@ -10,15 +13,58 @@ from config import config
 # Métriques Prometheus
 REQUEST_COUNT = Counter('fastmcp_request_total', 'Total des requêtes', ['method', 'endpoint', 'status'])
 REQUEST_LATENCY = Histogram('fastmcp_request_latency_seconds', 'Latence des requêtes', ['method', 'endpoint'])
+REQUEST_SIZE = Histogram('fastmcp_request_size_bytes', 'Taille du corps des requêtes', ['method', 'endpoint'],
+                         buckets=(100, 1000, 10000, 100000, 1000000, 10000000))
+RESPONSE_SIZE = Histogram('fastmcp_response_size_bytes', 'Taille du corps des réponses', ['method', 'endpoint'],
+                          buckets=(100, 1000, 10000, 100000, 1000000, 10000000))
 TOOL_EXECUTION_COUNT = Counter('fastmcp_tool_execution_total', 'Total des exécutions d\'outils', ['tool_name', 'status'])
 TOOL_EXECUTION_TIME = Histogram('fastmcp_tool_execution_time_seconds', 'Temps d\'exécution des outils', ['tool_name'])
+TOOL_RESULT_SIZE = Histogram('fastmcp_tool_result_bytes', 'Taille des résultats d\'outils sérialisés', ['tool_name'],
+                             buckets=(1024, 16384, 131072, 1048576, 4194304, 16777216, 67108864))
+TOOL_RESULT_REJECTED = Counter('fastmcp_tool_result_rejected_total', 'Résultats refusés (taille maximale dépassée)', ['tool_name'])
+LARGE_RESULT_CACHE = Counter('fastmcp_large_result_cache_total', 'Résultats volumineux traités par la politique de cache', ['policy'])
+TOOL_CACHE_LOOKUPS = Counter('fastmcp_tool_cache_lookups_total', 'Consultations du cache des outils par issue (hit, negative_hit, miss)', ['tool_name', 'result'])
+MICROBATCH_SIZE = Histogram('fastmcp_microbatch_size', 'Appels regroupés par lot automatique', ['tool_name'],
+                           buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+MICROBATCH_FILL = Histogram('fastmcp_microbatch_fill_ratio', 'Remplissage des lots automatiques (taille / taille maximale)', ['tool_name'],
+                           buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0))
+MICROBATCH_FLUSHES = Counter('fastmcp_microbatch_flush_total', 'Lots automatiques envoyés, par déclencheur (window, size)', ['tool_name', 'trigger'])
+NEGATIVE_CACHE_STORED = Counter('fastmcp_negative_cache_stored_total', 'Erreurs déterministes mises en cache', ['tool_name'])
 
 # Métriques système
 CPU_USAGE = Gauge('fastmcp_cpu_usage_percent', 'Utilisation CPU en pourcentage')
 MEMORY_USAGE = Gauge('fastmcp_memory_usage_bytes', 'Utilisation de la mémoire en bytes')
 AVAILABLE_MEMORY = Gauge('fastmcp_available_memory_bytes', 'Mémoire disponible en bytes')
 OPEN_FILE_DESCRIPTORS = Gauge('fastmcp_open_file_descriptors', 'Nombre de descripteurs de fichiers ouverts')
-ACTIVE_CONNECTIONS = Gauge('fastmcp_active_connections', 'Nombre de connexions actives')
+ACTIVE_CONNECTIONS = Gauge('fastmcp_active_connections', 'Nombre de connexions réseau actives du processus')
+
+# Métriques de la boucle d'événements
+EVENT_LOOP_LAG = Histogram('fastmcp_event_loop_lag_seconds', 'Retard d\'ordonnancement de la boucle d\'événements',
+                           buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+SLOW_CALLBACKS = Counter('fastmcp_slow_callbacks_total', 'Callbacks ayant bloqué la boucle au-delà du seuil', ['callback'])
+
+# Métriques WebSocket
+WEBSOCKET_CONNECTIONS = Gauge('fastmcp_websocket_connections', 'Nombre de connexions WebSocket ouvertes')
+WEBSOCKET_CALLS = Counter('fastmcp_websocket_calls_total', 'Appels d\'outils reçus par WebSocket', ['status'])
+
+# Métriques des jobs asynchrones
+JOB_QUEUE_DEPTH = Gauge('fastmcp_job_queue_depth', 'Nombre de jobs en attente')
+JOB_RUNNING = Gauge('fastmcp_jobs_running', 'Nombre de jobs en cours d\'exécution')
+JOB_COMPLETED = Counter('fastmcp_jobs_completed_total', 'Jobs terminés', ['status'])
+JOB_WAIT_TIME = Histogram('fastmcp_job_wait_seconds', 'Temps d\'attente des jobs dans la file',
+                          buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0))
+
+# Métriques de l'ordonnanceur du pool de clients
+SCHEDULER_WAIT_TIME = Histogram('fastmcp_scheduler_wait_seconds', 'Attente d\'un client du pool par classe de priorité', ['priority'],
+                                buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+SCHEDULER_QUEUE_DEPTH = Gauge('fastmcp_scheduler_queue_depth', 'Demandes en attente d\'un client du pool', ['priority'])
+SCHEDULER_REJECTED = Counter('fastmcp_scheduler_rejected_total', 'Demandes rejetées (file de la classe pleine)', ['priority'])
+
+# Métriques des backends FastMCP
+BACKEND_OUTSTANDING = Gauge('fastmcp_backend_outstanding_requests', 'Appels en cours par backend FastMCP', ['backend'])
+BACKEND_HEALTHY = Gauge('fastmcp_backend_healthy', 'Backend FastMCP éligible (1) ou écarté (0)', ['backend'])
+BACKEND_EJECTIONS = Counter('fastmcp_backend_ejections_total', 'Mises à l\'écart de backends FastMCP', ['backend'])
+BACKEND_ROUTED = Counter('fastmcp_backend_routed_total', 'Appels attribués par mode de sélection du backend', ['mode'])
 
 # Métriques FastMCP
 FASTMCP_CLIENT_POOL = Gauge('fastmcp_client_pool_size', 'Taille du pool de clients FastMCP')
@@ -31,68 +77,290 @@ def start_monitoring(port=8001):
     logger.info(f"Serveur de métriques Prometheus démarré sur le port {port}")
     
     # Démarrer la collecte des métriques système en arrière-plan
-    thread = threading.Thread(target=collect_system_metrics, daemon=True)
-    thread.start()
-    
-    return thread
+    return system_sampler.start()
 
-def collect_system_metrics():
-    """Collecte périodiquement les métriques système."""
-    while True:
+class SystemSampler:
+    """Échantillonneur des métriques système exécuté dans un thread dédié.
+    
+    Les appels bloquants (psutil, connexion au serveur FastMCP) sont faits
+    uniquement dans ce thread; les health checks lisent le dernier instantané.
+    """
+    
+    def __init__(self, interval: float = 15, max_age: float = 30):
+        self.interval = interval
+        self.max_age = max_age
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.psutil = None
+        self.process = None
+    
+    def load_psutil(self):
+        """Importe psutil au premier usage: rien n'est chargé tant que l'échantillonnage n'a pas démarré."""
+        if self.psutil is None:
+            import psutil
+            self.process = psutil.Process()
+            self.psutil = psutil
+        return self.psutil
+    
+    def start(self) -> threading.Thread:
+        """Démarre le thread d'échantillonnage s'il ne tourne pas déjà."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                # Premier appel non bloquant: initialise la référence de cpu_percent
+                self.load_psutil().cpu_percent(interval=None)
+                self.thread = threading.Thread(target=self.run, name="system-sampler", daemon=True)
+                self.thread.start()
+            return self.thread
+    
+    def run(self):
+        """Boucle d'échantillonnage."""
+        while True:
+            try:
+                self.sample()
+                time.sleep(self.interval)
+            except Exception as e:
+                logger.error(f"Erreur lors de la collecte des métriques système: {str(e)}")
+                time.sleep(self.interval * 2)  # Attendre un peu plus longtemps en cas d'erreur
+    
+    def count_connections(self) -> int:
+        """Compte les connexions réseau du processus courant uniquement."""
+        get_connections = getattr(self.process, "net_connections", None) or self.process.connections
+        return len(get_connections(kind="inet"))
+    
+    def check_fastmcp_server(self) -> bool:
+        """Vérifie si le serveur FastMCP accepte les connexions."""
         try:
-            # Métriques CPU
-            CPU_USAGE.set(psutil.cpu_percent(interval=1))
-            
-            # Métriques mémoire
-            memory = psutil.virtual_memory()
-            MEMORY_USAGE.set(memory.used)
-            AVAILABLE_MEMORY.set(memory.available)
-            
-            # Descripteurs de fichiers ouverts
-            if os.name == 'posix':  # Linux/Unix seulement
-                OPEN_FILE_DESCRIPTORS.set(psutil.Process().num_fds())
-            
-            # Connexions réseau actives
-            connections = len(psutil.net_connections())
-            ACTIVE_CONNECTIONS.set(connections)
-            
-            time.sleep(15)  # Collecter toutes les 15 secondes
-        except Exception as e:
-            logger.error(f"Erreur lors de la collecte des métriques système: {str(e)}")
-            time.sleep(30)  # Attendre un peu plus longtemps en cas d'erreur
+            with socket.create_connection((config.server.host, config.server.port), timeout=1):
+                return True
+        except OSError:
+            return False
+    
+    def sample(self) -> Dict[str, Any]:
+        """Collecte un instantané des métriques et met à jour les jauges Prometheus."""
+        psutil = self.load_psutil()
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        connections = self.count_connections()
+        
+        CPU_USAGE.set(cpu_percent)
+        MEMORY_USAGE.set(memory.used)
+        AVAILABLE_MEMORY.set(memory.available)
+        ACTIVE_CONNECTIONS.set(connections)
+        if os.name == 'posix':  # Linux/Unix seulement
+            OPEN_FILE_DESCRIPTORS.set(self.process.num_fds())
+        
+        snapshot = {
+            "timestamp": time.time(),
+            "fastmcp_available": self.check_fastmcp_server(),
+            "cpu_percent": cpu_percent,
+            "memory_percent": memory.percent,
+            "disk_percent": disk.percent,
+            "connections": connections,
+            "uptime_seconds": time.time() - psutil.boot_time()
+        }
+        self.snapshot = snapshot
+        return snapshot
+    
+    def get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Renvoie le dernier instantané sans jamais bloquer."""
+        return self.snapshot
+
+# Échantillonneur global des métriques système
+system_sampler = SystemSampler(
+    interval=config.monitoring.collect_interval,
+    max_age=config.monitoring.health_max_age
+)
+
+# Libellés d'endpoint de repli
+UNMATCHED_ENDPOINT = "<unmatched>"
+OTHER_ENDPOINT = "<other>"
+
+def get_route_template(scope) -> str:
+    """Renvoie le modèle de route résolu par le routeur (ex: /admin/circuit-breakers/reset/{name})."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ENDPOINT
+    return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ENDPOINT)
 
 class PrometheusMiddleware:
-    """Middleware FastAPI pour collecter des métriques de requêtes."""
+    """Middleware ASGI pur pour collecter des métriques de requêtes.
+    
+    Les métriques sont étiquetées par modèle de route et non par chemin brut,
+    et le nombre de libellés distincts est plafonné par `max_endpoints`.
+    Le middleware ajoute aussi l'en-tête X-Process-Time à la réponse.
+    """
     
-    def __init__(self, app):
+    def __init__(self, app, max_endpoints: int = None):
         self.app = app
+        self.max_endpoints = max_endpoints if max_endpoints is not None else config.monitoring.max_endpoint_labels
+        self.endpoints = set()
+    
+    def get_endpoint_label(self, scope) -> str:
+        """Renvoie le libellé d'endpoint en respectant la limite de cardinalité."""
+        endpoint = get_route_template(scope)
+        if endpoint in self.endpoints:
+            return endpoint
+        if len(self.endpoints) >= self.max_endpoints:
+            return OTHER_ENDPOINT
+        self.endpoints.add(endpoint)
+        return endpoint
     
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
         
-        start_time = time.time()
-        
-        # Wrap send pour intercepter le code de statut
-        original_send = send
-        send_wrapper = self.create_send_wrapper(original_send, start_time, scope)
-        
-        await self.app(scope, receive, send_wrapper)
-    
-    def create_send_wrapper(self, original_send, start_time, scope):
+        start_time = time.perf_counter()
         method = scope.get("method", "")
-        path = scope.get("path", "")
+        request_size = 0
+        response_size = 0
+        status_code = 500
+        
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
         
         async def send_wrapper(message):
+            nonlocal response_size, status_code
             if message["type"] == "http.response.start":
                 status_code = message["status"]
-                duration = time.time() - start_time
-                REQUEST_COUNT.labels(method=method, endpoint=path, status=status_code).inc()
-                REQUEST_LATENCY.labels(method=method, endpoint=path).observe(duration)
-            
-            await original_send(message)
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(process_time).encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de la requête {scope.get('path', '')}: {str(e)}")
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            endpoint = self.get_endpoint_label(scope)
+            REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code).inc()
+            REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(duration)
+            REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(request_size)
+            RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(response_size)
+
+class EventLoopMonitor:
+    """Surveillance de la boucle d'événements.
+    
+    - Le retard d'ordonnancement est mesuré par une tâche qui dort `interval`
+      secondes et compare la durée réelle à la durée attendue.
+    - Les callbacks lents sont détectés en chronométrant `asyncio.Handle._run`;
+      tout callback dépassant `slow_threshold` est enregistré avec la coroutine
+      ou la fonction qui a tenu la boucle.
+    """
+    
+    def __init__(self, interval: float = 0.5, slow_threshold: float = 0.1, history: int = 100):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lags = deque(maxlen=600)
+        self.slow_callbacks = deque(maxlen=history)
+        self.task: Optional[asyncio.Task] = None
+        self.original_handle_run = None
+    
+    def start(self):
+        """Démarre la mesure du retard et la détection des callbacks lents (depuis la boucle)."""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.measure_lag())
+        self.install_slow_callback_detector()
+        logger.info(f"Surveillance de la boucle d'événements démarrée (seuil callbacks lents: {self.slow_threshold}s)")
+    
+    def stop(self):
+        """Arrête la surveillance et restaure `Handle._run`."""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.original_handle_run is not None:
+            asyncio.events.Handle._run = self.original_handle_run
+            self.original_handle_run = None
+    
+    async def measure_lag(self):
+        """Mesure en continu le retard d'ordonnancement."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            EVENT_LOOP_LAG.observe(lag)
+            self.lags.append(lag)
+    
+    def install_slow_callback_detector(self):
+        """Remplace `Handle._run` par une version chronométrée."""
+        if self.original_handle_run is not None:
+            return
+        original_run = asyncio.events.Handle._run
+        monitor = self
         
-        return send_wrapper
+        def timed_run(handle):
+            start = time.perf_counter()
+            original_run(handle)
+            duration = time.perf_counter() - start
+            if duration >= monitor.slow_threshold:
+                monitor.record_slow_callback(handle, duration)
+        
+        self.original_handle_run = original_run
+        asyncio.events.Handle._run = timed_run
+    
+    @staticmethod
+    def describe_handle(handle) -> Tuple[str, str]:
+        """Renvoie le nom et la description du callback (ou de la coroutine) exécuté par un handle.
+        
+        Le nom (qualname, ou nom du type à défaut) ne contient pas d'adresse
+        mémoire et sert d'étiquette Prometheus; la description complète
+        (repr) n'est que journalisée et conservée dans l'historique récent.
+        """
+        callback = handle._callback
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            callback = owner.get_coro()
+        detail = repr(callback)
+        while isinstance(callback, functools.partial):
+            callback = callback.func
+        return getattr(callback, "__qualname__", None) or type(callback).__qualname__, detail
+    
+    def record_slow_callback(self, handle, duration: float):
+        """Enregistre un callback lent."""
+        name, detail = self.describe_handle(handle)
+        SLOW_CALLBACKS.labels(callback=name).inc()
+        self.slow_callbacks.append({"callback": name, "detail": detail, "duration_seconds": duration,
+                                    "timestamp": time.time()})
+        logger.warning(f"Boucle d'événements bloquée {duration:.3f}s par {detail}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Renvoie les statistiques récentes de la boucle d'événements."""
+        lags = sorted(self.lags)
+        return {
+            "running": self.task is not None and not self.task.done(),
+            "interval_seconds": self.interval,
+            "slow_callback_threshold_seconds": self.slow_threshold,
+            "lag": {
+                "samples": len(lags),
+                "last_seconds": self.lags[-1] if self.lags else None,
+                "mean_seconds": sum(lags) / len(lags) if lags else None,
+                "p99_seconds": lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else None,
+                "max_seconds": lags[-1] if lags else None
+            },
+            "slow_callbacks": list(self.slow_callbacks)
+        }
+
+# Moniteur global de la boucle d'événements
+event_loop_monitor = EventLoopMonitor(
+    interval=config.monitoring.loop_lag_interval,
+    slow_threshold=config.monitoring.slow_callback_threshold
+)
+
+def record_tool_execution(tool_name: str, status: str, duration: float):
+    """Enregistre une exécution d'outil (compteur par statut et durée)."""
+    TOOL_EXECUTION_COUNT.labels(tool_name=tool_name, status=status).inc()
+    TOOL_EXECUTION_TIME.labels(tool_name=tool_name).observe(duration)
 
 # Fonction décorateur pour mesurer l'exécution des outils
 def track_tool_execution(func):
@@ -101,14 +369,10 @@ def track_tool_execution(func):
         start_time = time.time()
         try:
             result = await func(tool_name, params)
-            duration = time.time() - start_time
-            TOOL_EXECUTION_COUNT.labels(tool_name=tool_name, status="success").inc()
-            TOOL_EXECUTION_TIME.labels(tool_name=tool_name).observe(duration)
+            record_tool_execution(tool_name, "success", time.time() - start_time)
             return result
         except Exception as e:
-            duration = time.time() - start_time
-            TOOL_EXECUTION_COUNT.labels(tool_name=tool_name, status="error").inc()
-            TOOL_EXECUTION_TIME.labels(tool_name=tool_name).observe(duration)
+            record_tool_execution(tool_name, "error", time.time() - start_time)
             # Propager l'exception après avoir collecté les métriques
             raise
     
@@ -116,39 +380,48 @@ def track_tool_execution(func):
 
 # Fonction utilitaire pour les healthchecks
 def get_health_status():
-    """Récupère l'état de santé détaillé du système."""
+    """Récupère l'état de santé détaillé du système à partir du dernier instantané.
+    
+    Cette fonction ne fait aucun appel bloquant: elle peut être appelée
+    directement depuis la boucle d'événements.
+    """
     try:
-        # Vérifier si le serveur FastMCP est accessible
-        fastmcp_available = False
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(1)
-            s.connect((config.server.host, config.server.port))
-            s.close()
-            fastmcp_available = True
-        except:
-            pass
+        # Démarrer l'échantillonneur si le monitoring ne l'a pas déjà fait
+        system_sampler.start()
+        snapshot = system_sampler.get_snapshot()
+        if snapshot is None:
+            return {
+                "status": "unknown",
+                "details": {
+                    "message": "Premier échantillon des métriques système en cours"
+                }
+            }
         
-        # Récupérer les métriques système
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        age = time.time() - snapshot["timestamp"]
+        cpu_percent = snapshot["cpu_percent"]
+        memory_percent = snapshot["memory_percent"]
+        disk_percent = snapshot["disk_percent"]
+        fastmcp_available = snapshot["fastmcp_available"]
         
         # Calculer l'état général
         overall_status = "ok"
-        if cpu_percent > 90 or memory.percent > 90 or disk.percent > 90 or not fastmcp_available:
+        if cpu_percent > 90 or memory_percent > 90 or disk_percent > 90 or not fastmcp_available:
             overall_status = "warning"
-        if cpu_percent > 95 or memory.percent > 95 or disk.percent > 95:
+        if cpu_percent > 95 or memory_percent > 95 or disk_percent > 95:
             overall_status = "critical"
+        if age > system_sampler.max_age:
+            overall_status = "stale"
         
         return {
             "status": overall_status,
             "details": {
                 "fastmcp_server": "available" if fastmcp_available else "unavailable",
                 "cpu_usage_percent": cpu_percent,
-                "memory_usage_percent": memory.percent,
-                "disk_usage_percent": disk.percent,
-                "uptime_seconds": time.time() - psutil.boot_time()
+                "memory_usage_percent": memory_percent,
+                "disk_usage_percent": disk_percent,
+                "process_connections": snapshot["connections"],
+                "uptime_seconds": snapshot["uptime_seconds"],
+                "snapshot_age_seconds": age
             }
         }
     except Exception as e:
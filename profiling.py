@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from logging_config import logger
+from config import config
+
+class ProfilerBusyError(Exception):
+    """Exception levée lorsqu'une session de profilage est déjà en cours."""
+    pass
+
+def format_frame(frame) -> str:
+    """Formate un frame sous la forme `fonction (fichier:ligne)`."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse_stack(frame) -> str:
+    """Renvoie la pile d'appels au format "collapsed" (racine en premier, séparée par ';')."""
+    stack = []
+    while frame is not None:
+        stack.append(format_frame(frame))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+class SamplingProfiler:
+    """Profileur CPU par échantillonnage des piles de threads.
+
+    Un thread dédié relève périodiquement les piles via sys._current_frames().
+    L'intervalle est élargi si le coût d'un échantillon dépasse la part de
+    temps autorisée (`max_overhead`). Une seule session peut tourner à la fois.
+    """
+
+    def __init__(self, max_duration: float = 60, max_overhead: float = 0.02):
+        if max_overhead <= 0:
+            raise ValueError(f"max_overhead doit être strictement positif (reçu {max_overhead})")
+        self.max_duration = max_duration
+        self.max_overhead = max_overhead
+        self.lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        """Indique si une session de profilage est en cours."""
+        return self.lock.locked()
+
+    def profile(self, duration: float, interval: float = 0.01, thread_id: Optional[int] = None) -> Dict[str, Any]:
+        """Échantillonne les piles pendant `duration` secondes (appel bloquant, à lancer dans un thread).
+
+        Args:
+            duration (float): Durée de la session, plafonnée à `max_duration`
+            interval (float): Intervalle initial entre deux échantillons (0 < interval <= duration)
+            thread_id (int): Thread à échantillonner, ou None pour tous les threads
+
+        Returns:
+            Les piles agrégées au format "collapsed" et les statistiques de la session
+        """
+        if not 0 < interval <= duration:
+            raise ValueError(f"Intervalle invalide: 0 < interval ({interval}) <= duration ({duration}) attendu")
+        if not self.lock.acquire(blocking=False):
+            raise ProfilerBusyError("Une session de profilage est déjà en cours")
+        try:
+            duration = min(duration, self.max_duration)
+            own_id = threading.get_ident()
+            counts: Counter = Counter()
+            samples = 0
+            busy = 0.0
+            start = time.perf_counter()
+            end = start + duration
+            logger.info(f"Profilage CPU démarré pour {duration}s (intervalle {interval}s)")
+
+            while time.perf_counter() < end:
+                sample_start = time.perf_counter()
+                for tid, frame in sys._current_frames().items():
+                    if tid == own_id or (thread_id is not None and tid != thread_id):
+                        continue
+                    counts[collapse_stack(frame)] += 1
+                cost = time.perf_counter() - sample_start
+                busy += cost
+                samples += 1
+                # Respecter le plafond de surcoût en espaçant les échantillons
+                if cost > interval * self.max_overhead:
+                    interval = cost / self.max_overhead
+                # Ne pas dormir au-delà de la fin de la session
+                time.sleep(max(0.0, min(interval, end - time.perf_counter())))
+
+            elapsed = time.perf_counter() - start
+            return {
+                "format": "collapsed",
+                "duration_seconds": elapsed,
+                "samples": samples,
+                "final_interval_seconds": interval,
+                "overhead_ratio": busy / elapsed if elapsed > 0 else 0.0,
+                "stacks": counts
+            }
+        finally:
+            self.lock.release()
+
+def render_collapsed(stacks: Counter) -> str:
+    """Rend les piles agrégées au format texte de flamegraph.pl / speedscope."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+class HeapProfiler:
+    """Instantanés du tas via tracemalloc, comparés à l'instantané précédent."""
+
+    def __init__(self):
+        self.previous: Optional[tracemalloc.Snapshot] = None
+        self.lock = threading.Lock()
+
+    def start(self, frames: int = 10) -> bool:
+        """Démarre le suivi des allocations."""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        self.previous = None
+        logger.info(f"Suivi tracemalloc démarré ({frames} frames)")
+        return True
+
+    def stop(self) -> bool:
+        """Arrête le suivi des allocations et libère les instantanés."""
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        self.previous = None
+        logger.info("Suivi tracemalloc arrêté")
+        return True
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        """Prend un instantané et le compare au précédent (appel bloquant, à lancer dans un thread)."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc n'est pas démarré")
+        if not self.lock.acquire(blocking=False):
+            raise ProfilerBusyError("Un instantané du tas est déjà en cours")
+        try:
+            current = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+            result = {
+                "traced_memory_bytes": traced_current,
+                "traced_peak_bytes": traced_peak,
+                "top": [self.format_stat(stat) for stat in current.statistics(key_type)[:limit]],
+                "diff": None
+            }
+            if self.previous is not None:
+                result["diff"] = [
+                    self.format_stat(stat) for stat in current.compare_to(self.previous, key_type)[:limit]
+                ]
+            self.previous = current
+            return result
+        finally:
+            self.lock.release()
+
+    @staticmethod
+    def format_stat(stat) -> Dict[str, Any]:
+        """Convertit une statistique tracemalloc en dictionnaire."""
+        frame = stat.traceback[0]
+        data = {
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count
+        }
+        if hasattr(stat, "size_diff"):
+            data["size_diff_bytes"] = stat.size_diff
+            data["count_diff"] = stat.count_diff
+        return data
+
+# Profileurs globaux
+cpu_profiler = SamplingProfiler(
+    max_duration=config.monitoring.profiling_max_duration,
+    max_overhead=config.monitoring.profiling_max_overhead
+)
+heap_profiler = HeapProfiler()
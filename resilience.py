@@ -5,6 +5,7 @@ from enum import Enum
 from typing import Callable, Dict, Any, Optional, Type, List, Union
 from logging_config import logger
 from config import config
+from tracing import start_span
 
 class CircuitState(Enum):
     CLOSED = "CLOSED"       # Circuit fermé, tout fonctionne normalement
@@ -95,6 +96,47 @@ class CircuitBreakerError(Exception):
     """Exception levée lorsqu'un circuit breaker est ouvert."""
     pass
 
+class OverloadError(Exception):
+    """Exception levée lorsqu'une requête est rejetée par manque de capacité.
+    
+    Ce n'est pas une défaillance du service: elle n'est ni réessayée ni
+    comptée comme un échec par le circuit breaker.
+    """
+    pass
+
+class PermanentError(Exception):
+    """Exception déterministe: le même appel échouerait de la même façon.
+    
+    Le service a répondu; l'erreur n'est ni réessayée ni comptée comme un
+    échec par le circuit breaker.
+    """
+    pass
+
+class ToolExecutionError(PermanentError, ValueError):
+    """Erreur levée par l'outil lui-même (paramètres invalides, opération inconnue...).
+    
+    Le backend a répondu: réessayer avec les mêmes paramètres donnerait la
+    même erreur, qui peut donc être mise en cache (cache négatif).
+    """
+    pass
+
+class ToolFailureError(Exception):
+    """Échec inattendu d'un outil (exception non déclarée déterministe par register_tool).
+    
+    Rien ne garantit que le même appel échouerait de nouveau: l'erreur est
+    réessayée si l'outil est idempotent et n'est jamais mise en cache.
+    """
+    pass
+
+class SharedFailureError(Exception):
+    """Échec d'une opération partagée par plusieurs appels (lot d'appels regroupés).
+    
+    L'opération a déjà été réessayée et comptée une fois par le circuit
+    breaker: chaque appelant reçoit cette erreur, qui n'est ni réessayée ni
+    comptée de nouveau.
+    """
+    pass
+
 def circuit_breaker(name: str = None, failure_threshold: int = None, recovery_timeout: int = None):
     """Décorateur pour appliquer le pattern Circuit Breaker sur une fonction asynchrone."""
     def decorator(func):
@@ -118,24 +160,35 @@ def circuit_breaker(name: str = None, failure_threshold: int = None, recovery_ti
                 
             cb = get_circuit_breaker(name)
             
-            if not cb.allow_request():
-                logger.warning(f"Circuit {name} ouvert, requête bloquée")
-                raise CircuitBreakerError(f"Circuit {name} ouvert, service indisponible temporairement")
-            
-            try:
-                result = await func(*args, **kwargs)
-                cb.record_success()
-                return result
-            except Exception as e:
-                cb.record_failure()
-                raise
+            with start_span("circuit_breaker", {"circuit.name": name}) as span:
+                allowed = cb.allow_request()
+                span.set_attribute("circuit.state", cb.state.value)
+                span.set_attribute("circuit.allowed", allowed)
+                if not allowed:
+                    logger.warning(f"Circuit {name} ouvert, requête bloquée")
+                    raise CircuitBreakerError(f"Circuit {name} ouvert, service indisponible temporairement")
+                
+                try:
+                    result = await func(*args, **kwargs)
+                    cb.record_success()
+                    return result
+                except (OverloadError, PermanentError, SharedFailureError):
+                    raise
+                except Exception as e:
+                    cb.record_failure()
+                    raise
                 
         return wrapper
     return decorator
 
 def retry(max_retries: int = None, delay: float = None, backoff_factor: float = 2.0, 
-           exceptions_to_retry: Optional[List[Type[Exception]]] = None):
-    """Décorateur pour réessayer une fonction asynchrone en cas d'échec."""
+           exceptions_to_retry: Optional[List[Type[Exception]]] = None,
+           retry_if: Optional[Callable[..., bool]] = None):
+    """Décorateur pour réessayer une fonction asynchrone en cas d'échec.
+    
+    `retry_if`, appelé avec les arguments de l'appel, indique si celui-ci
+    peut être rejoué (par exemple seulement pour un outil idempotent).
+    """
     def decorator(func):
         nonlocal max_retries, delay
         
@@ -162,8 +215,16 @@ def retry(max_retries: int = None, delay: float = None, backoff_factor: float =
             
             while True:
                 try:
-                    return await func(*args, **kwargs)
+                    with start_span("retry.attempt", {"retry.function": func.__name__, "retry.attempt": retry_count + 1}):
+                        return await func(*args, **kwargs)
+                except (CircuitBreakerError, OverloadError, PermanentError, SharedFailureError):
+                    # Ni un circuit ouvert, ni une surcharge, ni une erreur déterministe ne se résolvent en réessayant aussitôt
+                    # (un échec partagé a déjà été réessayé par l'opération commune)
+                    raise
                 except tuple(exceptions) as e:
+                    if retry_if is not None and not retry_if(*args, **kwargs):
+                        # Appel non rejouable: l'échec est propagé tel quel
+                        raise
                     retry_count += 1
                     if retry_count > max_retries:
                         logger.warning(f"Nombre maximum de tentatives atteint ({max_retries}) pour {func.__name__}")
@@ -202,7 +263,8 @@ def with_timeout(seconds: int = None):
         return wrapper
     return decorator
 
-def resilient(circuit_name: str = None, max_retries: int = None, timeout: int = None):
+def resilient(circuit_name: str = None, max_retries: int = None, timeout: int = None,
+              retry_if: Optional[Callable[..., bool]] = None):
     """Décorateur combiné pour une résilience complète (timeout + retry + circuit breaker)."""
     def decorator(func):
         # Appliquer les décorateurs dans le bon ordre: timeout -> retry -> circuit breaker
@@ -213,7 +275,7 @@ def resilient(circuit_name: str = None, max_retries: int = None, timeout: int =
         
         # Décorateur composé
         @with_timeout(timeout)
-        @retry(max_retries=max_retries)
+        @retry(max_retries=max_retries, retry_if=retry_if)
         @circuit_breaker(name=cb_name)
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
@@ -0,0 +1,145 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from resilience import PermanentError
+
+# orjson est optionnel: repli sur le module json standard s'il n'est pas installé
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def dumps_json(value: Any) -> bytes:
+    """Sérialise une valeur en JSON (orjson si disponible).
+
+    Les objets non natifs (modèles pydantic, etc.) passent par jsonable_encoder.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée avec orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+class RawJSONResponse(Response):
+    """Réponse dont le corps est déjà du JSON sérialisé: aucun encodage supplémentaire."""
+
+    media_type = "application/json"
+
+def wrap_result(serialized_result: bytes) -> RawJSONResponse:
+    """Construit la réponse {"result": ...} autour d'un résultat déjà sérialisé."""
+    return RawJSONResponse(b'{"result":' + serialized_result + b'}')
+
+class ResultTooLargeError(PermanentError):
+    """Exception levée lorsqu'un résultat d'outil dépasse la taille autorisée."""
+
+    def __init__(self, tool_name: str, limit: int):
+        super().__init__(f"Résultat de l'outil {tool_name} trop volumineux (limite: {limit} octets)")
+        self.tool_name = tool_name
+        self.limit = limit
+
+class SerializedResult:
+    """Résultat d'outil sérialisé une seule fois, conservé en morceaux.
+
+    Les mêmes morceaux servent au contrôle de taille, à la mise en cache et à
+    la réponse HTTP, qui peut les diffuser sans assembler le résultat complet.
+    Avec `path`, le résultat est lu depuis un fichier (cache sur disque).
+    """
+
+    def __init__(self, chunks: Optional[List[bytes]] = None, size: Optional[int] = None, path: Optional[str] = None):
+        self.chunks = chunks or []
+        self.size = size if size is not None else sum(len(chunk) for chunk in self.chunks)
+        self.path = path
+
+    def to_bytes(self) -> bytes:
+        """Assemble le résultat complet (une copie)."""
+        if self.path is not None:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return self.chunks[0] if len(self.chunks) == 1 else b"".join(self.chunks)
+
+    async def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Parcourt le résultat par morceaux d'au plus `chunk_size` octets."""
+        if self.path is not None:
+            loop = asyncio.get_running_loop()
+            with open(self.path, "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        for chunk in self.chunks:
+            if len(chunk) <= chunk_size:
+                yield chunk
+                continue
+            view = memoryview(chunk)
+            for start in range(0, len(chunk), chunk_size):
+                yield bytes(view[start:start + chunk_size])
+
+    def __str__(self) -> str:
+        head = self.chunks[0][:200] if self.chunks else b""
+        return f"{head.decode('utf-8', 'replace')}... ({self.size} octets)"
+
+def serialize_result(value: Any, limit: Optional[int] = None, tool_name: str = "",
+                     chunk_size: int = 65536) -> SerializedResult:
+    """Sérialise un résultat en JSON une seule fois, en contrôlant sa taille.
+
+    Une liste est encodée élément par élément, regroupés en morceaux d'environ
+    `chunk_size` octets: la limite est vérifiée au fil de l'encodage, sans
+    construire de copie complète du résultat.
+    """
+    if not isinstance(value, (list, tuple)):
+        data = dumps_json(value)
+        if limit is not None and len(data) > limit:
+            raise ResultTooLargeError(tool_name, limit)
+        return SerializedResult([data])
+
+    chunks: List[bytes] = []
+    buffer = bytearray(b"[")
+    size = 1
+    for index, item in enumerate(value):
+        data = dumps_json(item)
+        size += len(data) + (1 if index else 0)
+        if limit is not None and size + 1 > limit:
+            raise ResultTooLargeError(tool_name, limit)
+        if index:
+            buffer += b","
+        if len(data) >= chunk_size:
+            # Élément volumineux: conservé tel quel, sans recopie dans le tampon
+            if buffer:
+                chunks.append(bytes(buffer))
+                buffer.clear()
+            chunks.append(data)
+            continue
+        buffer += data
+        if len(buffer) >= chunk_size:
+            chunks.append(bytes(buffer))
+            buffer.clear()
+    buffer += b"]"
+    chunks.append(bytes(buffer))
+    return SerializedResult(chunks, size + 1)
+
+def result_response(result: SerializedResult, stream_threshold: int, chunk_size: int = 65536) -> Response:
+    """Construit la réponse {"result": ...} d'un résultat sérialisé.
+
+    Au-delà de `stream_threshold` octets (ou pour un résultat lu sur disque),
+    le corps est diffusé par morceaux au lieu d'être assemblé en mémoire.
+    """
+    if result.path is None and result.size < stream_threshold:
+        return RawJSONResponse(b"".join([b'{"result":', *result.chunks, b'}']))
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b'{"result":'
+        async for chunk in result.iter_chunks(chunk_size):
+            yield chunk
+        yield b'}'
+
+    return StreamingResponse(body(), media_type="application/json")
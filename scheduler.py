@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from logging_config import logger
+from monitoring import SCHEDULER_QUEUE_DEPTH, SCHEDULER_REJECTED, SCHEDULER_WAIT_TIME
+from resilience import OverloadError
+
+# Classes de priorité
+PRIORITY_ADMIN = "admin"
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_ADMIN, PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# Contexte d'ordonnancement de la requête courante (propagé à travers les décorateurs de résilience)
+request_priority: ContextVar[str] = ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+request_tenant: ContextVar[Optional[str]] = ContextVar("request_tenant", default=None)
+
+@contextmanager
+def scheduling_context(priority: str, tenant: Optional[str]):
+    """Définit la classe de priorité et le locataire des appels effectués dans le bloc."""
+    priority_token = request_priority.set(priority)
+    tenant_token = request_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        request_priority.reset(priority_token)
+        request_tenant.reset(tenant_token)
+
+def select_priority(requested: Optional[str], allow_admin: bool = False) -> str:
+    """Détermine la classe de priorité d'un appel.
+    
+    Tout appelant peut se déclasser en "batch"; seule la classe "admin" est réservée.
+    """
+    if requested == PRIORITY_BATCH:
+        return PRIORITY_BATCH
+    if requested == PRIORITY_ADMIN and allow_admin:
+        return PRIORITY_ADMIN
+    return PRIORITY_INTERACTIVE
+
+class SchedulerQueueFullError(OverloadError):
+    """Exception levée lorsque la file d'une classe de priorité est pleine."""
+    pass
+
+class _Waiter:
+    __slots__ = ("future", "priority", "flow", "enqueued_at", "cancelled")
+
+    def __init__(self, future: asyncio.Future, priority: str, flow: Tuple[str, str]):
+        self.future = future
+        self.priority = priority
+        self.flow = flow
+        self.enqueued_at = time.perf_counter()
+        self.cancelled = False
+
+class FairScheduler:
+    """Ordonnanceur équitable pondéré devant le pool de clients.
+
+    Chaque flux (classe de priorité, locataire) reçoit une part de capacité
+    proportionnelle au poids de sa classe (start-time fair queueing): une
+    demande reçoit l'étiquette max(temps virtuel, fin du flux) + 1/poids et
+    les demandes sont servies par étiquette croissante. Un utilisateur qui
+    sature sa part n'accumule du retard que sur son propre flux; un
+    utilisateur léger est servi dès le prochain emplacement libre.
+
+    Le nombre d'emplacements est celui du pool, qui n'attend donc jamais.
+    Les emplacements occupés sont comptés: en libérer un qui n'a pas été
+    acquis est une erreur de programmation, signalée plutôt que masquée.
+    """
+
+    def __init__(self, capacity: int, weights: Dict[str, float] = None, queue_limits: Dict[str, int] = None):
+        self.capacity = capacity
+        self.in_use = 0
+        self.weights = weights or {PRIORITY_ADMIN: 8.0, PRIORITY_INTERACTIVE: 4.0, PRIORITY_BATCH: 1.0}
+        self.queue_limits = queue_limits or {}
+        self.heap: List[Tuple[float, int, _Waiter]] = []
+        self.sequence = itertools.count()
+        self.virtual_time = 0.0
+        self.flow_finish: Dict[Tuple[str, str], float] = {}
+        self.flow_waiting: Dict[Tuple[str, str], int] = {}
+        self.queued: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+
+    async def acquire(self, priority: str = PRIORITY_INTERACTIVE, tenant: Optional[str] = None):
+        """Attend un emplacement libre selon la priorité et le locataire."""
+        if priority not in self.weights:
+            priority = PRIORITY_INTERACTIVE
+        if self.available > 0 and not self.heap:
+            self.in_use += 1
+            SCHEDULER_WAIT_TIME.labels(priority=priority).observe(0)
+            return
+
+        limit = self.queue_limits.get(priority)
+        if limit is not None and self.queued[priority] >= limit:
+            SCHEDULER_REJECTED.labels(priority=priority).inc()
+            raise SchedulerQueueFullError(f"File d'attente {priority} pleine ({limit} requêtes)")
+
+        flow = (priority, tenant or "anonymous")
+        start = max(self.virtual_time, self.flow_finish.get(flow, 0.0))
+        finish = start + 1.0 / self.weights[priority]
+        self.flow_finish[flow] = finish
+        self.flow_waiting[flow] = self.flow_waiting.get(flow, 0) + 1
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), priority, flow)
+        heapq.heappush(self.heap, (finish, next(self.sequence), waiter))
+        self.set_queued(priority, 1)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Emplacement accordé au moment de l'annulation: le rendre
+                self.release()
+            else:
+                waiter.cancelled = True
+                self.dequeued(waiter)
+            raise
+        SCHEDULER_WAIT_TIME.labels(priority=priority).observe(time.perf_counter() - waiter.enqueued_at)
+
+    @property
+    def available(self) -> int:
+        """Emplacements libres."""
+        return self.capacity - self.in_use
+
+    def release(self):
+        """Libère un emplacement et le confie à la demande suivante, s'il y en a une.
+
+        Lève RuntimeError si aucun emplacement n'est occupé (libération en trop).
+        """
+        if self.in_use <= 0:
+            logger.error("Libération d'un emplacement de l'ordonnanceur non acquis")
+            raise RuntimeError("Libération d'un emplacement de l'ordonnanceur non acquis")
+        while self.heap:
+            finish, _, waiter = heapq.heappop(self.heap)
+            if waiter.cancelled:
+                continue
+            self.virtual_time = max(self.virtual_time, finish)
+            self.dequeued(waiter)
+            # Emplacement transmis tel quel: il reste occupé
+            waiter.future.set_result(None)
+            return
+        self.in_use -= 1
+
+    def set_queued(self, priority: str, delta: int):
+        self.queued[priority] += delta
+        SCHEDULER_QUEUE_DEPTH.labels(priority=priority).set(self.queued[priority])
+
+    def dequeued(self, waiter: _Waiter):
+        """Met à jour les compteurs d'une demande sortie de la file."""
+        self.set_queued(waiter.priority, -1)
+        remaining = self.flow_waiting[waiter.flow] - 1
+        if remaining:
+            self.flow_waiting[waiter.flow] = remaining
+        else:
+            # Flux inactif: oublier son état pour ne pas accumuler les locataires
+            del self.flow_waiting[waiter.flow]
+            if self.flow_finish.get(waiter.flow, 0.0) <= self.virtual_time:
+                self.flow_finish.pop(waiter.flow, None)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Renvoie l'état de l'ordonnanceur."""
+        return {
+            "capacity": self.capacity,
+            "available": self.available,
+            "queued": dict(self.queued),
+            "active_flows": len(self.flow_waiting),
+            "weights": dict(self.weights),
+            "queue_limits": dict(self.queue_limits),
+        }
+
+def create_scheduler(capacity: int) -> FairScheduler:
+    """Crée un ordonnanceur configuré (poids et limites de file par classe)."""
+    return FairScheduler(
+        capacity,
+        weights={
+            PRIORITY_ADMIN: config.scheduler.weight_admin,
+            PRIORITY_INTERACTIVE: config.scheduler.weight_interactive,
+            PRIORITY_BATCH: config.scheduler.weight_batch,
+        },
+        queue_limits={
+            PRIORITY_ADMIN: config.scheduler.queue_limit_admin,
+            PRIORITY_INTERACTIVE: config.scheduler.queue_limit_interactive,
+            PRIORITY_BATCH: config.scheduler.queue_limit_batch,
+        }
+    )
@@ -1,29 +1,129 @@
 from fastmcp import FastMCP, Client
+from fastmcp.exceptions import ToolError
+import functools
+import importlib.util
 import inspect
 import asyncio
-from typing import Dict, Any, List, Optional
+import random
+import time
+from typing import Dict, Any, List, Optional, Tuple, Type, Union
 
 # Imports des fonctionnalités avancées
-from logging_config import logger
+from logging_config import logger, Truncated
 from config import config
-from resilience import resilient, CircuitBreakerError
+from resilience import resilient, CircuitBreakerError, CircuitState, ToolExecutionError, ToolFailureError, circuit_breakers
 from cache import tool_cache_manager
-from monitoring import track_tool_execution, set_fastmcp_client_pool_size
+from monitoring import (track_tool_execution, record_tool_execution, set_fastmcp_client_pool_size, BACKEND_ROUTED,
+                        TOOL_RESULT_REJECTED, TOOL_RESULT_SIZE)
+from responses import ResultTooLargeError, SerializedResult, serialize_result
+from tracing import start_span
+from scheduler import create_scheduler, request_priority, request_tenant
+from backends import Backend, HashRing, ROUTING_CONSISTENT_HASH, bounded_load_capacity
+from batching import BatchRejectedError, MicroBatcher
+
+# NumPy est optionnel (implémentations par lot vectorisées), importé au premier appel
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
 
 # Instanciation du serveur FastMCP
 mcp = FastMCP(config.server.name)
 
-# Configuration des outils cachables
-tool_cache_manager.register_tool("greet", config.cache.tools_config.get("greet", 86400))  # 24h par défaut
-tool_cache_manager.register_tool("calculate", config.cache.tools_config.get("calculate", 3600))  # 1h par défaut
+# Implémentations par lot: nom de l'outil -> nom de l'outil MCP vectorisé
+batch_tools: Dict[str, str] = {}
+
+def register_tool(ttl: Optional[int] = None, cacheable: bool = True, idempotent: bool = True,
+                  key_params: Optional[List[str]] = None, name: Optional[str] = None,
+                  deterministic_errors: Tuple[Type[Exception], ...] = ()):
+    """Décorateur d'enregistrement d'un outil MCP avec sa politique de cache et d'idempotence.
+    
+    Args:
+        ttl: Durée de mise en cache (surchargeable par CACHE_TOOL_<NOM>_TTL)
+        cacheable: Résultats mis en cache (outil idempotent uniquement)
+        idempotent: Appel rejouable sans effet de bord (sinon jamais réessayé)
+        key_params: Paramètres qui déterminent le résultat (tous par défaut)
+        name: Nom de l'outil (nom de la fonction par défaut)
+        deterministic_errors: Exceptions de l'outil que le même appel relèverait à
+            coup sûr (ToolExecutionError: ni réessayées, mises en cache négatif).
+            Une ToolError levée par l'outil et un refus des paramètres par FastMCP
+            le sont toujours; toute autre exception reste réessayable (ToolFailureError).
+    """
+    def decorator(func):
+        tool_name = name or func.__name__
+        tool_cache_manager.declare_tool(tool_name, func, ttl=ttl, cacheable=cacheable,
+                                        idempotent=idempotent, key_params=key_params)
+        if not deterministic_errors:
+            return mcp.tool(name=tool_name, annotations={"idempotentHint": idempotent})(func)
+        # Seule la version enregistrée dans MCP relève les erreurs déclarées; l'appel direct reste inchangé
+        mcp.tool(name=tool_name, annotations={"idempotentHint": idempotent})(raise_as_tool_error(func, deterministic_errors))
+        return func
+    return decorator
 
-@mcp.tool()
+def raise_as_tool_error(func, errors: Tuple[Type[Exception], ...]):
+    """Relève les exceptions `errors` de l'outil en ToolError, transmise telle quelle au client.
+    
+    FastMCP préfixe le message des autres exceptions par "Error calling tool":
+    le client distingue ainsi une erreur déterministe d'un échec inattendu,
+    y compris pour un backend distant.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except errors as e:
+                raise ToolError(str(e)) from e
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except errors as e:
+            raise ToolError(str(e)) from e
+    return wrapper
+
+def register_batch_tool(tool_name: str, deterministic_errors: Tuple[Type[Exception], ...] = ()):
+    """Décorateur d'enregistrement de l'implémentation par lot d'un outil.
+    
+    L'outil MCP `<outil>_batch` reçoit les paramètres en colonnes (listes de
+    même longueur, un scalaire valant pour tous les éléments) et renvoie
+    {"results": [...], "errors": [{"index": i, "error": "..."}]}: un élément
+    en échec n'interrompt pas le lot, son résultat vaut None.
+    `deterministic_errors` a le même sens que pour register_tool (refus du lot entier).
+    """
+    def decorator(func):
+        batch_name = f"{tool_name}_batch"
+        batch_tools[tool_name] = batch_name
+        # Lots volumineux et rarement identiques: pas de mise en cache
+        return register_tool(cacheable=False, idempotent=tool_cache_manager.is_idempotent(tool_name),
+                             name=batch_name, deterministic_errors=deterministic_errors)(func)
+    return decorator
+
+def get_batch_tool(tool_name: str) -> Optional[str]:
+    """Nom de l'outil MCP par lot d'un outil (None s'il n'en a pas)."""
+    return batch_tools.get(tool_name)
+
+def batch_columns(**columns: Any) -> Tuple[int, Dict[str, list]]:
+    """Aligne les colonnes d'un appel par lot: scalaires diffusés, listes de même longueur."""
+    sizes = {len(value) for value in columns.values() if isinstance(value, (list, tuple))}
+    if len(sizes) > 1:
+        raise ValueError(f"Colonnes de longueurs différentes: {sorted(sizes)}")
+    size = sizes.pop() if sizes else 1
+    if size > config.server.batch_max_items:
+        raise ValueError(f"Lot de {size} éléments refusé (maximum {config.server.batch_max_items})")
+    return size, {key: list(value) if isinstance(value, (list, tuple)) else [value] * size
+                  for key, value in columns.items()}
+
+def is_retryable(tool_name: str, params: dict) -> bool:
+    """Un appel d'outil n'est réessayé que si l'outil est idempotent."""
+    return tool_cache_manager.is_idempotent(tool_name)
+
+@register_tool(ttl=86400)  # 24h par défaut
 def greet(name: str) -> str:
     """Renvoie un message de bienvenue personnalisé."""
-    logger.info(f"Outil greet appelé avec nom={name}")
+    logger.debug("Outil greet appelé avec nom=%s", name)
     return f"Bonjour, {name}!"
 
-@mcp.tool()
+@register_tool(ttl=3600, deterministic_errors=(ValueError,))  # 1h par défaut
 def calculate(operation: str, a: float, b: float) -> float:
     """Effectue une opération mathématique de base.
     
@@ -32,8 +132,11 @@ def calculate(operation: str, a: float, b: float) -> float:
     - a: Premier nombre
     - b: Deuxième nombre
     """
-    logger.info(f"Outil calculate appelé avec operation={operation}, a={a}, b={b}")
-    
+    logger.debug("Outil calculate appelé avec operation=%s, a=%s, b=%s", operation, a, b)
+    return _calculate(operation, a, b)
+
+def _calculate(operation: str, a: float, b: float) -> float:
+    """Calcul d'un élément (partagé par calculate et le repli sans NumPy de calculate_batch)."""
     if operation.lower() == "add":
         return a + b
     elif operation.lower() == "subtract":
@@ -47,52 +150,333 @@ def calculate(operation: str, a: float, b: float) -> float:
     else:
         raise ValueError(f"Opération non reconnue: {operation}")
 
+# Codes des opérations du chemin vectorisé (ordre de _calculate_vectorized)
+CALCULATE_CODES = {"add": 0, "subtract": 1, "multiply": 2, "divide": 3}
+
+@register_batch_tool("calculate", deterministic_errors=(ValueError,))
+def calculate_batch(operation: Union[str, List[str]], a: Union[float, List[float]],
+                    b: Union[float, List[float]]) -> Dict[str, Any]:
+    """Effectue des opérations mathématiques de base sur des tableaux, en un seul appel.
+    
+    Paramètres (listes de même longueur, ou valeur unique pour tous les éléments):
+    - operation: Type d'opération (add, subtract, multiply, divide)
+    - a: Premiers nombres
+    - b: Deuxièmes nombres
+    """
+    size, columns = batch_columns(operation=operation, a=a, b=b)
+    logger.debug("Outil calculate_batch appelé avec %d éléments", size)
+    if NUMPY_AVAILABLE:
+        # Opération unique: conservée telle quelle, sans code par élément
+        return _calculate_vectorized(operation if isinstance(operation, str) else columns["operation"],
+                                     columns["a"], columns["b"])
+    
+    results, errors = [], []
+    for index, (op, x, y) in enumerate(zip(columns["operation"], columns["a"], columns["b"])):
+        try:
+            results.append(_calculate(op, x, y))
+        except ValueError as e:
+            results.append(None)
+            errors.append({"index": index, "error": str(e)})
+    return {"results": results, "errors": errors}
+
+def _calculate_vectorized(operation: Union[str, List[str]], a: List[float], b: List[float]) -> Dict[str, Any]:
+    """Chemin NumPy de calculate_batch: une opération vectorisée par type d'opération."""
+    import numpy as np
+    
+    # Opérations converties en codes (-1 = inconnue), plus rapide que np.char sur des chaînes
+    if isinstance(operation, str):
+        codes = np.full(len(a), CALCULATE_CODES.get(operation.lower(), -1), dtype=np.int8)
+        operation = [operation] * len(a)
+    else:
+        codes = np.fromiter((CALCULATE_CODES.get(str(op).lower(), -1) for op in operation),
+                            dtype=np.int8, count=len(operation))
+    x = np.asarray(a, dtype=float)
+    y = np.asarray(b, dtype=float)
+    values = np.full(len(x), np.nan)
+    for code, func in enumerate((np.add, np.subtract, np.multiply)):
+        mask = codes == code
+        values[mask] = func(x[mask], y[mask])
+    divide = codes == CALCULATE_CODES["divide"]
+    by_zero = divide & (y == 0)
+    valid = divide & ~by_zero
+    values[valid] = x[valid] / y[valid]
+    
+    errors = {i: "Division par zéro impossible" for i in map(int, np.flatnonzero(by_zero))}
+    for i in map(int, np.flatnonzero(codes < 0)):
+        errors[i] = f"Opération non reconnue: {operation[i]}"
+    results = values.tolist()
+    for index in errors:
+        results[index] = None
+    return {"results": results, "errors": [{"index": i, "error": errors[i]} for i in sorted(errors)]}
+
 # Pool de clients FastMCP
 class ClientPool:
-    def __init__(self, server: FastMCP, max_size: int = 10):
+    """Pool de clients FastMCP réparti sur un ou plusieurs backends.
+    
+    Sans backend distant configuré, le pool s'adresse au serveur intégré au
+    processus. Chaque appel est confié au backend éligible ayant le moins
+    d'appels en cours; les connexions restent ouvertes entre les appels.
+    
+    En routage "consistent_hash", un appel portant une clé de routage (la clé
+    de cache d'un outil cachable) va au backend propriétaire de la clé sur un
+    anneau de hachage cohérent, tant que sa charge reste bornée: les mêmes
+    appels retrouvent le même réplica et son état chaud.
+    """
+    
+    def __init__(self, server: FastMCP, max_size: int = 10, backend_urls: Optional[List[str]] = None,
+                 routing: Optional[str] = None):
         self.server = server
         self.max_size = max_size
-        self.clients: List[Client] = []
-        self.available_clients: asyncio.Queue = asyncio.Queue()
-        self.lock = asyncio.Lock()  # Verrou pour la création de nouveaux clients
+        targets = [(url, url) for url in backend_urls] if backend_urls else [("local", server)]
+        self.backends: List[Backend] = [
+            Backend(name, transport,
+                    failure_threshold=config.server.backend_failure_threshold,
+                    eject_time=config.server.backend_eject_time,
+                    max_eject_time=config.server.backend_max_eject_time)
+            for name, transport in targets
+        ]
+        self.backends_by_name: Dict[str, Backend] = {backend.name: backend for backend in self.backends}
+        routing = routing or config.server.backend_routing
+        self.ring: Optional[HashRing] = None
+        if routing == ROUTING_CONSISTENT_HASH:
+            self.ring = HashRing(list(self.backends_by_name), vnodes=config.server.hash_vnodes)
+        self.load_factor = config.server.hash_load_factor
+        # Backend de chaque client prêté, pour le lui rendre
+        self.leases: Dict[int, Backend] = {}
+        # Ordonnanceur équitable: max_size emplacements, attribués par priorité et par locataire
+        self.scheduler = create_scheduler(max_size)
         
-        # Initialiser le pool avec quelques clients
-        for _ in range(min(3, max_size)):
-            client = Client(server)
-            self.clients.append(client)
-            self.available_clients.put_nowait(client)
+        # Mettre à jour la métrique
+        set_fastmcp_client_pool_size(0)
+    
+    @property
+    def clients(self) -> List[Client]:
+        """Clients ouverts, tous backends confondus."""
+        return [client for backend in self.backends for client in backend.clients]
+    
+    def idle_count(self) -> int:
+        """Nombre de clients connectés et inutilisés."""
+        return sum(len(backend.idle) for backend in self.backends)
+    
+    def eligible_backends(self, now: Optional[float] = None) -> List[Backend]:
+        """Backends non écartés."""
+        now = now if now is not None else time.monotonic()
+        return [backend for backend in self.backends if not backend.is_ejected(now)]
+    
+    def probe_backend(self) -> Backend:
+        """Backend sondé par le health check: le moins chargé des éligibles, sans compter d'appel routé."""
+        candidates = self.eligible_backends()
+        if not candidates:
+            return min(self.backends, key=lambda backend: backend.ejected_until)
+        return min(candidates, key=lambda backend: backend.outstanding)
+    
+    def select_backend(self, routing_key: Optional[str] = None) -> Backend:
+        """Choisit le backend d'un appel.
+        
+        Avec une clé de routage et l'anneau actif: le premier backend éligible et
+        sous la charge bornée dans le sens horaire. Sinon: le backend éligible
+        ayant le moins d'appels en cours (départage aléatoire).
+        """
+        now = time.monotonic()
+        candidates = self.eligible_backends(now)
+        if not candidates:
+            # Tous écartés: tenter celui dont la mise à l'écart expire le plus tôt
+            return min(self.backends, key=lambda backend: backend.ejected_until)
+        
+        if routing_key is not None and self.ring is not None:
+            capacity = bounded_load_capacity(sum(backend.outstanding for backend in candidates),
+                                             len(candidates), self.load_factor)
+            for rank, name in enumerate(self.ring.walk(routing_key)):
+                backend = self.backends_by_name[name]
+                if not backend.is_ejected(now) and backend.outstanding < capacity:
+                    BACKEND_ROUTED.labels(mode="hash" if rank == 0 else "hash_overflow").inc()
+                    return backend
+        
+        BACKEND_ROUTED.labels(mode="least_outstanding").inc()
+        fewest = min(backend.outstanding for backend in candidates)
+        return random.choice([backend for backend in candidates if backend.outstanding == fewest])
+    
+    async def get_client(self, routing_key: Optional[str] = None) -> Client:
+        """Obtient un client du pool selon le contexte d'ordonnancement de la requête.
         
+        `routing_key` rattache l'appel à un backend en routage par hachage cohérent.
+        """
+        priority, tenant = request_priority.get(), request_tenant.get()
+        with start_span("client_pool.acquire", {"pool.available": self.idle_count(), "pool.priority": priority}):
+            await self.scheduler.acquire(priority, tenant)
+            try:
+                return await self._acquire(routing_key)
+            except BaseException:
+                self.scheduler.release()
+                raise
+    
+    async def _acquire(self, routing_key: Optional[str] = None) -> Client:
+        """Prend un client sur le backend choisi (un emplacement est déjà réservé)."""
+        backend = self.select_backend(routing_key)
+        client = await backend.acquire()
+        self.leases[id(client)] = backend
         # Mettre à jour la métrique
         set_fastmcp_client_pool_size(len(self.clients))
+        return client
     
-    async def get_client(self) -> Client:
-        """Obtient un client du pool, ou en crée un nouveau si nécessaire."""
+    async def release_client(self, client: Client, error: Optional[BaseException] = None):
+        """Rend un client à son backend et passe l'emplacement à la demande suivante.
+        
+        `error` est l'exception levée pendant l'appel: un échec de transport
+        ferme le client et compte pour la mise à l'écart du backend.
+        """
         try:
-            # Essayer d'obtenir un client disponible
-            return await asyncio.wait_for(self.available_clients.get(), timeout=1.0)
-        except asyncio.TimeoutError:
-            # Si timeout, vérifier si on peut créer un nouveau client
-            async with self.lock:
-                if len(self.clients) < self.max_size:
-                    logger.info(f"Création d'un nouveau client FastMCP (total: {len(self.clients) + 1})")
-                    client = Client(self.server)
-                    self.clients.append(client)
-                    # Mettre à jour la métrique
-                    set_fastmcp_client_pool_size(len(self.clients))
-                    return client
-                else:
-                    logger.warning(f"Taille maximale du pool de clients atteinte ({self.max_size})")
-                    # Si on ne peut pas créer de nouveau client, attendre qu'un client se libère
-                    return await self.available_clients.get()
-    
-    def release_client(self, client: Client):
-        """Libère un client et le remet dans le pool."""
-        self.available_clients.put_nowait(client)
+            backend = self.leases.pop(id(client))
+            await backend.release(client, error)
+            set_fastmcp_client_pool_size(len(self.clients))
+        finally:
+            self.scheduler.release()
+    
+    async def close(self):
+        """Ferme les connexions inactives de tous les backends."""
+        for backend in self.backends:
+            await backend.close()
+        set_fastmcp_client_pool_size(len(self.clients))
+    
+    def get_backend_stats(self) -> List[Dict[str, Any]]:
+        """Renvoie l'état de chaque backend."""
+        now = time.monotonic()
+        return [backend.get_stats(now) for backend in self.backends]
 
 # Création du pool de clients
-client_pool = ClientPool(mcp, max_size=config.server.max_connections)
+client_pool = ClientPool(mcp, max_size=config.server.max_connections, backend_urls=config.server.backends)
 
-@resilient(circuit_name="fastmcp_execute_tool")
+class ServerHealth:
+    """Suivi passif de l'état du serveur FastMCP.
+    
+    Les appels réels enregistrent leurs succès et échecs; les health checks
+    s'appuient sur ce signal, l'état du pool et celui du circuit breaker.
+    Une sonde active (listage des outils sur un client dédié, hors pool) n'est lancée que
+    si aucun appel n'a réussi récemment, au plus une fois par intervalle, et
+    échoue au-delà de `probe_timeout` secondes.
+    """
+    
+    def __init__(self, circuit_name: str, cache_ttl: float = 5, passive_window: float = 30,
+                 probe_interval: float = 15, probe_timeout: float = 5):
+        self.circuit_name = circuit_name
+        self.cache_ttl = cache_ttl
+        self.passive_window = passive_window
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.last_success_time = 0.0
+        self.last_failure_time = 0.0
+        self.last_error: Optional[str] = None
+        self.last_probe_time = 0.0
+        self.last_probe_ok = False
+        self.last_probe_error: Optional[str] = None
+        self.cached_result: Optional[Dict[str, Any]] = None
+        self.cached_at = 0.0
+        self.lock = asyncio.Lock()
+    
+    def record_success(self):
+        """Enregistre un appel d'outil réussi."""
+        self.last_success_time = time.time()
+    
+    def record_failure(self, error: Exception):
+        """Enregistre un appel d'outil en échec."""
+        self.last_failure_time = time.time()
+        self.last_error = str(error)
+    
+    def get_circuit_state(self) -> str:
+        """Renvoie l'état du circuit breaker sans en créer un nouveau."""
+        cb = circuit_breakers.get(self.circuit_name)
+        return cb.state.value if cb else CircuitState.CLOSED.value
+    
+    async def probe(self) -> bool:
+        """Sonde active: listage des outils via un client dédié, sans exécuter d'outil.
+        
+        Appelée sous `self.lock`: le délai `probe_timeout` borne l'attente des
+        health checks concurrents quand le backend ne répond plus.
+        """
+        self.last_probe_time = time.time()
+        
+        async def list_tools():
+            async with Client(client_pool.probe_backend().transport) as probe_client:
+                await probe_client.list_tools()
+        
+        try:
+            try:
+                await asyncio.wait_for(list_tools(), timeout=self.probe_timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"La sonde n'a pas répondu en {self.probe_timeout}s") from None
+            self.last_probe_ok = True
+            self.last_probe_error = None
+        except Exception as e:
+            logger.error(f"Erreur lors de la sonde de santé: {str(e)}")
+            self.last_probe_ok = False
+            self.last_probe_error = str(e)
+        return self.last_probe_ok
+    
+    def is_alive(self) -> Dict[str, Any]:
+        """Liveness: le processus répond, sans aucune dépendance externe."""
+        return {"status": "alive", "server_name": config.server.name}
+    
+    async def check_readiness(self) -> Dict[str, Any]:
+        """Readiness: état dérivé du trafic réel, mis en cache pendant `cache_ttl` secondes."""
+        now = time.time()
+        if self.cached_result is not None and now - self.cached_at < self.cache_ttl:
+            return self.cached_result
+        
+        async with self.lock:
+            now = time.time()
+            if self.cached_result is not None and now - self.cached_at < self.cache_ttl:
+                return self.cached_result
+            
+            circuit_state = self.get_circuit_state()
+            backends = client_pool.get_backend_stats()
+            seconds_since_success = now - self.last_success_time if self.last_success_time > 0 else None
+            error = None
+            if circuit_state == CircuitState.OPEN.value:
+                source = "circuit_breaker"
+                healthy = False
+                error = self.last_error
+            elif all(backend["ejected"] for backend in backends):
+                source = "backends"
+                healthy = False
+                error = backends[0]["last_error"]
+            elif seconds_since_success is not None and seconds_since_success < self.passive_window:
+                source = "passive"
+                healthy = True
+            else:
+                source = "probe"
+                if now - self.last_probe_time >= self.probe_interval:
+                    await self.probe()
+                healthy = self.last_probe_ok
+                error = self.last_probe_error
+            
+            result = {
+                "status": "healthy" if healthy else "unhealthy",
+                "source": source,
+                "server_name": config.server.name,
+                "circuit_state": circuit_state,
+                "clients_pool_size": len(client_pool.clients),
+                "available_clients": client_pool.idle_count(),
+                "max_clients": client_pool.max_size,
+                "queued_requests": client_pool.scheduler.get_stats()["queued"],
+                "seconds_since_last_success": seconds_since_success,
+                "backends": backends
+            }
+            if error:
+                result["error"] = error
+            self.cached_result = result
+            self.cached_at = now
+            return result
+
+# Suivi de l'état de santé du serveur
+server_health = ServerHealth(
+    circuit_name="fastmcp_execute_tool",
+    cache_ttl=config.server.health_cache_ttl,
+    passive_window=config.server.health_passive_window,
+    probe_interval=config.server.health_probe_interval,
+    probe_timeout=config.server.health_probe_timeout
+)
+
+@resilient(circuit_name="fastmcp_execute_tool", retry_if=is_retryable)
 @track_tool_execution
 async def execute_tool(tool_name: str, params: dict):
     """
@@ -105,118 +489,304 @@ async def execute_tool(tool_name: str, params: dict):
     Returns:
         Le résultat de l'exécution de l'outil
     """
-    # Vérifier si le résultat est dans le cache
-    if config.cache.enabled:
+    return await _execute_tool(tool_name, params)
+
+@resilient(circuit_name="fastmcp_execute_tool", max_retries=0, timeout=config.jobs.timeout)
+@track_tool_execution
+async def execute_tool_long(tool_name: str, params: dict):
+    """
+    Exécute un outil de longue durée (jobs asynchrones).
+    
+    Même chemin que execute_tool, mais avec le délai des jobs et sans
+    nouvelle tentative: relancer un long traitement doit rester explicite.
+    L'appel au backend dispose lui aussi du délai des jobs, hors micro-batching.
+    """
+    return await _execute_tool(tool_name, params, call_timeout=config.jobs.timeout)
+
+async def _execute_tool(tool_name: str, params: dict, serialized: bool = False,
+                        call_timeout: Optional[float] = None):
+    """Exécution effective d'un outil: lecture du cache, appel via le pool, mise en cache.
+    
+    Le résultat est sérialisé une seule fois: contrôle de taille, mise en
+    cache et, avec `serialized`, réponse HTTP partagent les mêmes octets
+    (SerializedResult renvoyé à la place de la valeur). Une erreur déterministe
+    de l'outil devient une ToolExecutionError, ni réessayée ni comptée par le
+    circuit breaker, et peut être mise en cache (cache négatif). Avec
+    FASTMCP_MICROBATCH_ENABLED, les appels concurrents d'un outil disposant
+    d'une implémentation par lot sont regroupés en une seule invocation.
+    `call_timeout` remplace FASTMCP_CALL_TIMEOUT pour l'appel au backend
+    (l'appel n'est alors pas regroupé).
+    """
+    # Vérifier si le résultat est dans le cache (le chemin sérialisé l'a déjà consulté)
+    if config.cache.enabled and not serialized:
         cached_result = await tool_cache_manager.get_cached_result(tool_name, params)
         if cached_result is not None:
-            logger.info(f"Résultat trouvé dans le cache pour l'outil {tool_name}")
+            logger.debug("Résultat trouvé dans le cache pour l'outil %s", tool_name)
             return cached_result
     
-    # Exécuter l'outil si pas dans le cache
-    client = await client_pool.get_client()
+    # Exécuter l'outil si pas dans le cache: regroupé avec les appels concurrents si possible
+    batcher = get_micro_batcher(tool_name) if call_timeout is None else None
+    bound = tool_cache_manager.bind_params(tool_name, params) if batcher is not None else None
+    try:
+        if bound is not None:
+            try:
+                result = await batcher.submit(bound)
+            except BatchRejectedError:
+                # Lot refusé en bloc: chaque appel est rejoué seul, l'erreur ne touche que l'appel fautif
+                result = await _call_tool_backend(tool_name, params)
+        else:
+            result = await _call_tool_backend(tool_name, params, call_timeout)
+    except ToolExecutionError as e:
+        if config.cache.enabled:
+            await tool_cache_manager.cache_tool_error(tool_name, params, e)
+        raise
+    
+    cacheable = config.cache.enabled and tool_cache_manager.is_tool_cacheable(tool_name)
+    limit = get_result_limit(tool_name)
+    if not (serialized or cacheable or limit):
+        return result
+    encoded = encode_tool_result(tool_name, result, limit)
+    
+    # Mettre en cache le résultat si applicable
+    if cacheable:
+        await tool_cache_manager.cache_serialized_result(tool_name, params, encoded, result)
+    return encoded if serialized else result
+
+async def _call_tool_backend(tool_name: str, params: dict, timeout: Optional[float] = None) -> Any:
+    """Appel d'un outil via le pool de clients (les appels cachables sont routés par leur clé).
+    
+    Une erreur déterministe de l'outil est relevée en ToolExecutionError, une
+    autre exception de l'outil en ToolFailureError (réessayable). Un appel
+    sans réponse dans le délai (`timeout`, FASTMCP_CALL_TIMEOUT par défaut)
+    lève TimeoutError et compte comme un échec de transport du backend: le
+    client est fermé et le backend écarté après des délais répétés.
+    """
+    timeout = timeout if timeout is not None else config.server.call_timeout
+    routing_key = None
+    if client_pool.ring is not None and tool_cache_manager.is_tool_cacheable(tool_name):
+        routing_key = tool_cache_manager.get_cache_key(tool_name, params)
+    client = await client_pool.get_client(routing_key)
+    error = None
+    tool_error = None
     try:
         async with client:
-            logger.debug(f"Exécution de l'outil {tool_name} avec params {params}")
-            result = await client.call_tool(tool_name, params)
-            logger.debug(f"Résultat de l'outil {tool_name}: {result}")
-            
-            # Mettre en cache le résultat si applicable
-            if config.cache.enabled:
-                await tool_cache_manager.cache_tool_result(tool_name, params, result)
-                
-            return result
-    except Exception as e:
-        logger.error(f"Erreur lors de l'exécution de l'outil {tool_name}: {str(e)}")
+            logger.debug("Exécution de l'outil %s avec params %s", tool_name, Truncated(params))
+            with start_span("mcp.call_tool", {"tool.name": tool_name}):
+                try:
+                    result = await asyncio.wait_for(client.call_tool(tool_name, params), timeout=timeout or None)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"L'outil {tool_name} n'a pas répondu en {timeout}s") from None
+            server_health.record_success()
+            logger.debug("Résultat de l'outil %s: %s", tool_name, Truncated(result))
+    except ToolError as e:
+        # Erreur de l'outil lui-même: le serveur a répondu
+        error = tool_error = e
+        server_health.record_success()
+        logger.warning(f"L'outil {tool_name} a renvoyé une erreur: {str(e)}")
+    except BaseException as e:
+        error = e
+        if isinstance(e, Exception):
+            server_health.record_failure(e)
+            logger.error(f"Erreur lors de l'exécution de l'outil {tool_name}: {str(e)}")
         raise
     finally:
         # Remettre le client dans le pool
-        client_pool.release_client(client)
+        await client_pool.release_client(client, error)
+    
+    if tool_error is not None:
+        if is_deterministic_tool_error(tool_name, tool_error):
+            # Le même appel échouerait de nouveau: ni nouvelle tentative, cache négatif possible
+            raise ToolExecutionError(tool_error_message(tool_name, tool_error)) from tool_error
+        raise ToolFailureError(tool_error_message(tool_name, tool_error)) from tool_error
+    return tool_result_value(result)
+
+def is_deterministic_tool_error(tool_name: str, error: Exception) -> bool:
+    """Indique si l'erreur renvoyée par le serveur est déterministe.
+    
+    ToolError levée par l'outil (deterministic_errors de register_tool), paramètres
+    refusés ou outil inconnu: message transmis tel quel. FastMCP préfixe par
+    "Error calling tool" le message de toute autre exception de l'outil.
+    """
+    return not str(error).startswith(f"Error calling tool {tool_name!r}")
+
+def tool_result_value(result: Any) -> Any:
+    """Valeur renvoyée par l'outil, sans l'enveloppe CallToolResult du client FastMCP.
+    
+    Un appel unitaire et un élément d'un lot produisent ainsi la même valeur,
+    et donc la même réponse et la même entrée de cache.
+    """
+    if getattr(result, "structured_content", None) is not None:
+        return result.data
+    content = getattr(result, "content", None)
+    if content is None:
+        return result
+    # Outil sans sortie structurée: contenu textuel
+    texts = [item.text for item in content if getattr(item, "text", None) is not None]
+    return texts[0] if len(texts) == 1 else texts
+
+def tool_error_message(tool_name: str, error: Exception) -> str:
+    """Message d'une erreur d'outil, sans le préfixe ajouté par FastMCP (identique à l'erreur d'un élément de lot)."""
+    message = str(error)
+    prefix = f"Error calling tool {tool_name!r}: "
+    return message[len(prefix):] if message.startswith(prefix) else message
+
+# Regroupement automatique des appels concurrents: un MicroBatcher par outil disposant d'une version par lot
+micro_batchers: Dict[str, MicroBatcher] = {}
+
+def get_micro_batcher(tool_name: str) -> Optional[MicroBatcher]:
+    """Renvoie le regroupeur d'appels d'un outil (None si désactivé ou sans implémentation par lot)."""
+    if not config.server.microbatch_enabled:
+        return None
+    batcher = micro_batchers.get(tool_name)
+    if batcher is None:
+        batch_tool = get_batch_tool(tool_name)
+        if batch_tool is None:
+            return None
+        settings = config.server.microbatch_tools_config.get(tool_name, {})
+        window_ms = settings.get("window_ms", config.server.microbatch_window_ms)
+        max_size = int(settings.get("max_size", config.server.microbatch_max_size))
+
+        # Un lot est un seul appel pour la résilience: un échec est réessayé et compté une fois, pas par membre
+        @resilient(circuit_name="fastmcp_execute_tool",
+                   retry_if=lambda calls: tool_cache_manager.is_idempotent(tool_name))
+        async def run_batch(calls: List[Dict[str, Any]]) -> List[Tuple[Any, Optional[str]]]:
+            # Appels individuels mis en colonnes: une invocation de l'outil par lot
+            columns = {key: [call[key] for call in calls] for key in calls[0]}
+            try:
+                data = await _call_tool_backend(batch_tool, columns)
+            except ToolExecutionError as e:
+                raise BatchRejectedError(str(e)) from e
+            errors = {item["index"]: item["error"] for item in data["errors"]}
+            return [(value, errors.get(index)) for index, value in enumerate(data["results"])]
+
+        batcher = micro_batchers[tool_name] = MicroBatcher(tool_name, run_batch, window_ms / 1000, max_size)
+    return batcher
+
+def get_result_limit(tool_name: str) -> int:
+    """Taille maximale du résultat sérialisé d'un outil (0 = illimitée)."""
+    return config.api.result_tool_limits.get(tool_name, config.api.result_max_size)
+
+def encode_tool_result(tool_name: str, result: Any, limit: int = 0) -> SerializedResult:
+    """Sérialise le résultat d'un outil en vérifiant sa taille maximale."""
+    try:
+        encoded = serialize_result(result, limit=limit or None, tool_name=tool_name,
+                                   chunk_size=config.api.result_chunk_size)
+    except ResultTooLargeError:
+        TOOL_RESULT_REJECTED.labels(tool_name=tool_name).inc()
+        logger.warning(f"Résultat de l'outil {tool_name} refusé: plus de {limit} octets")
+        raise
+    TOOL_RESULT_SIZE.labels(tool_name=tool_name).observe(encoded.size)
+    return encoded
+
+@resilient(circuit_name="fastmcp_execute_tool", retry_if=is_retryable)
+@track_tool_execution
+async def execute_tool_encoded(tool_name: str, params: dict) -> SerializedResult:
+    """Exécute un outil (sans consulter le cache) et renvoie son résultat sérialisé."""
+    return await _execute_tool(tool_name, params, serialized=True)
+
+async def execute_tool_result(tool_name: str, params: dict) -> SerializedResult:
+    """
+    Exécute un outil et renvoie son résultat sérialisé en JSON, par morceaux.
+    
+    Un résultat présent dans le cache est renvoyé tel que stocké, sans
+    décodage ni ré-encodage; sinon l'outil est exécuté et sérialisé une seule fois.
+    
+    Args:
+        tool_name (str): Nom de l'outil à exécuter
+        params (dict): Paramètres à passer à l'outil
+        
+    Returns:
+        SerializedResult: le résultat encodé en JSON
+    """
+    if config.cache.enabled:
+        start_time = time.time()
+        try:
+            cached = await tool_cache_manager.get_cached_serialized(tool_name, params)
+        except ToolExecutionError:
+            # Erreur déterministe en cache: ni pool, ni circuit breaker
+            logger.debug("Erreur trouvée dans le cache négatif pour l'outil %s", tool_name)
+            record_tool_execution(tool_name, "error", time.time() - start_time)
+            raise
+        if cached is not None:
+            logger.debug("Résultat sérialisé trouvé dans le cache pour l'outil %s", tool_name)
+            record_tool_execution(tool_name, "success", time.time() - start_time)
+            return cached
+    
+    return await execute_tool_encoded(tool_name, params)
+
+async def execute_tool_serialized(tool_name: str, params: dict) -> bytes:
+    """Exécute un outil et renvoie son résultat sérialisé en JSON, assemblé (voir execute_tool_result)."""
+    return (await execute_tool_result(tool_name, params)).to_bytes()
+
+def schema_type(schema: Dict[str, Any]) -> str:
+    """Type lisible d'un paramètre d'après son schéma JSON ("number", "string | array"...)."""
+    if "type" in schema:
+        return schema["type"] if isinstance(schema["type"], str) else " | ".join(schema["type"])
+    variants = schema.get("anyOf") or schema.get("oneOf")
+    if variants:
+        return " | ".join(schema_type(variant) for variant in variants)
+    return "any"
 
 async def get_available_tools():
     """
     Récupère la liste des outils disponibles avec leurs métadonnées.
     
+    Les outils et leurs paramètres viennent du listage MCP (`mcp.list_tools()`,
+    outils `<outil>_batch` compris); mise en cache et idempotence viennent des
+    politiques déclarées par register_tool.
+    
     Returns:
         list: Liste des outils disponibles avec leurs descriptions et paramètres
     """
     tools = []
-    # Parcourir les outils enregistrés dans le serveur MCP
-    for tool_name, tool_func in mcp.tools.items():
-        # Récupérer la signature de la fonction pour les paramètres
-        sig = inspect.signature(tool_func)
-        # Récupérer la docstring pour la description
-        description = tool_func.__doc__ or f"Outil {tool_name}"
-        
-        parameters = []
-        for param_name, param in sig.parameters.items():
-            # Exclure le paramètre 'self' pour les méthodes de classe
-            if param_name == 'self':
-                continue
-                
-            # Déterminer le type de paramètre
-            param_type = "any"
-            if param.annotation != inspect.Parameter.empty:
-                param_type = str(param.annotation).replace("<class '", "").replace("'>", "")
-            
-            # Vérifier si le paramètre est requis ou optionnel
-            required = param.default == inspect.Parameter.empty
-            
-            # Trouver la description du paramètre dans la docstring si possible
-            param_description = f"Paramètre {param_name}"
-            
-            # Ajouter le paramètre à la liste
-            parameters.append({
+    for tool in await mcp.list_tools():
+        schema = tool.parameters or {}
+        required = set(schema.get("required", []))
+        parameters = [
+            {
                 "name": param_name,
-                "type": param_type,
-                "description": param_description,
-                "required": required
-            })
+                "type": schema_type(param_schema),
+                "description": param_schema.get("description") or f"Paramètre {param_name}",
+                "required": param_name in required
+            }
+            for param_name, param_schema in schema.get("properties", {}).items()
+        ]
         
         # Ajouter l'outil à la liste avec cachable state
-        is_cachable = tool_cache_manager.is_tool_cacheable(tool_name)
-        cache_ttl = tool_cache_manager.get_tool_ttl(tool_name) if is_cachable else None
+        is_cachable = tool_cache_manager.is_tool_cacheable(tool.name)
+        cache_ttl = tool_cache_manager.get_tool_ttl(tool.name) if is_cachable else None
+        if tool.name in tool_cache_manager.policies or tool.annotations is None:
+            idempotent = tool_cache_manager.is_idempotent(tool.name)
+        else:
+            idempotent = tool.annotations.idempotentHint is not False
         
         tools.append({
-            "name": tool_name,
-            "description": description.strip(),
+            "name": tool.name,
+            "description": (tool.description or f"Outil {tool.name}").strip(),
             "parameters": parameters,
             "cachable": is_cachable,
-            "cache_ttl": cache_ttl
+            "cache_ttl": cache_ttl,
+            "idempotent": idempotent
         })
     
     return tools
 
 async def health_check() -> Dict[str, Any]:
-    """Vérifie l'état de santé du serveur FastMCP."""
+    """Vérifie l'état de santé du serveur FastMCP sans consommer de client du pool."""
     try:
-        client = await client_pool.get_client()
-        try:
-            async with client:
-                # Test simple d'appel d'outil
-                result = await client.call_tool("greet", {"name": "HealthCheck"})
-                return {
-                    "status": "healthy",
-                    "server_name": config.server.name,
-                    "tools_count": len(mcp.tools),
-                    "clients_pool_size": len(client_pool.clients),
-                    "available_clients": client_pool.available_clients.qsize()
-                }
-        except Exception as e:
-            logger.error(f"Erreur lors du health check: {str(e)}")
-            return {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        finally:
-            client_pool.release_client(client)
+        return await server_health.check_readiness()
     except Exception as e:
-        logger.error(f"Impossible d'obtenir un client pour le health check: {str(e)}")
+        logger.error(f"Erreur lors du health check: {str(e)}")
         return {
             "status": "unhealthy",
-            "error": f"Pas de client disponible: {str(e)}"
+            "error": str(e)
         }
 
+def liveness_check() -> Dict[str, Any]:
+    """Vérifie que le processus est vivant."""
+    return server_health.is_alive()
+
 if __name__ == "__main__":
-    # Démarrer le serveur en mode standalone
+    # Démarrer le serveur en mode standalone, joignable par l'API via FASTMCP_BACKENDS
     logger.info(f"Démarrage du serveur FastMCP {config.server.name} sur {config.server.host}:{config.server.port}")
-    mcp.run()
\ No newline at end of file
+    mcp.run(transport="http", host=config.server.host, port=config.server.port)
\ No newline at end of file
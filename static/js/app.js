@@ -118,6 +118,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 const data = await response.json();
                 accessToken = data.access_token;
                 localStorage.setItem('accessToken', accessToken);
+                closeWebSocket();
                 hideLoginForm();
                 showUserInfo(username);
                 loadAvailableTools();
@@ -135,6 +136,7 @@ document.addEventListener('DOMContentLoaded', function() {
     logoutBtn.addEventListener('click', function() {
         localStorage.removeItem('accessToken');
         accessToken = null;
+        closeWebSocket();
         showLoginForm();
         userInfo.style.display = 'none';
     });
@@ -227,6 +229,106 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Connexion WebSocket multiplexée pour les appels d'outils (authentifiée une seule fois)
+    let socketReady = null;
+    let nextRequestId = 1;
+    const pendingCalls = new Map();
+    
+    function connectWebSocket() {
+        if (socketReady) {
+            return socketReady;
+        }
+        socketReady = new Promise((resolve, reject) => {
+            const socket = new WebSocket(`${apiUrl.replace(/^http/, 'ws')}/ws`);
+            let ready = false;
+            
+            socket.onopen = function() {
+                if (accessToken) {
+                    socket.send(JSON.stringify({ type: 'auth', token: accessToken }));
+                }
+            };
+            
+            socket.onmessage = function(event) {
+                const message = JSON.parse(event.data);
+                if (message.type === 'ready') {
+                    ready = true;
+                    resolve(socket);
+                    return;
+                }
+                // Les réponses arrivent dans l'ordre d'achèvement: associer par id
+                const pending = pendingCalls.get(message.id);
+                if (!pending) {
+                    return;
+                }
+                pendingCalls.delete(message.id);
+                if (message.type === 'result') {
+                    pending.resolve(message.result);
+                } else {
+                    pending.reject(new Error(message.detail || 'Une erreur s\'est produite lors de l\'exécution de l\'outil.'));
+                }
+            };
+            
+            socket.onclose = function() {
+                socketReady = null;
+                pendingCalls.forEach(pending => pending.reject(new Error('Connexion WebSocket fermée')));
+                pendingCalls.clear();
+                if (!ready) {
+                    reject(new Error('Connexion WebSocket impossible'));
+                }
+            };
+        });
+        return socketReady;
+    }
+    
+    function closeWebSocket() {
+        if (socketReady) {
+            socketReady.then(socket => socket.close()).catch(() => {});
+            socketReady = null;
+        }
+    }
+    
+    // Appeler un outil via WebSocket, avec repli sur HTTP si la connexion est impossible
+    async function callTool(toolName, params) {
+        let socket;
+        try {
+            socket = await connectWebSocket();
+        } catch (error) {
+            return callToolHttp(toolName, params);
+        }
+        return new Promise((resolve, reject) => {
+            const id = String(nextRequestId++);
+            pendingCalls.set(id, { resolve, reject });
+            socket.send(JSON.stringify({ type: 'call', id: id, tool_name: toolName, params: params }));
+        });
+    }
+    
+    async function callToolHttp(toolName, params) {
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        
+        if (accessToken) {
+            headers['Authorization'] = `Bearer ${accessToken}`;
+        }
+        
+        const response = await fetch(`${apiUrl}/call_tool/`, {
+            method: 'POST',
+            headers: headers,
+            body: JSON.stringify({
+                tool_name: toolName,
+                params: params
+            })
+        });
+        
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.detail || 'Une erreur s\'est produite lors de l\'exécution de l\'outil.');
+        }
+        
+        const data = await response.json();
+        return data.result;
+    }
+    
     // Gérer la soumission du formulaire
     toolForm.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -255,34 +357,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
             });
             
-            const headers = {
-                'Content-Type': 'application/json'
-            };
-            
-            if (accessToken) {
-                headers['Authorization'] = `Bearer ${accessToken}`;
-            }
-            
-            const response = await fetch(`${apiUrl}/call_tool/`, {
-                method: 'POST',
-                headers: headers,
-                body: JSON.stringify({
-                    tool_name: toolName,
-                    params: params
-                })
-            });
+            const result = await callTool(toolName, params);
             
             // Cacher l'indicateur de chargement
             loading.style.display = 'none';
             
-            if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.detail || 'Une erreur s\'est produite lors de l\'exécution de l\'outil.');
-            }
-            
-            const data = await response.json();
             resultContent.className = 'success-result';
-            resultContent.innerHTML = `<strong>Résultat :</strong> ${formatResult(data.result)}`;
+            resultContent.innerHTML = `<strong>Résultat :</strong> ${formatResult(result)}`;
         } catch (error) {
             // Cacher l'indicateur de chargement en cas d'erreur
             loading.style.display = 'none';
@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Mapping, Optional, Tuple
+
+from fastapi.responses import Response
+
+from logging_config import logger
+from config import config
+
+# brotli est optionnel: sans lui, seules les variantes gzip sont produites
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Encodages proposés, par ordre de préférence
+PREFERRED_ENCODINGS = ("br", "gzip")
+
+# Références aux fichiers statiques dans index.html ("/static/css/styles.css", ...)
+STATIC_REFERENCE = re.compile(r'(["\'])/static/([^"\'?#]+)\1')
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Analyse l'en-tête Accept-Encoding en {encodage: qualité}."""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+class StaticAsset:
+    """Fichier statique chargé en mémoire avec ses variantes précompressées."""
+
+    __slots__ = ("path", "media_type", "digest", "hashed_path", "variants", "etags")
+
+    def __init__(self, path: str, content: bytes, min_compress_size: int = 256):
+        self.path = path
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.digest = hashlib.sha256(content).hexdigest()
+        root, ext = os.path.splitext(path)
+        self.hashed_path = f"{root}.{self.digest[:12]}{ext}"
+
+        # Variantes par encodage, conservées seulement si elles réduisent la taille
+        self.variants: Dict[str, bytes] = {"identity": content}
+        if len(content) >= min_compress_size:
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if BROTLI_AVAILABLE:
+                compressed["br"] = brotli.compress(content, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(content):
+                    self.variants[encoding] = body
+
+        # ETag fort propre à chaque représentation
+        self.etags = {
+            encoding: f'"{self.digest[:32]}"' if encoding == "identity" else f'"{self.digest[:32]}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def select_encoding(self, accept_encoding: str) -> str:
+        """Choisit la meilleure variante acceptée par le client."""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in PREFERRED_ENCODINGS:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if encoding in self.variants and quality > 0:
+                return encoding
+        return "identity"
+
+    def matches(self, if_none_match: str) -> bool:
+        """Indique si l'en-tête If-None-Match désigne une représentation de ce fichier."""
+        if if_none_match.strip() == "*":
+            return True
+        # Comparaison faible (RFC 9110): le préfixe W/ est ignoré
+        tags = {tag[2:] if tag.startswith("W/") else tag for tag in map(str.strip, if_none_match.split(","))}
+        return any(etag in tags for etag in self.etags.values())
+
+    def build_response(self, headers: Mapping[str, str], cache_control: str) -> Response:
+        """Construit la réponse (ou un 304) pour les en-têtes de requête donnés."""
+        encoding = self.select_encoding(headers.get("accept-encoding", ""))
+        response_headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and self.matches(if_none_match):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=response_headers)
+
+class StaticAssetStore:
+    """Fichiers statiques et page d'accueil servis depuis la mémoire.
+
+    Au chargement, chaque fichier est précompressé (gzip, et brotli si
+    disponible) et reçoit une URL contenant le hash de son contenu. Les
+    références de index.html sont réécrites vers ces URL, qui peuvent être
+    mises en cache indéfiniment (`immutable`); les URL d'origine et la page
+    d'accueil restent revalidées via leur ETag.
+    """
+
+    def __init__(self, directory: str = "static", index_file: str = "index.html",
+                 max_age: int = 31536000, min_compress_size: int = 256):
+        self.directory = directory
+        self.index_file = index_file
+        self.max_age = max_age
+        self.min_compress_size = min_compress_size
+        self.assets: Dict[str, StaticAsset] = {}
+        self.hashed_assets: Dict[str, StaticAsset] = {}
+        self.index: Optional[StaticAsset] = None
+        self.loaded = False
+
+    @property
+    def immutable_cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, immutable"
+
+    def load(self):
+        """Charge et précompresse les fichiers statiques et la page d'accueil."""
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    assets[path] = StaticAsset(path, f.read(), self.min_compress_size)
+
+        self.assets = assets
+        self.hashed_assets = {asset.hashed_path: asset for asset in assets.values()}
+        self.loaded = True
+
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                html = STATIC_REFERENCE.sub(lambda m: f"{m.group(1)}{self.url_for(m.group(2))}{m.group(1)}", f.read())
+            self.index = StaticAsset(self.index_file, html.encode("utf-8"), self.min_compress_size)
+
+        original_size = sum(len(asset.variants["identity"]) for asset in assets.values())
+        logger.info(f"{len(assets)} fichiers statiques chargés en mémoire ({original_size} octets, brotli: {BROTLI_AVAILABLE})")
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def url_for(self, path: str) -> str:
+        """Renvoie l'URL à hash de contenu d'un fichier statique (ou l'URL d'origine s'il est inconnu)."""
+        self.ensure_loaded()
+        asset = self.assets.get(path)
+        return f"/static/{asset.hashed_path if asset else path}"
+
+    def get(self, path: str) -> Tuple[Optional[StaticAsset], str]:
+        """Renvoie le fichier correspondant à un chemin et la politique de cache associée."""
+        self.ensure_loaded()
+        asset = self.hashed_assets.get(path)
+        if asset is not None:
+            return asset, self.immutable_cache_control
+        return self.assets.get(path), "no-cache"
+
+    def get_index(self) -> Optional[StaticAsset]:
+        self.ensure_loaded()
+        return self.index
+
+# Fichiers statiques de l'interface web
+static_assets = StaticAssetStore(
+    max_age=config.api.static_max_age,
+    min_compress_size=config.api.static_compress_min_size
+)
@@ -37,3 +37,24 @@ def test_list_tools_endpoint():
     assert "tools" in response.json()
     assert len(response.json()["tools"]) > 0
     assert response.json()["tools"][0]["name"] == "greet"
+
+def test_list_tools_includes_batch_tools_and_idempotency():
+    """Test pour vérifier que le listage couvre les outils <outil>_batch et indique leur idempotence."""
+    tools = {tool["name"]: tool for tool in client.get("/list_tools/").json()["tools"]}
+    assert "calculate_batch" in tools
+    assert tools["calculate"]["idempotent"] is True
+    assert tools["calculate"]["cachable"] is True
+    assert [param["name"] for param in tools["calculate_batch"]["parameters"]] == ["operation", "a", "b"]
+    assert tools["calculate_batch"]["parameters"][1]["type"] == "number | array"
+
+def test_call_tool_batch_endpoint():
+    """Test pour vérifier l'appel par lot d'un outil et le refus d'un outil sans implémentation par lot."""
+    response = client.post(
+        "/call_tool_batch/",
+        json={"tool_name": "calculate", "params": {"operation": "add", "a": [1, 2, 3], "b": [10, 20, 30]}}
+    )
+    assert response.status_code == 200
+    assert "result" in response.json()
+
+    response = client.post("/call_tool_batch/", json={"tool_name": "greet", "params": {"name": ["a", "b"]}})
+    assert response.status_code == 404
@@ -0,0 +1,97 @@
+import time
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+import cache
+from config import config
+from auth import (
+    TokenCache, UserInDB, token_cache, users_db, create_access_token, get_current_user,
+    disable_user, get_password_hash_async, verify_password_async,
+    create_api_key, authenticate_api_key, revoke_api_key, list_api_keys, has_scope
+)
+
+def test_token_cache_lru_and_expiry():
+    """Test pour vérifier l'éviction LRU et l'expiration du cache de tokens."""
+    cache = TokenCache(max_size=2, ttl=60)
+    user = UserInDB(username="alice", hashed_password="x")
+    cache.set("t1", user)
+    cache.set("t2", user)
+    assert cache.get("t1") is user
+    cache.set("t3", user)
+    # t2 est le moins récemment utilisé
+    assert cache.get("t2") is None
+    assert cache.get("t1") is user
+    cache.set("t4", user, token_expiry=time.time() - 1)
+    assert cache.get("t4") is None
+    assert cache.invalidate_user("alice") == 1
+    assert cache.get_stats()["size"] == 0
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cache_and_disable_invalidates():
+    """Test pour vérifier qu'un token vérifié est mis en cache puis invalidé à la désactivation."""
+    users_db["cache_test"] = {"username": "cache_test", "hashed_password": "x", "disabled": False}
+    try:
+        token = create_access_token({"sub": "cache_test"}, expires_delta=timedelta(minutes=5))
+        user = await get_current_user(token)
+        assert await get_current_user(token) is user
+        assert disable_user(users_db, "cache_test")
+        assert token_cache.get(token) is None
+        assert (await get_current_user(token)).disabled
+    finally:
+        token_cache.invalidate_user("cache_test")
+        users_db.pop("cache_test", None)
+
+@pytest.mark.asyncio
+async def test_password_hashing_off_loop():
+    """Test pour vérifier le hachage et la vérification dans le pool de threads."""
+    hashed = await get_password_hash_async("secret-password")
+    assert await verify_password_async("secret-password", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+@pytest.mark.asyncio
+async def test_api_key_authentication_and_scopes():
+    """Test pour vérifier la création, la vérification et la révocation d'une clé d'API."""
+    api_key, record = await create_api_key("batch-client", ["tools:calculate"])
+    try:
+        user = await authenticate_api_key(api_key)
+        assert user.username == "apikey:batch-client"
+        assert has_scope(user, "tools:calculate")
+        assert not has_scope(user, "tools:greet")
+        assert not has_scope(user, "admin")
+        # Même identifiant, secret différent
+        assert await authenticate_api_key(api_key[:-4] + "abcd") is None
+        assert await authenticate_api_key("not-a-key") is None
+    finally:
+        assert await revoke_api_key(record["key_id"])
+    assert await authenticate_api_key(api_key) is None
+
+class FailingRedis:
+    """Client Redis dont toutes les opérations échouent."""
+    async def get(self, key):
+        raise ConnectionError("Redis injoignable")
+
+    set = delete = get
+
+    async def scan_iter(self, match=None):
+        raise ConnectionError("Redis injoignable")
+        yield
+
+@pytest.mark.asyncio
+async def test_api_key_store_errors_return_503(monkeypatch):
+    """Test pour vérifier qu'une erreur Redis du stockage des clés d'API donne un 503, et non une erreur interne."""
+    monkeypatch.setattr(cache, "USE_REDIS", True)
+    monkeypatch.setattr(cache, "get_redis_client", lambda: FailingRedis())
+    for call in (lambda: authenticate_api_key("fmcp_abc_secret"), lambda: create_api_key("c", ["tools"]),
+                 lambda: revoke_api_key("abc"), list_api_keys):
+        with pytest.raises(HTTPException) as excinfo:
+            await call()
+        assert excinfo.value.status_code == 503
+
+@pytest.mark.asyncio
+async def test_memory_api_key_store_refused_with_several_workers(monkeypatch):
+    """Test pour vérifier que les clés d'API en mémoire sont refusées avec plusieurs workers."""
+    monkeypatch.setattr(cache, "USE_REDIS", False)
+    monkeypatch.setattr(config.api, "workers", 4)
+    with pytest.raises(HTTPException) as excinfo:
+        await create_api_key("c", ["tools"])
+    assert excinfo.value.status_code == 503
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from fastmcp.exceptions import ToolError
+from backends import Backend, HashRing, is_backend_failure
+from server import ClientPool, mcp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """Démarre server.py en mode HTTP sur le port donné et attend qu'il écoute."""
+    env = dict(os.environ, FASTMCP_HOST="127.0.0.1", FASTMCP_PORT=str(port))
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Le serveur FastMCP n'a pas démarré sur le port {port}")
+
+@pytest.fixture(scope="module")
+def backend_servers():
+    """Fixture pour démarrer deux serveurs FastMCP locaux."""
+    ports = [free_port(), free_port()]
+    processes = [spawn_server(port) for port in ports]
+    yield [f"http://127.0.0.1:{port}/mcp" for port in ports], processes
+    for process in processes:
+        process.kill()
+        process.wait()
+
+def test_least_outstanding_selection():
+    """Test pour vérifier que le backend le moins chargé est choisi et qu'un backend écarté est ignoré."""
+    pool = ClientPool(mcp, max_size=4, backend_urls=["http://a/mcp", "http://b/mcp"])
+    first, second = pool.backends
+    first.outstanding = 2
+    assert pool.select_backend() is second
+    second.outstanding = 3
+    assert pool.select_backend() is first
+    first.eject()
+    assert pool.select_backend() is second
+
+def test_ejection_and_reinstatement():
+    """Test pour vérifier la mise à l'écart après des échecs de transport et la réintégration après un succès."""
+    backend = Backend("b", "http://b/mcp", failure_threshold=2, eject_time=10)
+    assert not is_backend_failure(ToolError("erreur d'outil"))
+    backend.record_result(ToolError("erreur d'outil"))
+    backend.record_result(ConnectionError("refusé"))
+    assert not backend.is_ejected()
+    backend.record_result(ConnectionError("refusé"))
+    assert backend.is_ejected()
+
+    # Fin de la mise à l'écart: un nouvel échec écarte de nouveau, plus longtemps
+    backend.ejected_until = 0
+    backend.record_result(ConnectionError("refusé"))
+    assert backend.ejected_until - time.monotonic() > 15
+
+    backend.ejected_until = 0
+    backend.record_result(None)
+    assert not backend.is_ejected()
+    assert backend.consecutive_failures == 0 and backend.ejections == 0
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_remote_backends_balance_and_failover(backend_servers):
+    """Test pour vérifier la répartition sur des serveurs distants et la bascule quand l'un d'eux s'arrête."""
+    urls, processes = backend_servers
+    pool = ClientPool(mcp, max_size=8, backend_urls=urls)
+    for backend in pool.backends:
+        backend.failure_threshold = 1
+
+    async def call(name):
+        client = await pool.get_client()
+        error = None
+        try:
+            async with client:
+                return (await client.call_tool("greet", {"name": name})).data
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            await pool.release_client(client, error)
+
+    results = await asyncio.gather(*(call(f"u{i}") for i in range(8)))
+    assert results == [f"Bonjour, u{i}!" for i in range(8)]
+    # Connexions persistantes réparties sur les deux serveurs
+    assert all(backend.idle for backend in pool.backends)
+
+    processes[0].kill()
+    processes[0].wait()
+    for i in range(4):
+        try:
+            await call(f"v{i}")
+        except Exception:
+            pass
+    assert pool.backends[0].is_ejected()
+    assert [await call(f"w{i}") for i in range(4)] == [f"Bonjour, w{i}!" for i in range(4)]
+    await pool.close()
+
+def test_hash_ring_moves_about_one_nth_of_keys():
+    """Test pour vérifier qu'un retrait de nœud ne déplace que les clés de ce nœud (environ 1/N)."""
+    nodes = [f"http://replica-{i}:50051/mcp" for i in range(4)]
+    keys = [f"tool:calculate:{i}" for i in range(4000)]
+    ring = HashRing(nodes)
+    before = {key: ring.get(key) for key in keys}
+    assert before == {key: HashRing(nodes).get(key) for key in keys}
+
+    ring.remove(nodes[0])
+    moved = [key for key in keys if ring.get(key) != before[key]]
+    assert all(before[key] == nodes[0] for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+def test_consistent_hash_routing_is_sticky_and_bounded():
+    """Test pour vérifier qu'une clé suit son backend tant que sa charge reste sous la borne."""
+    pool = ClientPool(mcp, max_size=8, backend_urls=["http://a/mcp", "http://b/mcp", "http://c/mcp"],
+                      routing="consistent_hash")
+    owner = pool.select_backend("tool:greet:abc")
+    assert all(pool.select_backend("tool:greet:abc") is owner for _ in range(5))
+
+    # Backend propriétaire surchargé: l'appel passe au suivant sur l'anneau
+    owner.outstanding = 10
+    assert pool.select_backend("tool:greet:abc") is not owner
+    owner.outstanding = 0
+    owner.eject()
+    assert pool.select_backend("tool:greet:abc") is not owner
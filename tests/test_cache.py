@@ -0,0 +1,43 @@
+import pytest
+from typing import List, Optional
+from cache import ToolCacheManager, ToolPolicy
+from resilience import retry
+
+def search(query: str, limit: int = 10, scores: Optional[List[float]] = None, request_id: str = "") -> list:
+    """Outil de test: le résultat ne dépend pas de request_id."""
+    return []
+
+def test_equivalent_calls_share_cache_key():
+    """Test pour vérifier que les appels équivalents (types numériques, défauts omis, paramètres hors clé) partagent la clé."""
+    manager = ToolCacheManager()
+    manager.declare_tool("search", search, ttl=60, key_params=["query", "limit", "scores"])
+    key = manager.get_cache_key("search", {"query": "mcp"})
+    assert manager.get_cache_key("search", {"query": "mcp", "limit": 10.0}) == key
+    assert manager.get_cache_key("search", {"limit": 10, "query": "mcp", "request_id": "r-1"}) == key
+    assert manager.get_cache_key("search", {"query": "mcp", "limit": 20}) != key
+    assert (manager.get_cache_key("search", {"query": "mcp", "scores": [1, 2]})
+            == manager.get_cache_key("search", {"query": "mcp", "scores": [1.0, 2.0]}))
+    # Appel invalide: clé des paramètres bruts, sans erreur
+    assert manager.get_cache_key("search", {"unknown": 1})
+    assert manager.get_tool_ttl("search") == 60
+
+@pytest.mark.asyncio
+async def test_non_idempotent_tool_is_neither_cached_nor_retried():
+    """Test pour vérifier qu'un outil non idempotent n'est ni cachable ni réessayé."""
+    manager = ToolCacheManager()
+    with pytest.raises(ValueError):
+        ToolPolicy(cacheable=True, idempotent=False)
+    manager.declare_tool("search", search, cacheable=False, idempotent=False)
+    assert not manager.is_tool_cacheable("search")
+    assert not manager.is_idempotent("search")
+
+    attempts = []
+
+    @retry(max_retries=3, delay=0, retry_if=lambda tool_name: manager.is_idempotent(tool_name))
+    async def call(tool_name):
+        attempts.append(tool_name)
+        raise ConnectionError("connexion perdue")
+
+    with pytest.raises(ConnectionError):
+        await call("search")
+    assert attempts == ["search"]
@@ -0,0 +1,52 @@
+import json
+import pytest
+from cache import ToolCacheManager, cache_lookup_outcome
+from capture import TrafficCapture
+from config import CaptureConfig
+
+def greet(name: str, greeting: str = "Bonjour") -> str:
+    """Outil de test."""
+    return f"{greeting} {name}"
+
+@pytest.mark.parametrize("params_mode", ["full", "hash"])
+def test_captured_call_is_written_as_json_line(tmp_path, params_mode):
+    """Test pour vérifier que les appels capturés sont écrits en lignes JSON, avec les paramètres ou leur empreinte."""
+    path = tmp_path / "traffic.jsonl"
+    capture = TrafficCapture(CaptureConfig(enabled=True, file=str(path), params=params_mode, sample_rate=1.0))
+    capture.start()
+    capture.record(1700000000.0, "greet", {"name": "Alice"}, 0.0123, 200, "hit", "interactive")
+    capture.record(1700000000.5, "greet", {"name": "Bob"}, 0.002, 400)
+    capture.stop()
+
+    entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [e["latency_ms"] for e in entries] == [12.3, 2.0]
+    assert [e["cache"] for e in entries] == ["hit", "bypass"]
+    assert entries[1]["status"] == 400
+    if params_mode == "full":
+        assert entries[0]["params"] == {"name": "Alice"}
+    else:
+        assert "params" not in entries[0]
+        assert entries[0]["params_hash"] != entries[1]["params_hash"]
+
+def test_key_sampling_keeps_all_repeats_of_a_call():
+    """Test pour vérifier que l'échantillonnage par clé retient toutes les répétitions d'un appel équivalent, ou aucune."""
+    capture = TrafficCapture(CaptureConfig(sample_rate=0.5, sampling="key"))
+    decisions = [capture.is_sampled("greet", {"name": f"user-{i}"}) for i in range(200)]
+    assert 0 < sum(decisions) < 200
+    assert decisions == [capture.is_sampled("greet", {"name": f"user-{i}"}) for i in range(200)]
+
+@pytest.mark.asyncio
+async def test_cache_lookup_outcome_is_reported():
+    """Test pour vérifier que l'issue de la consultation du cache est transmise à l'appelant."""
+    manager = ToolCacheManager()
+    manager.declare_tool("greet_capture", greet, ttl=60)
+    outcome = {}
+    token = cache_lookup_outcome.set(outcome)
+    try:
+        assert await manager.get_cached_result("greet_capture", {"name": "Alice"}) is None
+        assert outcome["cache"] == "miss"
+        await manager.cache_tool_result("greet_capture", {"name": "Alice"}, "Bonjour Alice")
+        await manager.get_cached_result("greet_capture", {"name": "Alice", "greeting": "Bonjour"})
+        assert outcome["cache"] == "hit"
+    finally:
+        cache_lookup_outcome.reset(token)
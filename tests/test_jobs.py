@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from jobs import JobManager, JobQueueFullError, JobStatus
+
+async def fake_execute(tool_name, params):
+    if tool_name == "fail":
+        raise ValueError("Échec de l'outil")
+    await asyncio.sleep(params.get("delay", 0))
+    return {"value": params.get("value")}
+
+async def wait_for_status(manager, job_id, statuses=("succeeded", "failed", "cancelled")):
+    for _ in range(200):
+        record = await manager.get(job_id)
+        if record["status"] in statuses:
+            return record
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} toujours {record['status']}")
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background_and_stores_result():
+    """Test pour vérifier l'exécution en arrière-plan et le stockage du résultat ou de l'erreur."""
+    manager = JobManager(fake_execute, workers=2, queue_size=10)
+    try:
+        job = await manager.submit("echo", {"value": 42})
+        assert job["status"] == JobStatus.QUEUED
+        failed = await manager.submit("fail", {})
+
+        record = await wait_for_status(manager, job["id"])
+        assert record["status"] == JobStatus.SUCCEEDED
+        assert record["result"] == {"value": 42}
+        assert (await wait_for_status(manager, failed["id"]))["error"] == "Échec de l'outil"
+    finally:
+        await manager.stop()
+
+@pytest.mark.asyncio
+async def test_job_cancel_and_queue_bound():
+    """Test pour vérifier l'annulation d'un job en cours ou en attente et la taille bornée de la file."""
+    manager = JobManager(fake_execute, workers=1, queue_size=1)
+    try:
+        running = await manager.submit("slow", {"delay": 10})
+        await wait_for_status(manager, running["id"], ("running",))
+        queued = await manager.submit("slow", {"delay": 10})
+        with pytest.raises(JobQueueFullError):
+            await manager.submit("slow", {})
+
+        await manager.cancel(queued["id"])
+        await manager.cancel(running["id"])
+        assert (await wait_for_status(manager, running["id"]))["status"] == JobStatus.CANCELLED
+        assert (await wait_for_status(manager, queued["id"]))["status"] == JobStatus.CANCELLED
+    finally:
+        await manager.stop()
+
+@pytest.mark.asyncio
+async def test_watch_yields_each_status_change():
+    """Test pour vérifier le flux des changements d'état jusqu'à l'état final."""
+    manager = JobManager(fake_execute, workers=1, queue_size=10, poll_interval=0.01)
+    try:
+        job = await manager.submit("echo", {"value": 1, "delay": 0.05})
+        statuses = [record["status"] async for record in manager.watch(job["id"]) if record is not None]
+        assert statuses[-1] == JobStatus.SUCCEEDED
+        assert statuses[0] in (JobStatus.QUEUED, JobStatus.RUNNING)
+    finally:
+        await manager.stop()
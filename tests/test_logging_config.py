@@ -0,0 +1,54 @@
+import json
+import logging
+import queue
+import sys
+from logging_config import JsonFormatter, NonBlockingQueueHandler, Truncated, is_sampled
+from config import config
+
+def test_json_formatter_includes_structured_fields():
+    """Test pour vérifier le format JSON et les champs structurés."""
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "Outil %s", ("greet",), None)
+    record.fields = {"route": "call_tool"}
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "Outil greet"
+    assert data["route"] == "call_tool"
+    assert data["level"] == "INFO"
+
+def test_queue_handler_never_blocks():
+    """Test pour vérifier que les logs sont abandonnés plutôt que de bloquer quand la file est pleine."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    handler.emit(record)
+    handler.emit(record)
+    assert handler.dropped == 1
+
+def test_queue_handler_snapshots_record_on_enqueue():
+    """Test pour vérifier que le message et l'exception sont figés à la mise en file."""
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    params = {"name": "Alice"}
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "Params %s", (params,), sys.exc_info())
+    handler.emit(record)
+    params["name"] = "Bob"
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "Params {'name': 'Alice'}"
+    assert queued.args is None and queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(queued))["exception"]
+    assert logging.Formatter().format(queued).endswith("ValueError: boom")
+
+def test_truncated_is_lazy_and_bounded():
+    """Test pour vérifier la troncature des valeurs volumineuses."""
+    assert str(Truncated("x" * 1000, max_length=10)).startswith("xxxxxxxxxx...")
+    assert str(Truncated({"a": 1})) == "{'a': 1}"
+
+def test_is_sampled_per_route(monkeypatch):
+    """Test pour vérifier les taux d'échantillonnage par route."""
+    monkeypatch.setitem(config.logging.sample_rates, "never", 0.0)
+    assert not any(is_sampled("never") for _ in range(100))
+    monkeypatch.setitem(config.logging.sample_rates, "always", 1.0)
+    assert all(is_sampled("always") for _ in range(100))
@@ -0,0 +1,99 @@
+import time
+from monitoring import SystemSampler, get_health_status, system_sampler
+
+def test_system_sampler_snapshot():
+    """Test pour vérifier qu'un échantillon contient les métriques attendues."""
+    sampler = SystemSampler(interval=60, max_age=30)
+    assert sampler.get_snapshot() is None
+    snapshot = sampler.sample()
+    assert sampler.get_snapshot() is snapshot
+    assert snapshot["connections"] >= 0
+    assert 0 <= snapshot["memory_percent"] <= 100
+
+def test_get_health_status_reads_snapshot():
+    """Test pour vérifier que le health check lit l'instantané sans bloquer."""
+    system_sampler.sample()
+    start = time.perf_counter()
+    status = get_health_status()
+    assert time.perf_counter() - start < 0.05
+    assert status["status"] in ("ok", "warning", "critical")
+    assert status["details"]["snapshot_age_seconds"] < system_sampler.max_age
+
+def test_prometheus_middleware_labels_by_route_template():
+    """Test pour vérifier que les métriques sont étiquetées par modèle de route."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from monitoring import PrometheusMiddleware, REQUEST_COUNT, OTHER_ENDPOINT, UNMATCHED_ENDPOINT
+    
+    test_app = FastAPI()
+    
+    @test_app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"item_id": item_id}
+    
+    @test_app.get("/other")
+    async def other():
+        return {}
+    
+    test_app.add_middleware(PrometheusMiddleware, max_endpoints=2)
+    test_client = TestClient(test_app)
+    
+    for item_id in ("a", "b", "c"):
+        response = test_client.get(f"/items/{item_id}")
+        assert response.status_code == 200
+        assert float(response.headers["X-Process-Time"]) >= 0
+    test_client.get("/missing")
+    test_client.get("/other")
+    
+    assert REQUEST_COUNT.labels(method="GET", endpoint="/items/{item_id}", status=200)._value.get() == 3
+    assert REQUEST_COUNT.labels(method="GET", endpoint=UNMATCHED_ENDPOINT, status=404)._value.get() >= 1
+    # Limite de cardinalité atteinte: le troisième modèle est regroupé
+    assert REQUEST_COUNT.labels(method="GET", endpoint=OTHER_ENDPOINT, status=200)._value.get() >= 1
+
+def test_event_loop_monitor_detects_blocking_callback():
+    """Test pour vérifier la mesure du retard et la détection d'un callback bloquant."""
+    import asyncio
+    from monitoring import EventLoopMonitor
+    
+    async def blocking_handler():
+        time.sleep(0.08)
+    
+    async def scenario(monitor):
+        monitor.start()
+        try:
+            await asyncio.sleep(0.03)
+            await asyncio.create_task(blocking_handler())
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+    
+    monitor = EventLoopMonitor(interval=0.01, slow_threshold=0.05)
+    asyncio.run(scenario(monitor))
+    stats = monitor.get_stats()
+    assert stats["lag"]["max_seconds"] >= 0.03
+    assert any(cb["callback"].endswith("blocking_handler") for cb in stats["slow_callbacks"])
+    assert monitor.original_handle_run is None
+
+def test_slow_callback_label_has_no_memory_address():
+    """Test pour vérifier que l'étiquette d'un callback lent ne dépend pas de l'instance (cardinalité bornée)."""
+    import asyncio
+    import functools
+    from monitoring import EventLoopMonitor
+
+    class Job:
+        def __call__(self):
+            pass
+
+    def handler(value):
+        pass
+
+    loop = asyncio.new_event_loop()
+    try:
+        for callback in (functools.partial(handler, 1), Job()):
+            handle = asyncio.Handle(callback, (), loop)
+            name, detail = EventLoopMonitor.describe_handle(handle)
+            assert "0x" not in name
+            assert name.endswith(".handler") or name.endswith(".Job")
+            assert detail == repr(callback)
+    finally:
+        loop.close()
@@ -0,0 +1,58 @@
+import threading
+import time
+import pytest
+from profiling import SamplingProfiler, HeapProfiler, ProfilerBusyError, render_collapsed
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    """Test pour vérifier que le profileur relève les piles du thread ciblé."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    try:
+        result = SamplingProfiler(max_duration=5).profile(0.3, interval=0.005, thread_id=worker.ident)
+    finally:
+        stop.set()
+        worker.join()
+    assert result["samples"] > 0
+    assert any("busy_loop" in stack for stack in result["stacks"])
+    assert render_collapsed(result["stacks"]).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+def test_sampling_profiler_single_session():
+    """Test pour vérifier qu'une seule session de profilage peut tourner à la fois."""
+    profiler = SamplingProfiler(max_duration=5)
+    worker = threading.Thread(target=profiler.profile, args=(0.3,))
+    worker.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+    worker.join()
+
+def test_sampling_profiler_rejects_invalid_arguments_and_stops_on_time():
+    """Test pour vérifier le refus des paramètres invalides et l'arrêt de la session à sa durée."""
+    with pytest.raises(ValueError):
+        SamplingProfiler(max_overhead=0)
+    profiler = SamplingProfiler(max_duration=5, max_overhead=1e-6)
+    for interval in (0, -1, 0.5):
+        with pytest.raises(ValueError):
+            profiler.profile(0.2, interval=interval)
+    # Intervalle élargi par le plafond de surcoût: le sommeil reste borné par la fin de session
+    result = profiler.profile(0.2, interval=0.1)
+    assert result["final_interval_seconds"] > 0.2
+    assert result["duration_seconds"] < 0.5
+
+def test_heap_snapshot_diff():
+    """Test pour vérifier la comparaison entre deux instantanés du tas."""
+    profiler = HeapProfiler()
+    assert profiler.start()
+    try:
+        first = profiler.snapshot()
+        assert first["diff"] is None
+        data = [bytearray(1024) for _ in range(100)]
+        second = profiler.snapshot()
+        assert second["diff"] and "size_diff_bytes" in second["diff"][0]
+    finally:
+        profiler.stop()
@@ -0,0 +1,25 @@
+import os
+import sys
+import httpx
+import pytest
+from app import app
+from cache import ToolPolicy, tool_cache_manager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay import non_idempotent_tools
+
+@pytest.mark.asyncio
+async def test_remote_listing_reports_non_idempotent_tools(monkeypatch):
+    """Test pour vérifier que le rejeu contre un serveur lit l'idempotence des outils sur /list_tools/."""
+    monkeypatch.setitem(tool_cache_manager.policies, "calculate", ToolPolicy(cacheable=False, idempotent=False))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay") as client:
+        assert await non_idempotent_tools(client, {}, remote=True) == ["calculate"]
+
+@pytest.mark.asyncio
+async def test_failing_remote_listing_does_not_stop_replay(monkeypatch, capsys):
+    """Test pour vérifier qu'une liste d'outils indisponible laisse le rejeu continuer avec les politiques locales."""
+    monkeypatch.setitem(tool_cache_manager.policies, "calculate", ToolPolicy(cacheable=False, idempotent=False))
+    transport = httpx.MockTransport(lambda request: httpx.Response(500, json={"detail": "erreur"}))
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+        assert await non_idempotent_tools(client, {}, remote=True) == ["calculate"]
+    assert "liste des outils indisponible" in capsys.readouterr().err
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+import pytest
+import cache
+from fastapi.responses import StreamingResponse
+from responses import FastJSONResponse, ResultTooLargeError, dumps_json, result_response, serialize_result, wrap_result
+from server import execute_tool_serialized
+from config import config
+
+def test_fast_json_response_matches_default_encoding():
+    """Test pour vérifier que la réponse rapide produit le même JSON que l'encodeur par défaut."""
+    content = {"tools": [{"name": "greet", "cache_ttl": None, "cachable": True}], "ratio": 0.5}
+    response = FastJSONResponse(content)
+    assert json.loads(response.body) == content
+    assert response.media_type == "application/json"
+
+def test_wrap_result_passes_bytes_through():
+    """Test pour vérifier que le résultat déjà sérialisé est inséré sans ré-encodage."""
+    response = wrap_result(dumps_json({"value": "é"}))
+    assert json.loads(response.body) == {"result": {"value": "é"}}
+
+@pytest.mark.asyncio
+async def test_execute_tool_serialized_uses_raw_cache(monkeypatch):
+    """Test pour vérifier qu'un résultat présent dans Redis est renvoyé sans décodage."""
+    async def fake_raw(key):
+        return '{"cached": true}'
+
+    monkeypatch.setattr(config.cache, "enabled", True)
+    monkeypatch.setattr(cache, "get_raw_from_cache", fake_raw)
+    monkeypatch.setitem(cache.tool_cache_manager.cacheable_tools, "greet", 60)
+
+    assert await execute_tool_serialized("greet", {"name": "Test"}) == b'{"cached": true}'
+
+def test_serialize_result_chunks_lists_and_enforces_limit():
+    """Test pour vérifier la sérialisation par morceaux d'une liste et le contrôle de la taille maximale."""
+    items = [{"index": i, "text": "x" * 100} for i in range(200)]
+    result = serialize_result(items, limit=100000, chunk_size=1024)
+    assert len(result.chunks) > 1
+    assert result.size == len(result.to_bytes())
+    assert json.loads(result.to_bytes()) == items
+    assert json.loads(serialize_result([]).to_bytes()) == []
+
+    with pytest.raises(ResultTooLargeError):
+        serialize_result(items, limit=5000, tool_name="big")
+
+@pytest.mark.asyncio
+async def test_large_result_is_streamed():
+    """Test pour vérifier qu'un résultat au-delà du seuil est diffusé par morceaux."""
+    items = ["é" * 1000 for _ in range(50)]
+    response = result_response(serialize_result(items, chunk_size=4096), stream_threshold=10000, chunk_size=4096)
+    assert isinstance(response, StreamingResponse)
+    body = [chunk async for chunk in response.body_iterator]
+    assert len(body) > 3
+    assert json.loads(b"".join(body)) == {"result": items}
+
+    small = result_response(serialize_result({"ok": True}), stream_threshold=10000)
+    assert json.loads(small.body) == {"result": {"ok": True}}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", ["compress", "spill", "skip"])
+async def test_large_result_cache_policies(monkeypatch, tmp_path, policy):
+    """Test pour vérifier les politiques de cache des résultats volumineux (compression, disque, aucune)."""
+    monkeypatch.setattr(config.cache, "large_result_threshold", 1000)
+    monkeypatch.setattr(config.cache, "large_result_policy", policy)
+    monkeypatch.setattr(config.cache, "spill_dir", str(tmp_path))
+    value = [{"index": i} for i in range(500)]
+    stored = await cache.set_serialized_in_cache("tool:test:large", serialize_result(value), ttl=60, value=value)
+
+    if policy == "skip":
+        assert stored is False
+        assert await cache.get_from_cache("tool:test:large") is None
+        return
+    assert stored is True
+    assert await cache.get_from_cache("tool:test:large") == value
+    serialized = await cache.get_serialized_from_cache("tool:test:large")
+    assert json.loads(serialized.to_bytes()) == value
+    assert (serialized.path is not None) == (policy == "spill")
+    await cache.delete_from_cache("tool:test:large")
+
+@pytest.mark.asyncio
+async def test_spill_files_are_removed_on_invalidation_and_sweep(monkeypatch, tmp_path):
+    """Test pour vérifier la suppression des fichiers sur disque à l'invalidation, au vidage et au-delà de l'âge maximal."""
+    monkeypatch.setattr(config.cache, "large_result_threshold", 1000)
+    monkeypatch.setattr(config.cache, "large_result_policy", "spill")
+    monkeypatch.setattr(config.cache, "spill_dir", str(tmp_path))
+    value = [{"index": i} for i in range(500)]
+    for key in ("tool:alpha:1", "tool:beta:1", "tool:beta:2"):
+        assert await cache.set_serialized_in_cache(key, serialize_result(value), ttl=0, value=value)
+    assert len(list(tmp_path.iterdir())) == 3
+
+    assert await cache.tool_cache_manager.invalidate_tool_cache("beta")
+    assert [path.name.endswith("-0.json") for path in tmp_path.iterdir()] == [True]
+    assert await cache.get_from_cache("tool:alpha:1") == value
+
+    # Fichier sans expiration plus ancien que CACHE_SPILL_MAX_AGE: supprimé par le nettoyage
+    monkeypatch.setattr(config.cache, "spill_max_age", 3600)
+    monkeypatch.setattr(cache, "_last_spill_sweep", 0.0)
+    old = time.time() - 7200
+    for path in tmp_path.iterdir():
+        os.utime(path, (old, old))
+    cache._sweep_spill_dir()
+    assert list(tmp_path.iterdir()) == []
+    assert await cache.get_from_cache("tool:alpha:1") is None
+
+    assert await cache.set_serialized_in_cache("tool:gamma:1", serialize_result(value), ttl=60, value=value)
+    assert await cache.clear_cache()
+    assert list(tmp_path.iterdir()) == []
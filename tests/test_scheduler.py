@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from scheduler import FairScheduler, SchedulerQueueFullError, select_priority
+
+async def run_waiters(scheduler, requests):
+    """Lance les demandes (priorité, locataire) dans l'ordre et renvoie l'ordre de service."""
+    order = []
+
+    async def waiter(label, priority, tenant):
+        await scheduler.acquire(priority, tenant)
+        order.append(label)
+
+    tasks = []
+    for label, priority, tenant in requests:
+        tasks.append(asyncio.create_task(waiter(label, priority, tenant)))
+        await asyncio.sleep(0)
+    for _ in requests:
+        scheduler.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+@pytest.mark.asyncio
+async def test_light_user_is_not_queued_behind_heavy_user():
+    """Test pour vérifier qu'un utilisateur léger passe devant la rafale d'un utilisateur lourd."""
+    scheduler = FairScheduler(capacity=1)
+    await scheduler.acquire("interactive", "heavy")  # Emplacement occupé
+    requests = [(f"heavy-{i}", "interactive", "heavy") for i in range(20)]
+    requests.append(("light", "interactive", "light"))
+    order = await run_waiters(scheduler, requests)
+    assert order.index("light") <= 1
+
+@pytest.mark.asyncio
+async def test_priority_classes_are_weighted():
+    """Test pour vérifier que la classe admin passe devant la classe batch."""
+    scheduler = FairScheduler(capacity=1)
+    await scheduler.acquire("batch", "job")
+    requests = [(f"batch-{i}", "batch", "job") for i in range(5)] + [("admin", "admin", "ops")]
+    order = await run_waiters(scheduler, requests)
+    assert order[0] == "admin"
+
+@pytest.mark.asyncio
+async def test_queue_limit_and_cancellation():
+    """Test pour vérifier la limite de file par classe et le retrait d'une demande annulée."""
+    scheduler = FairScheduler(capacity=1, queue_limits={"batch": 1})
+    await scheduler.acquire("batch", "a")
+    waiting = asyncio.create_task(scheduler.acquire("batch", "a"))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerQueueFullError):
+        await scheduler.acquire("batch", "b")
+
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert scheduler.queued["batch"] == 0
+    scheduler.release()
+    assert scheduler.available == 1
+    # Libération en trop: signalée, la capacité reste inchangée
+    with pytest.raises(RuntimeError):
+        scheduler.release()
+    assert scheduler.available == 1 and scheduler.in_use == 0
+
+def test_select_priority():
+    """Test pour vérifier que seule la classe admin est réservée."""
+    assert select_priority("batch") == "batch"
+    assert select_priority("admin") == "interactive"
+    assert select_priority("admin", allow_admin=True) == "admin"
+    assert select_priority(None) == "interactive"
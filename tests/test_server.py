@@ -1,7 +1,11 @@
 import pytest
 from fastmcp import FastMCP, Client
 import asyncio
-from server import execute_tool, mcp
+from config import config
+from resilience import ToolExecutionError, get_circuit_breaker, retry
+from monitoring import TOOL_CACHE_LOOKUPS
+import server
+from server import execute_tool, execute_tool_result, mcp, health_check, server_health, client_pool
 
 @pytest.mark.asyncio
 async def test_execute_tool():
@@ -17,3 +21,186 @@ async def test_greet_tool():
     async with client:
         result = await client.call_tool("greet", {"name": "TestUser"})
         assert result == "Bonjour, TestUser!"
+
+@pytest.mark.asyncio
+async def test_health_check_uses_passive_signal():
+    """Test pour vérifier que le health check n'emprunte pas de client du pool."""
+    available = client_pool.idle_count()
+    server_health.cached_result = None
+    server_health.record_success()
+    status = await health_check()
+    assert status["status"] == "healthy"
+    assert status["source"] == "passive"
+    assert client_pool.idle_count() == available
+    # Le résultat est mis en cache
+    assert await health_check() is status
+
+@pytest.mark.asyncio
+async def test_deterministic_tool_error_is_negatively_cached(monkeypatch):
+    """Test pour vérifier qu'une erreur d'outil n'est pas réessayée et qu'elle est servie depuis le cache négatif."""
+    monkeypatch.setattr(config.cache, "negative_enabled", True)
+    params = {"operation": "divide", "a": 1, "b": 0}
+    breaker = get_circuit_breaker("fastmcp_execute_tool")
+    failures = breaker.failure_count
+    with pytest.raises(ToolExecutionError):
+        await execute_tool_result("calculate", params)
+    assert breaker.failure_count == failures
+
+    # Deuxième appel: erreur relue dans le cache, sans emprunter de client
+    negative_hits = TOOL_CACHE_LOOKUPS.labels(tool_name="calculate", result="negative_hit")._value.get()
+    available = client_pool.idle_count()
+    with pytest.raises(ToolExecutionError, match="Division par zéro"):
+        await execute_tool_result("calculate", params)
+    with pytest.raises(ToolExecutionError):
+        await execute_tool("calculate", params)
+    assert client_pool.idle_count() == available
+    assert TOOL_CACHE_LOOKUPS.labels(tool_name="calculate", result="negative_hit")._value.get() == negative_hits + 2
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_calculate_batch_reports_errors_per_element(monkeypatch, use_numpy):
+    """Test pour vérifier le calcul par lot (avec et sans NumPy) et le signalement des erreurs par élément."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(server, "NUMPY_AVAILABLE", use_numpy)
+    result = server.calculate_batch(["add", "divide", "pow", "DIVIDE"], [1, 2, 3, 9], [2, 0, 1, 3])
+    assert result["results"] == [3, None, None, 3]
+    assert result["errors"] == [{"index": 1, "error": "Division par zéro impossible"},
+                                {"index": 2, "error": "Opération non reconnue: pow"}]
+    # Une valeur unique vaut pour tous les éléments
+    assert server.calculate_batch("multiply", [1, 2, 3], 2)["results"] == [2, 4, 6]
+    with pytest.raises(ValueError):
+        server.calculate_batch("add", [1, 2], [1, 2, 3])
+    assert server.get_batch_tool("calculate") == "calculate_batch"
+    assert server.get_batch_tool("greet") is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_numpy", [False, True])
+async def test_micro_batched_responses_match_unbatched(monkeypatch, use_numpy):
+    """Test pour vérifier que les réponses de /call_tool/ sont identiques, octet pour octet, avec et sans regroupement des appels."""
+    import httpx
+    from app import app
+    from monitoring import MICROBATCH_FLUSHES
+    if use_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(server, "NUMPY_AVAILABLE", use_numpy)
+    monkeypatch.setattr(config.server, "microbatch_max_size", 8)
+    monkeypatch.setattr(config.cache, "enabled", False)
+    monkeypatch.setattr(server, "micro_batchers", {})
+    calls = ([{"operation": "add", "a": i, "b": 1} for i in range(6)]
+             + [{"operation": "divide", "a": 1, "b": 0}, {"operation": "pow", "a": 2, "b": 3}])
+
+    async def call_all(batched: bool):
+        monkeypatch.setattr(config.server, "microbatch_enabled", batched)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            responses = await asyncio.gather(*(http.post("/call_tool/", json={"tool_name": "calculate", "params": params})
+                                               for params in calls))
+        return [(response.status_code, response.content) for response in responses]
+
+    unbatched = await call_all(False)
+    flushes = MICROBATCH_FLUSHES.labels(tool_name="calculate", trigger="size")._value.get()
+    batched = await call_all(True)
+    assert MICROBATCH_FLUSHES.labels(tool_name="calculate", trigger="size")._value.get() == flushes + 1
+    assert batched == unbatched
+    assert unbatched[0] == (200, b'{"result":1.0}')
+    assert [status for status, _ in unbatched[6:]] == [400, 400]
+
+    # Un appel aux paramètres invalides fait refuser le lot: chacun est alors rejoué seul
+    monkeypatch.setattr(config.server, "microbatch_enabled", True)
+    calls = [{"operation": "add", "a": 1, "b": 2}, {"operation": "add", "a": "abc", "b": 2}]
+    results = await asyncio.gather(*(execute_tool("calculate", params) for params in calls), return_exceptions=True)
+    assert results[0] == 3.0
+    assert isinstance(results[1], ToolExecutionError)
+
+@pytest.mark.asyncio
+async def test_failed_micro_batch_is_one_breaker_event(monkeypatch):
+    """Test pour vérifier qu'un lot en échec compte une seule fois pour le circuit breaker et s'exécute dans son propre contexte d'ordonnancement."""
+    from resilience import SharedFailureError
+    from scheduler import request_priority, request_tenant, scheduling_context
+    monkeypatch.setattr(config.server, "microbatch_enabled", True)
+    monkeypatch.setattr(config.server, "microbatch_max_size", 6)
+    monkeypatch.setattr(config.cache, "enabled", False)
+    monkeypatch.setattr(config.resilience, "retry_enabled", False)
+    monkeypatch.setattr(server, "micro_batchers", {})
+    seen = []
+
+    async def failing_backend(tool_name, params):
+        seen.append((tool_name, request_priority.get(), request_tenant.get()))
+        raise ConnectionError("backend injoignable")
+
+    monkeypatch.setattr(server, "_call_tool_backend", failing_backend)
+    breaker = get_circuit_breaker("fastmcp_execute_tool")
+    breaker.failure_count = 0
+
+    async def call(i):
+        # Un seul membre interactif, les autres en classe batch
+        with scheduling_context("interactive" if i == 5 else "batch", f"tenant-{i}"):
+            return await execute_tool("calculate", {"operation": "add", "a": i, "b": 1})
+
+    results = await asyncio.gather(*(call(i) for i in range(6)), return_exceptions=True)
+    assert all(isinstance(r, SharedFailureError) for r in results)
+    assert seen == [("calculate_batch", "interactive", "microbatch:calculate")]
+    assert breaker.failure_count == 1
+    breaker.failure_count = 0
+
+@pytest.mark.asyncio
+async def test_hung_backend_call_times_out_and_ejects(monkeypatch):
+    """Test pour vérifier qu'un appel sans réponse expire, ferme son client et écarte le backend."""
+    slow_mcp = FastMCP("slow")
+
+    @slow_mcp.tool()
+    async def hang() -> str:
+        await asyncio.sleep(10)
+        return "trop tard"
+
+    pool = server.ClientPool(slow_mcp, max_size=2, backend_urls=[])
+    backend = pool.backends[0]
+    backend.failure_threshold = 1
+    monkeypatch.setattr(server, "client_pool", pool)
+
+    with pytest.raises(TimeoutError):
+        await server._call_tool_backend("hang", {}, timeout=0.05)
+    assert backend.is_ejected()
+    assert backend.clients == [] and backend.idle == []
+    assert backend.outstanding == 0
+
+@pytest.mark.asyncio
+async def test_probe_times_out_without_counting_a_routed_call(monkeypatch):
+    """Test pour vérifier que la sonde de santé expire et ne compte pas d'appel routé."""
+    class HungClient:
+        def __init__(self, transport):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def list_tools(self):
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(server, "Client", HungClient)
+    routed = server.BACKEND_ROUTED.labels(mode="least_outstanding")
+    before = routed._value.get()
+    health = server.ServerHealth("fastmcp_execute_tool", probe_timeout=0.05)
+
+    assert await asyncio.wait_for(health.probe(), timeout=2) is False
+    assert "0.05s" in health.last_probe_error
+    assert routed._value.get() == before
+
+@pytest.mark.asyncio
+async def test_undeclared_tool_exception_stays_retryable(monkeypatch):
+    """Test pour vérifier qu'une exception non déclarée déterministe est réessayée et n'est pas une ToolExecutionError."""
+    flaky_mcp = FastMCP("flaky")
+    attempts = []
+
+    @flaky_mcp.tool()
+    def flaky() -> str:
+        attempts.append(1)
+        raise RuntimeError("indisponible")
+
+    monkeypatch.setattr(server, "client_pool", server.ClientPool(flaky_mcp, max_size=2, backend_urls=[]))
+    monkeypatch.setattr(config.resilience, "retry_enabled", True)
+    with pytest.raises(server.ToolFailureError, match="indisponible"):
+        await retry(max_retries=2, delay=0)(server._call_tool_backend)("flaky", {})
+    assert len(attempts) == 3
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_optional_dependencies_are_not_imported_at_startup():
+    """Test pour vérifier que l'import de l'application ne charge ni Redis, ni jose/passlib, ni psutil."""
+    code = ("import sys, app; "
+            "print('loaded=' + ','.join(m for m in ('redis', 'jose', 'passlib', 'psutil') if m in sys.modules))")
+    env = dict(os.environ, REDIS_URL="")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    loaded = [line for line in output.splitlines() if line.startswith("loaded=")]
+    assert loaded == ["loaded="]
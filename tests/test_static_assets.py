@@ -0,0 +1,42 @@
+import gzip
+from static_assets import StaticAsset, StaticAssetStore, parse_accept_encoding
+
+def test_parse_accept_encoding():
+    """Test pour vérifier l'analyse de l'en-tête Accept-Encoding."""
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0") == {"gzip": 1.0, "br": 0.5, "identity": 0.0}
+
+def test_asset_negotiation_and_etag():
+    """Test pour vérifier la sélection de la variante précompressée et la réponse 304."""
+    content = b"body { color: red; }\n" * 100
+    asset = StaticAsset("css/styles.css", content)
+    assert gzip.decompress(asset.variants["gzip"]) == content
+
+    response = asset.build_response({"accept-encoding": "gzip"}, "no-cache")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.body == asset.variants["gzip"]
+
+    not_modified = asset.build_response({"accept-encoding": "gzip", "if-none-match": response.headers["etag"]}, "no-cache")
+    assert not_modified.status_code == 304
+    # Comparaison faible: ETag renvoyé par un proxy avec le préfixe W/
+    assert asset.matches(f'"other", W/{response.headers["etag"]}')
+    assert not asset.matches('"other"')
+    assert asset.select_encoding("gzip;q=0") == "identity"
+
+def test_store_rewrites_index_with_hashed_urls(tmp_path):
+    """Test pour vérifier les URL à hash de contenu et leurs politiques de cache."""
+    static_dir = tmp_path / "static"
+    (static_dir / "js").mkdir(parents=True)
+    (static_dir / "js" / "app.js").write_text("console.log('ok');")
+    index_file = tmp_path / "index.html"
+    index_file.write_text('<script src="/static/js/app.js"></script>')
+
+    store = StaticAssetStore(directory=str(static_dir), index_file=str(index_file))
+    hashed_url = store.url_for("js/app.js")
+    assert hashed_url != "/static/js/app.js"
+    assert hashed_url.encode() in store.get_index().variants["identity"]
+
+    asset, cache_control = store.get(hashed_url[len("/static/"):])
+    assert asset.path == "js/app.js"
+    assert "immutable" in cache_control
+    assert store.get("js/app.js")[1] == "no-cache"
+    assert store.get("missing.js")[0] is None
@@ -0,0 +1,47 @@
+import pytest
+import tracing
+from cache import get_from_cache, set_in_cache
+
+pytest.importorskip("opentelemetry.sdk")
+
+@pytest.fixture
+def memory_tracing():
+    """Active le tracing avec l'exportateur en mémoire pour la durée du test."""
+    assert tracing.setup_tracing(exporter="memory", sample_rate=1.0, tail_keep_ratio=1.0)
+    yield tracing.memory_exporter
+    tracing.disable_tracing()
+
+@pytest.mark.asyncio
+async def test_cache_spans_are_children_of_current_span(memory_tracing):
+    """Test pour vérifier que les accès au cache produisent des spans enfants."""
+    with tracing.start_span("root"):
+        await set_in_cache("tracing:test", {"value": 1}, ttl=60)
+        await get_from_cache("tracing:test")
+    spans = {span.name: span for span in memory_tracing.get_finished_spans()}
+    assert spans["cache.get"].attributes["cache.hit"] is True
+    assert spans["cache.set"].parent.span_id == spans["root"].context.span_id
+
+def test_incoming_trace_context_is_propagated(memory_tracing):
+    """Test pour vérifier que le contexte de trace entrant est repris par le span serveur."""
+    from fastapi.testclient import TestClient
+    from app import app
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = TestClient(app).get("/health/live", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    assert response.status_code == 200
+    server_span = next(s for s in memory_tracing.get_finished_spans() if s.name == "GET /health/live")
+    assert format(server_span.context.trace_id, "032x") == trace_id
+    assert server_span.attributes["http.status_code"] == 200
+
+def test_tail_sampling_drops_fast_successful_traces():
+    """Test pour vérifier que l'échantillonnage en queue ne garde que les traces lentes ou en erreur."""
+    assert tracing.setup_tracing(exporter="memory", slow_threshold=10, tail_keep_ratio=0.0)
+    try:
+        with tracing.start_span("fast"):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.start_span("failing"):
+                raise ValueError("boom")
+        names = [span.name for span in tracing.memory_exporter.get_finished_spans()]
+        assert names == ["failing"]
+    finally:
+        tracing.disable_tracing()
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from auth import create_access_token
+from config import config
+from ws_gateway import ToolCallSession
+
+async def fake_call_tool(tool_name, params, user):
+    if tool_name == "missing":
+        raise HTTPException(status_code=400, detail="Outil inconnu")
+    await asyncio.sleep(params.get("delay", 0))
+    return {"result": f"{tool_name}:{user.username if user else None}"}
+
+def make_client(max_concurrency=4):
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await ToolCallSession(websocket, fake_call_tool, max_concurrency=max_concurrency, auth_timeout=1).run()
+
+    return TestClient(app)
+
+def test_calls_are_multiplexed_and_complete_out_of_order():
+    """Test pour vérifier que les réponses arrivent dans l'ordre d'achèvement avec leur id."""
+    with make_client().websocket_connect("/ws") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        ws.send_json({"type": "call", "id": "slow", "tool_name": "greet", "params": {"delay": 0.2}})
+        ws.send_json({"type": "call", "id": "fast", "tool_name": "greet", "params": {}})
+        ws.send_json({"type": "call", "id": "bad", "tool_name": "missing", "params": {}})
+        responses = [ws.receive_json() for _ in range(3)]
+
+    assert responses[-1] == {"type": "result", "id": "slow", "result": "greet:None"}
+    by_id = {r["id"]: r for r in responses}
+    assert by_id["fast"]["type"] == "result"
+    assert by_id["bad"] == {"type": "error", "id": "bad", "status": 400, "detail": "Outil inconnu"}
+
+def test_authentication_by_first_message(monkeypatch):
+    """Test pour vérifier l'authentification unique par message et le refus sans identifiants."""
+    monkeypatch.setattr(config.security, "auth_enabled", True)
+    client = make_client()
+
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "auth", "token": create_access_token({"sub": "admin"})})
+        assert ws.receive_json()["user"] == "admin"
+        ws.send_json({"type": "call", "id": 1, "tool_name": "greet", "params": {}})
+        assert ws.receive_json()["result"] == "greet:admin"
+
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "call", "id": 1, "tool_name": "greet", "params": {}})
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_json()
+        assert exc_info.value.code == 1008
+
+def test_cancel_is_read_while_all_slots_are_busy():
+    """Test pour vérifier qu'une annulation passe quand tous les emplacements sont occupés, et qu'un id invalide n'interrompt pas la session."""
+    with make_client(max_concurrency=1).websocket_connect("/ws") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        ws.send_json({"type": "call", "id": "busy", "tool_name": "greet", "params": {"delay": 5}})
+        ws.send_json({"type": "call", "id": "queued", "tool_name": "greet", "params": {}})
+        ws.send_json({"type": "call", "id": "rejected", "tool_name": "greet", "params": {}})
+        assert ws.receive_json() == {"type": "error", "id": "rejected", "status": 429,
+                                     "detail": "Trop d'appels en cours sur cette connexion"}
+        ws.send_json({"type": "call", "id": {"n": 1}, "tool_name": "greet", "params": {}})
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "cancel", "id": [1]})
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "cancel", "id": "busy"})
+        assert ws.receive_json() == {"type": "error", "id": "busy", "status": 499, "detail": "Appel annulé"}
+        # L'appel en attente obtient l'emplacement libéré
+        assert ws.receive_json() == {"type": "result", "id": "queued", "result": "greet:None"}
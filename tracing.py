@@ -0,0 +1,200 @@
+import importlib.util
+import random
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from logging_config import logger
+from config import config
+from monitoring import get_route_template
+
+# OpenTelemetry est optionnel: sans lui, toutes les fonctions de ce module sont des no-op.
+# Il n'est importé qu'à l'activation du tracing (setup_tracing), pas au démarrage.
+OTEL_AVAILABLE = importlib.util.find_spec("opentelemetry") is not None
+propagate = None
+SpanKind = Status = StatusCode = None
+
+# Traceur actif (None si le tracing est désactivé)
+tracer = None
+# Exportateur en mémoire, utilisé par les tests
+memory_exporter = None
+
+class _NoopSpan:
+    """Span factice utilisé lorsque le tracing est désactivé."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def set_status(self, *args, **kwargs):
+        pass
+
+    def record_exception(self, exception: Exception):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class TailSamplingSpanProcessor:
+    """Processeur de spans avec échantillonnage en queue.
+
+    Les spans d'une trace sont mis en mémoire jusqu'à la fin du span racine
+    local. La trace est alors exportée si elle est lente, en erreur, ou tirée
+    au sort selon `keep_ratio`; sinon elle est abandonnée.
+
+    Implémente l'interface SpanProcessor du SDK sans en hériter, pour ne pas
+    importer le SDK tant que le tracing n'est pas activé.
+    """
+
+    def __init__(self, delegate, slow_threshold: float = 0.5, keep_ratio: float = 0.05, max_traces: int = 10000):
+        self.delegate = delegate
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.keep_ratio = keep_ratio
+        self.max_traces = max_traces
+        self.buffers: "OrderedDict[int, list]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def on_start(self, span, parent_context=None):
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def _on_ending(self, span):
+        pass
+
+    def on_end(self, span):
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self.lock:
+            spans = self.buffers.setdefault(trace_id, [])
+            spans.append(span)
+            if not is_local_root:
+                # Borner la mémoire: abandonner les traces les plus anciennes
+                while len(self.buffers) > self.max_traces:
+                    self.buffers.popitem(last=False)
+                return
+            del self.buffers[trace_id]
+        if self.should_keep(span, spans):
+            for buffered_span in spans:
+                self.delegate.on_end(buffered_span)
+
+    def should_keep(self, root, spans) -> bool:
+        """Décide si une trace terminée doit être exportée."""
+        if root.end_time - root.start_time >= self.slow_threshold_ns:
+            return True
+        if any(s.status.status_code == StatusCode.ERROR for s in spans):
+            return True
+        return random.random() < self.keep_ratio
+
+    def shutdown(self):
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+def create_exporter(exporter: str):
+    """Crée l'exportateur de spans configuré."""
+    global memory_exporter
+    if exporter == "memory":
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        memory_exporter = InMemorySpanExporter()
+        return memory_exporter
+    if exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter(endpoint=config.monitoring.trace_endpoint) if config.monitoring.trace_endpoint else OTLPSpanExporter()
+
+def setup_tracing(exporter: str = None, sample_rate: float = None, slow_threshold: float = None,
+                  tail_keep_ratio: float = None) -> bool:
+    """Configure le traceur OpenTelemetry.
+
+    Returns:
+        bool: True si le tracing est actif
+    """
+    global tracer, propagate, SpanKind, Status, StatusCode
+    if not OTEL_AVAILABLE:
+        logger.warning("OpenTelemetry n'est pas installé, tracing désactivé")
+        return False
+
+    exporter = exporter or config.monitoring.trace_exporter
+    sample_rate = sample_rate if sample_rate is not None else config.monitoring.trace_sample_rate
+    slow_threshold = slow_threshold if slow_threshold is not None else config.monitoring.trace_slow_threshold
+    tail_keep_ratio = tail_keep_ratio if tail_keep_ratio is not None else config.monitoring.trace_tail_keep_ratio
+
+    try:
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        span_exporter = create_exporter(exporter)
+        processor_class = SimpleSpanProcessor if exporter == "memory" else BatchSpanProcessor
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": "fastmcp-web-interface"}),
+            sampler=ParentBased(TraceIdRatioBased(sample_rate))
+        )
+        provider.add_span_processor(TailSamplingSpanProcessor(
+            processor_class(span_exporter),
+            slow_threshold=slow_threshold,
+            keep_ratio=tail_keep_ratio
+        ))
+        tracer = provider.get_tracer("fastmcp_web_interface")
+        logger.info(f"Tracing activé (exportateur={exporter}, échantillonnage={sample_rate})")
+        return True
+    except Exception as e:
+        logger.error(f"Impossible de configurer le tracing: {str(e)}")
+        tracer = None
+        return False
+
+def disable_tracing():
+    """Désactive le tracing."""
+    global tracer
+    tracer = None
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Ouvre un span enfant du span courant; no-op si le tracing est désactivé."""
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+class TracingMiddleware:
+    """Middleware ASGI ouvrant un span serveur par requête HTTP.
+
+    Le contexte de trace est extrait des en-têtes entrants (traceparent).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if tracer is None or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope.get("method", "")
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        context = propagate.extract(carrier)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(f"HTTP {method}", context=context, kind=SpanKind.SERVER) as span:
+            span.set_attribute("http.method", method)
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = get_route_template(scope)
+                span.update_name(f"{method} {route}")
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response
+
+from auth import User, get_current_principal
+from config import config
+from logging_config import logger
+from monitoring import WEBSOCKET_CALLS, WEBSOCKET_CONNECTIONS
+from responses import dumps_json
+
+# Codes de fermeture WebSocket (RFC 6455)
+WS_POLICY_VIOLATION = 1008
+
+# Signature de la fonction d'appel d'outil fournie par l'application:
+# (tool_name, params, user) -> {"result": ...} ou réponse déjà sérialisée
+ToolCaller = Callable[[str, Dict[str, Any], Optional[User]], Awaitable[Any]]
+
+def encode_result(request_id: Any, result: Any) -> str:
+    """Encode la réponse d'un appel: {"type": "result", "id": ..., "result": ...}."""
+    if isinstance(result, Response):
+        # Corps {"result": ...} déjà sérialisé (mode JSON rapide): inséré sans ré-encodage
+        return (b'{"type":"result","id":' + dumps_json(request_id) + b"," + result.body[1:]).decode("utf-8")
+    return dumps_json({"type": "result", "id": request_id, **result}).decode("utf-8")
+
+def encode_error(request_id: Any, status_code: int, detail: Any) -> str:
+    """Encode une erreur d'appel: {"type": "error", "id": ..., "status": ..., "detail": ...}."""
+    return dumps_json({"type": "error", "id": request_id, "status": status_code, "detail": detail}).decode("utf-8")
+
+def is_valid_id(request_id: Any) -> bool:
+    """Un id d'appel est une chaîne ou un entier (clé de la table des appels en cours)."""
+    return isinstance(request_id, (str, int)) and not isinstance(request_id, bool)
+
+class ToolCallSession:
+    """Session WebSocket multiplexant des appels d'outils.
+
+    Le client s'authentifie une seule fois (en-têtes Authorization / clé
+    d'API, ou premier message {"type": "auth"}), puis envoie des messages
+    {"type": "call", "id": ..., "tool_name": ..., "params": {...}}. Les
+    réponses sont renvoyées dans l'ordre de leur achèvement, avec le même id.
+
+    Au plus `max_concurrency` appels s'exécutent par connexion; les suivants
+    attendent un emplacement libre (en restant annulables), jusqu'à
+    `max_queued` appels en attente, au-delà desquels un appel est refusé
+    (429). Les messages continuent d'être lus pendant ce temps: une
+    annulation est prise en compte même quand tous les emplacements sont occupés.
+    """
+
+    def __init__(self, websocket: WebSocket, call_tool: ToolCaller,
+                 max_concurrency: int = 8, auth_timeout: float = 10, max_queued: Optional[int] = None):
+        self.websocket = websocket
+        self.call_tool = call_tool
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_concurrency if max_queued is None else max_queued
+        self.auth_timeout = auth_timeout
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.send_lock = asyncio.Lock()
+        self.pending: Dict[Any, asyncio.Task] = {}
+        self.user: Optional[User] = None
+        self.expires_at: Optional[float] = None
+
+    async def send(self, text: str):
+        """Envoie un message; les envois concurrents sont sérialisés."""
+        async with self.send_lock:
+            await self.websocket.send_text(text)
+
+    async def receive_json(self) -> Optional[Any]:
+        """Lit le prochain message JSON; None si le client s'est déconnecté."""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        data = message.get("text")
+        if data is None:
+            data = (message.get("bytes") or b"").decode("utf-8", errors="replace")
+        try:
+            return json.loads(data)
+        except ValueError:
+            return {}
+
+    async def authenticate(self) -> Tuple[bool, Optional[str]]:
+        """Authentifie la connexion; renvoie (succès, raison de l'échec)."""
+        if not config.security.auth_enabled:
+            return True, None
+
+        headers = self.websocket.headers
+        api_key = headers.get(config.security.api_key_header)
+        token = None
+        authorization = headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+
+        # Les navigateurs ne peuvent pas définir d'en-têtes: authentification par premier message
+        if not api_key and not token:
+            try:
+                message = await asyncio.wait_for(self.receive_json(), timeout=self.auth_timeout)
+            except asyncio.TimeoutError:
+                return False, "Délai d'authentification dépassé"
+            if not isinstance(message, dict) or message.get("type") != "auth":
+                return False, "Authentification requise"
+            api_key, token = message.get("api_key"), message.get("token")
+
+        try:
+            self.user = await get_current_principal(api_key=api_key, token=token)
+        except HTTPException as e:
+            return False, str(e.detail)
+
+        if token and not (api_key and config.security.api_keys_enabled):
+            from jose import jwt
+            self.expires_at = jwt.get_unverified_claims(token).get("exp")
+        return True, None
+
+    async def handle_call(self, request_id: Any, tool_name: str, params: Dict[str, Any]):
+        """Attend un emplacement libre, exécute l'appel et renvoie son résultat (ou son erreur) au client."""
+        async with self.slots:
+            await self.execute_call(request_id, tool_name, params)
+
+    async def execute_call(self, request_id: Any, tool_name: str, params: Dict[str, Any]):
+        """Exécute un appel (emplacement déjà obtenu) et envoie sa réponse."""
+        try:
+            result = await self.call_tool(tool_name, params, self.user)
+            text = encode_result(request_id, result)
+            WEBSOCKET_CALLS.labels(status="success").inc()
+        except HTTPException as e:
+            text = encode_error(request_id, e.status_code, e.detail)
+            WEBSOCKET_CALLS.labels(status="error").inc()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'appel WebSocket de l'outil {tool_name}: {str(e)}")
+            text = encode_error(request_id, status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+            WEBSOCKET_CALLS.labels(status="error").inc()
+        try:
+            await self.send(text)
+        except Exception:
+            # Client déconnecté entre-temps
+            pass
+
+    def start_call(self, message: Dict[str, Any]) -> Optional[str]:
+        """Démarre un appel d'outil; renvoie un message d'erreur s'il est invalide."""
+        request_id = message.get("id")
+        tool_name = message.get("tool_name")
+        params = message.get("params", {})
+        if not is_valid_id(request_id) or not isinstance(tool_name, str) or not isinstance(params, dict):
+            return encode_error(request_id, status.HTTP_400_BAD_REQUEST,
+                                "Les champs id (chaîne ou entier), tool_name et params sont requis")
+        if request_id in self.pending:
+            return encode_error(request_id, status.HTTP_409_CONFLICT, "Un appel avec cet id est déjà en cours")
+        if len(self.pending) >= self.max_concurrency + self.max_queued:
+            return encode_error(request_id, status.HTTP_429_TOO_MANY_REQUESTS,
+                                "Trop d'appels en cours sur cette connexion")
+
+        task = asyncio.create_task(self.handle_call(request_id, tool_name, params))
+        self.pending[request_id] = task
+
+        def done(_):
+            self.pending.pop(request_id, None)
+
+        task.add_done_callback(done)
+        return None
+
+    async def run(self):
+        """Accepte la connexion et traite les messages jusqu'à la déconnexion."""
+        await self.websocket.accept()
+        authenticated, reason = await self.authenticate()
+        if not authenticated:
+            logger.warning(f"Connexion WebSocket refusée: {reason}")
+            try:
+                await self.websocket.close(code=WS_POLICY_VIOLATION, reason=reason)
+            except Exception:
+                pass
+            return
+
+        WEBSOCKET_CONNECTIONS.inc()
+        try:
+            await self.send(dumps_json({
+                "type": "ready",
+                "user": self.user.username if self.user else None,
+                "max_concurrency": self.max_concurrency
+            }).decode("utf-8"))
+
+            while True:
+                # Lecture continue: les appels attendent leur emplacement dans leur propre tâche
+                message = await self.receive_json()
+                if message is None:
+                    break
+                if self.expires_at is not None and time.time() >= self.expires_at:
+                    await self.websocket.close(code=WS_POLICY_VIOLATION, reason="Token expiré")
+                    break
+
+                message_type = message.get("type") if isinstance(message, dict) else None
+                if message_type == "call":
+                    error = self.start_call(message)
+                    if error is not None:
+                        await self.send(error)
+                elif message_type == "cancel":
+                    request_id = message.get("id")
+                    task = self.pending.get(request_id) if is_valid_id(request_id) else None
+                    if not is_valid_id(request_id):
+                        await self.send(encode_error(request_id, status.HTTP_400_BAD_REQUEST,
+                                                     "Le champ id doit être une chaîne ou un entier"))
+                    elif task is not None and task.cancel():
+                        await self.send(encode_error(request_id, 499, "Appel annulé"))
+                elif message_type == "ping":
+                    await self.send('{"type":"pong"}')
+                elif message_type != "auth":
+                    await self.send(encode_error(None, status.HTTP_400_BAD_REQUEST, "Type de message inconnu"))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            # Les appels encore en cours sont annulés à la déconnexion
+            tasks = list(self.pending.values())
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            WEBSOCKET_CONNECTIONS.dec()